@@ -1,18 +1,26 @@
 """
 Main Flask application
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context, g
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import json
+import time
+import atexit
 import logging
+
+# Load environment variables before the project modules read their settings
+load_dotenv()
+
 from query_builder import QueryBuilder
 from search_engine import SearchEngine
 from name_extractor import NameExtractor
 from validator import Validator
-
-# Load environment variables
-load_dotenv()
+from pipeline import LookupPipeline
+from async_pipeline import AsyncLookupService
+from metrics import REGISTRY, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, collect_timings
+from deadline import deadline_scope
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +34,58 @@ query_builder = QueryBuilder()
 search_engine = SearchEngine()
 name_extractor = NameExtractor()
 validator = Validator()
+pipeline = LookupPipeline(query_builder, search_engine, name_extractor, validator)
+
+# Long-lived async pipeline, so /search/async keeps its connection pools between requests
+async_lookups = AsyncLookupService(pipeline)
+atexit.register(async_lookups.close)
+
+MAX_BATCH_ROWS = int(os.getenv('BATCH_MAX_ROWS', 1000))
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    started = g.get('started')
+    # Label by route pattern so the number of series stays bounded
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    return response
+
+def get_budget(data):
+    """Latency budget in seconds from the X-Budget-Ms header or 'budget_ms' field, None for the server default"""
+    value = request.headers.get('X-Budget-Ms') or data.get('budget_ms')
+    if value is None:
+        return None
+    
+    budget = float(value) / 1000
+    if budget <= 0:
+        raise ValueError('budget_ms must be positive')
+    return budget
+
+def get_stop_thresholds(data):
+    """Early-stop min_confidence (0..1) and min_sources (positive int) from the request, None for the defaults"""
+    min_confidence = data.get('min_confidence')
+    if min_confidence is not None:
+        if isinstance(min_confidence, bool):
+            raise ValueError('min_confidence must be a number')
+        min_confidence = float(min_confidence)
+        if not 0 <= min_confidence <= 1:
+            raise ValueError('min_confidence must be between 0 and 1')
+    
+    min_sources = data.get('min_sources')
+    if min_sources is not None:
+        if isinstance(min_sources, bool) or float(min_sources) != int(float(min_sources)):
+            raise ValueError('min_sources must be a whole number')
+        min_sources = int(float(min_sources))
+        if min_sources < 1:
+            raise ValueError('min_sources must be positive')
+    
+    return min_confidence, min_sources
 
 @app.route('/search', methods=['POST'])
 def search():
@@ -40,70 +100,128 @@ def search():
                 'error': 'Company and designation are required'
             }), 400
         
-        logger.info(f"Searching for {designation} at {company}")
+        try:
+            budget = get_budget(data)
+        except (TypeError, ValueError):
+            return jsonify({
+                'error': 'budget_ms must be a positive number of milliseconds'
+            }), 400
         
-        # Step 1: Build queries
-        queries = query_builder.build_queries(company, designation)
-        logger.info(f"Generated {len(queries)} queries: {queries}")
+        try:
+            min_confidence, min_sources = get_stop_thresholds(data)
+        except (TypeError, ValueError, OverflowError):
+            return jsonify({
+                'error': 'min_confidence must be a number between 0 and 1 and min_sources a positive whole number'
+            }), 400
         
-        # Step 2: Search
-        all_results = []
-        for query in queries:
-            logger.info(f"Executing query: {query}")
-            results = search_engine.search(query, max_results=5)
-            logger.info(f"Got {len(results)} raw results")
-            
-            filtered = search_engine.filter_credible_sources(results)
-            logger.info(f"Filtered to {len(filtered)} results")
-            
-            all_results.extend(filtered)
+        with deadline_scope(budget):
+            if data.get('progressive', pipeline.progressive):
+                response = pipeline.lookup_progressive(
+                    company, designation,
+                    min_confidence=min_confidence,
+                    min_sources=min_sources
+                )
+            else:
+                response = pipeline.lookup(company, designation)
         
-        logger.info(f"Total results after all queries: {len(all_results)}")
+        return jsonify(response)
+    
+    except Exception as e:
+        logger.error("Error in search: %s", e, exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/search/stream', methods=['GET'])
+def search_stream():
+    """Search endpoint streaming pipeline progress as server-sent events"""
+    company = request.args.get('company', '').strip()
+    designation = request.args.get('designation', '').strip()
+    
+    if not company or not designation:
+        return jsonify({
+            'error': 'Company and designation are required'
+        }), 400
+    
+    try:
+        budget = get_budget(request.args)
+    except (TypeError, ValueError):
+        return jsonify({
+            'error': 'budget_ms must be a positive number of milliseconds'
+        }), 400
+    
+    def generate():
+        try:
+            for event, data in pipeline.stream_lookup(company, designation, budget):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            logger.error("Error in streaming search: %s", e, exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'success': False, 'error': str(e)})}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop reverse proxies from buffering the stream
+    })
+
+@app.route('/search/async', methods=['POST'])
+async def search_async():
+    """Search endpoint served by the asyncio pipeline"""
+    try:
+        data = request.json
+        company = data.get('company', '').strip()
+        designation = data.get('designation', '').strip()
         
-        # Step 3: Extract names
-        candidates = name_extractor.extract_names(all_results, company, designation)
-        logger.info(f"Found {len(candidates)} candidates: {[c['name'] for c in candidates]}")
+        if not company or not designation:
+            return jsonify({
+                'error': 'Company and designation are required'
+            }), 400
         
-        # Step 4: Validate and calculate confidence
-        best_match = validator.cross_validate(candidates, company, designation)
+        try:
+            budget = get_budget(data)
+        except (TypeError, ValueError):
+            return jsonify({
+                'error': 'budget_ms must be a positive number of milliseconds'
+            }), 400
         
-        if best_match:
-            logger.info(f"Best match: {best_match['name']} with confidence {best_match['confidence']}")
-            
-            # Split name
-            first_name, last_name = validator.split_name(best_match['name'])
-            
-            # Prepare response
-            response = {
-                'success': True,
-                'person': {
-                    'first_name': first_name,
-                    'last_name': last_name,
-                    'current_title': designation,
-                    'source_url': best_match.get('source_url', ''),
-                    'confidence': round(best_match['confidence'], 2)
-                },
-                'sources_used': 1,
-                'all_sources': [best_match.get('source_url', '')]
-            }
-        else:
-            logger.warning("No person found matching the criteria")
-            response = {
-                'success': False,
-                'error': 'No person found matching the criteria',
-                'suggestions': 'Try broader search terms or check company spelling'
-            }
+        response = await async_lookups.lookup(company, designation, budget)
         
         return jsonify(response)
-        
+    
     except Exception as e:
-        logger.error(f"Error in search: {e}", exc_info=True)
+        logger.error("Error in async search: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    """Batch search endpoint, streams one NDJSON line per row as rows finish"""
+    data = request.json or {}
+    rows = data.get('rows') if isinstance(data, dict) else data
+    
+    if not isinstance(rows, list) or not rows:
+        return jsonify({
+            'error': 'A non-empty list of {company, designation} rows is required'
+        }), 400
+    
+    if len(rows) > MAX_BATCH_ROWS:
+        return jsonify({
+            'error': f'At most {MAX_BATCH_ROWS} rows are allowed per batch'
+        }), 400
+    
+    rows = [row if isinstance(row, dict) else {} for row in rows]
+    
+    def generate():
+        for result in pipeline.run_batch(rows):
+            yield json.dumps(result) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/debug-search', methods=['POST'])
 def debug_search():
     """Debug endpoint to see raw search results"""
@@ -112,25 +230,89 @@ def debug_search():
         company = data.get('company', '').strip()
         designation = data.get('designation', '').strip()
         
-        # Build queries
-        queries = query_builder.build_queries(company, designation)
-        
-        # Get raw results from first query only
-        if queries:
-            results = search_engine.search(queries[0], max_results=10)
-            filtered = search_engine.filter_credible_sources(results)
+        with collect_timings() as timings:
+            # Build queries
+            queries = pipeline.plan_queries(company, designation)
+            if not queries:
+                return jsonify({'error': 'No queries generated'})
             
-            return jsonify({
-                'query': queries[0],
-                'raw_results': results[:5],
-                'filtered_results': filtered[:5]
-            })
+            # Run the uncached lookup path so every stage shows up in the breakdown
+            results_by_query = search_engine.search_many(queries, max_results=pipeline.max_results)
+            all_results = pipeline.filter_results(queries, results_by_query, company)
+            response = pipeline.evaluate(company, designation, all_results)
         
-        return jsonify({'error': 'No queries generated'})
+        # Raw and filtered results from the first query only
+        results = results_by_query[queries[0]]
+        filtered = search_engine.filter_credible_sources(results, company)
         
+        return jsonify({
+            'query': queries[0],
+            'raw_results': results[:5],
+            'filtered_results': filtered[:5],
+            'response': response,
+            'timings': timings.to_dict()
+        })
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage timings and counters in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the caches, rate limits, circuit breaker, region stats and coalesced calls"""
+    return jsonify({
+        'search_cache': search_engine.cache.get_stats(),
+        'page_cache': name_extractor.page_cache.get_stats(),
+        'result_cache': pipeline.result_cache.get_stats(),
+        'rate_limits': search_engine.rate_limiter.get_stats(),
+        'search_circuit': search_engine.breaker.get_stats(),
+        'regions': search_engine.region_stats.get_stats(),
+        'coalescing': {
+            'lookup': pipeline.lookups.get_stats(),
+            'search': search_engine.flights.get_stats(),
+            'page': name_extractor.page_flights.get_stats()
+        }
+    })
+
+@app.route('/admin/registry/reload', methods=['POST'])
+def reload_registry():
+    """Reload the known-executive registry from its data file"""
+    registry = name_extractor.registry
+    if not registry.reload():
+        return jsonify({'success': False, 'error': f'Could not load {registry.path}'}), 500
+    return jsonify({'success': True, 'registry': registry.get_stats()})
+
+@app.route('/admin/result-cache', methods=['GET'])
+def list_result_cache():
+    """Inspect cached lookup responses, optionally for one company"""
+    company = request.args.get('company', '').strip() or None
+    limit = request.args.get('limit', 100, type=int)
+    
+    return jsonify({
+        'stats': pipeline.result_cache.get_stats(),
+        'entries': pipeline.result_cache.list_entries(company=company, limit=limit)
+    })
+
+@app.route('/admin/result-cache/purge', methods=['POST'])
+def purge_result_cache():
+    """Purge one cached response, a company's responses, or everything"""
+    data = request.get_json(silent=True) or {}
+    company = (data.get('company') or '').strip() or None
+    designation = (data.get('designation') or '').strip() or None
+    
+    if designation and not company:
+        return jsonify({'success': False, 'error': 'A designation can only be purged together with a company'}), 400
+    
+    if not company and not data.get('all'):
+        return jsonify({'success': False, 'error': 'Pass a company (and optionally a designation), or "all": true'}), 400
+    
+    deleted = pipeline.result_cache.purge(company=company, designation=designation)
+    return jsonify({'success': True, 'deleted': deleted})
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
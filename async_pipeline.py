@@ -0,0 +1,425 @@
+"""
+Asyncio variant of the lookup pipeline (search, page fetch and orchestration)
+
+Only network I/O runs on the event loop. Cache and rate-limiter calls
+(SQLite, flock) and name extraction go through asyncio.to_thread, so a slow
+disk or a lock wait never stalls the other lookups sharing the loop.
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+import aiohttp
+from urllib.parse import urlparse
+from page_fetcher import StreamingBody
+from rate_limiter import INTERACTIVE, is_rate_limit_error, get_retry_after
+from html_text import LeadershipTextExtractor
+from metrics import SEARCH_CALLS, PAGE_FETCHES, stage
+from deadline import deadline_scope, get_timeout, out_of_time, mark_degraded
+
+logger = logging.getLogger(__name__)
+
+class AsyncSearchEngine:
+    def __init__(self, search_engine, priority=INTERACTIVE):
+        # Reuses the sync engine's backend, attempts, merging, cache, filtering and rate limiter
+        self.search_engine = search_engine
+        self.priority = priority
+        self.session = None
+        self.semaphore = None
+    
+    async def open(self, max_concurrency):
+        self.session = self.search_engine.backend.open_async()
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    async def run_attempt(self, query, attempt):
+        """Run a single search attempt, returning None if it did not complete"""
+        cache = self.search_engine.cache
+        cached = await asyncio.to_thread(cache.get, query, attempt['region'], attempt['timelimit'], attempt['max'])
+        if cached is not None:
+            return cached
+        
+        if out_of_time('search_skipped'):
+            return None
+        
+        breaker = self.search_engine.breaker
+        if not breaker.allow():
+            SEARCH_CALLS.inc(backend=self.search_engine.backend.name, outcome='circuit_open')
+            return None
+        
+        bucket = self.search_engine.rate_limiter.search()
+        
+        for retry in range(self.search_engine.rate_limit_retries + 1):
+            if self.search_engine.backend.rate_limited and not await bucket.acquire_async(self.priority):
+                mark_degraded('search_skipped')
+                return None
+            
+            try:
+                async with self.semaphore:
+                    logger.info("Async search attempt with region: %s", attempt['region'])
+                    with stage('search_call'):
+                        started = time.perf_counter()
+                        call = asyncio.ensure_future(
+                            self.session.text(query, attempt['region'], attempt['timelimit'], attempt['max'])
+                        )
+                        try:
+                            done, _ = await asyncio.wait({call}, timeout=get_timeout())
+                        except asyncio.CancelledError:
+                            call.cancel()
+                            raise
+                        if not done:
+                            # The lookup's deadline passed; a timeout the backend raises is a failure below
+                            call.cancel()
+                            mark_degraded('search_timeout')
+                            return None
+                        results = call.result()
+                        self.search_engine.region_stats.record_latency(attempt['region'],
+                                                                       time.perf_counter() - started)
+                await asyncio.to_thread(bucket.succeeded)
+                breaker.record_success()
+                SEARCH_CALLS.inc(backend=self.search_engine.backend.name, outcome='ok')
+                
+                await asyncio.to_thread(cache.set, query, attempt['region'], attempt['timelimit'],
+                                        attempt['max'], results)
+                return results
+            
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    breaker.record_failure()
+                    SEARCH_CALLS.inc(backend=self.search_engine.backend.name, outcome='error')
+                    logger.debug("Async search attempt failed: %s", e)
+                    return None
+                
+                SEARCH_CALLS.inc(backend=self.search_engine.backend.name, outcome='rate_limited')
+                await asyncio.to_thread(bucket.backoff)
+        
+        breaker.record_failure()
+        logger.warning("Giving up on '%s' in region %s after repeated rate limiting", query, attempt['region'])
+        return None
+    
+    async def search(self, query, max_results=10):
+        """Run the planned region attempts for a query concurrently and merge them"""
+        attempts = self.search_engine.get_search_attempts(max_results, query)
+        with stage('search'):
+            attempt_results = await asyncio.gather(
+                *(self.run_attempt(query, attempt) for attempt in attempts)
+            )
+        
+        unique_results = self.search_engine.merge_attempts(query, attempts, attempt_results, max_results)
+        logger.info("Found %s unique results", len(unique_results))
+        return unique_results
+
+
+class AsyncPageFetcher:
+    def __init__(self, fetcher, priority=INTERACTIVE):
+        # Reuses the sync fetcher's limits, headers, content sniffing and rate limiter
+        self.fetcher = fetcher
+        self.priority = priority
+        self.session = None
+        self.semaphore = None
+    
+    async def open(self, max_concurrency):
+        connector = aiohttp.TCPConnector(
+            limit=self.fetcher.pool_size,
+            limit_per_host=self.fetcher.max_per_host
+        )
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.fetcher.headers)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    async def fetch(self, url, headers=None, timeout=None, extractor=None):
+        """Fetch up to max_bytes of a text page, same contract as PageFetcher.fetch"""
+        fetcher = self.fetcher
+        
+        if not url or not url.startswith(('http://', 'https://')):
+            return None
+        
+        if fetcher.offline:
+            return await asyncio.to_thread(fetcher.fetch, url, headers=headers, timeout=timeout, extractor=extractor)
+        
+        if fetcher.is_binary_url(url):
+            logger.debug("Skipping binary URL %s", url)
+            return None
+        
+        try:
+            page = await self._fetch(url, headers, timeout, extractor)
+        except Exception:
+            await asyncio.to_thread(fetcher.record, url, None)
+            raise
+        
+        await asyncio.to_thread(fetcher.record, url, page)
+        return page
+    
+    async def _fetch(self, url, headers, timeout, extractor):
+        fetcher = self.fetcher
+        client_timeout = aiohttp.ClientTimeout(total=timeout or fetcher.timeout)
+        
+        bucket = fetcher.rate_limiter.host(urlparse(url).netloc.lower())
+        if not await bucket.acquire_async(self.priority, timeout=client_timeout.total):
+            raise asyncio.TimeoutError(f"No rate-limit token for {url} within {client_timeout.total}s")
+        
+        async with self.semaphore:
+            async with self.session.get(url, headers=headers, timeout=client_timeout) as response:
+                if response.status == 304:
+                    return {
+                        'url': url,
+                        'status': 304,
+                        'headers': dict(response.headers),
+                        'body': '',
+                        'truncated': False
+                    }
+                
+                if response.status == 429:
+                    await asyncio.to_thread(bucket.backoff, get_retry_after(response.headers))
+                
+                response.raise_for_status()
+                
+                content_type = response.headers.get('Content-Type', '')
+                if not fetcher.is_text_content_type(content_type):
+                    logger.debug("Skipping %s with content type %s", url, content_type)
+                    return None
+                
+                body = StreamingBody(fetcher, content_type, extractor)
+                async for chunk in response.content.iter_chunked(fetcher.chunk_size):
+                    if not body.add(chunk):
+                        break
+                
+                if body.binary:
+                    logger.debug("Skipping %s: body looks binary", url)
+                    return None
+                
+                return body.to_page(url, response.status, dict(response.headers))
+
+class AsyncLookupPipeline:
+    """Async orchestrator built on top of a sync LookupPipeline
+    
+    Use as an async context manager; searches and page fetches are shared
+    by every lookup made within the same context. With keep_results=False
+    (long-lived pipelines) only those still in flight are shared and
+    finished ones come from the search and page caches. Pass priority=BATCH
+    for bulk work so it queues behind interactive requests for rate limits.
+    """
+    
+    def __init__(self, pipeline, max_lookups=None, max_searches=None, max_fetches=None,
+                 priority=INTERACTIVE, keep_results=True):
+        self.pipeline = pipeline
+        self.keep_results = keep_results
+        self.name_extractor = pipeline.name_extractor
+        
+        self.max_lookups = max_lookups or int(os.getenv('ASYNC_MAX_LOOKUPS', 100))
+        self.max_searches = max_searches or int(os.getenv('ASYNC_MAX_SEARCHES', 16))
+        self.max_fetches = max_fetches or int(os.getenv('ASYNC_MAX_FETCHES', 32))
+        
+        self.search_engine = AsyncSearchEngine(pipeline.search_engine, priority)
+        self.fetcher = AsyncPageFetcher(self.name_extractor.fetcher, priority)
+        self.lookup_semaphore = None
+        self.query_tasks = {}
+        self.page_tasks = {}
+    
+    async def __aenter__(self):
+        await self.search_engine.open(self.max_searches)
+        await self.fetcher.open(self.max_fetches)
+        self.lookup_semaphore = asyncio.Semaphore(self.max_lookups)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for task in list(self.query_tasks.values()) + list(self.page_tasks.values()):
+            task.cancel()
+        await self.fetcher.close()
+        await self.search_engine.close()
+    
+    def share_task(self, tasks, key, coroutine):
+        """Task for a key, started once and joined by every lookup that needs it"""
+        task = tasks.get(key)
+        if task is None:
+            task = tasks[key] = asyncio.ensure_future(coroutine())
+            if not self.keep_results:
+                task.add_done_callback(lambda _: tasks.pop(key, None))
+        return task
+    
+    async def search(self, query):
+        """Search a query once per context, sharing the result between lookups"""
+        return await self.share_task(self.query_tasks, query,
+                                     lambda: self.search_engine.search(query, self.pipeline.max_results))
+    
+    async def fetch_page_content(self, url):
+        """Fetch page text once per context, sharing it between lookups"""
+        return await self.share_task(self.page_tasks, url, lambda: self._fetch_page_content(url))
+    
+    async def _fetch_page_content(self, url):
+        """Async counterpart of NameExtractor.fetch_page_content"""
+        page_cache = self.name_extractor.page_cache
+        
+        if not url or not url.startswith(('http://', 'https://')):
+            return None
+        
+        if await asyncio.to_thread(page_cache.is_blocked, url):
+            PAGE_FETCHES.inc(outcome='blocked')
+            logger.debug("Skipping %s: backing off after earlier failures", url)
+            return None
+        
+        cached = await asyncio.to_thread(page_cache.get, url)
+        if cached and cached['fresh']:
+            PAGE_FETCHES.inc(outcome='cached')
+            return cached['text']
+        
+        timeout = get_timeout(self.fetcher.fetcher.timeout)
+        if timeout <= 0:
+            mark_degraded('page_fetch_skipped')
+            return None
+        
+        try:
+            with stage('page_fetch'):
+                page = await self.fetcher.fetch(url, headers=page_cache.get_conditional_headers(cached),
+                                               timeout=timeout, extractor=LeadershipTextExtractor())
+            return await asyncio.to_thread(self.name_extractor.store_page, url, page, cached)
+        
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            PAGE_FETCHES.inc(outcome='error')
+            logger.debug("Error fetching %s: %s", url, e)
+            if isinstance(e, asyncio.TimeoutError) and timeout < self.fetcher.fetcher.timeout:
+                mark_degraded('page_fetch_timeout')
+            else:
+                await asyncio.to_thread(page_cache.record_failure, url, domain_failure=True)
+            return None
+        except Exception as e:
+            PAGE_FETCHES.inc(outcome='error')
+            logger.debug("Error fetching %s: %s", url, e)
+            await asyncio.to_thread(page_cache.record_failure, url)
+            return None
+    
+    async def extract_names(self, results, company, designation):
+        """Async counterpart of NameExtractor.extract_names"""
+        extractor = self.name_extractor
+        
+        def from_snippets():
+            found_people = extractor.extract_from_snippets(results, company, designation)
+            return found_people, extractor.get_page_fetch_targets(found_people, results, company)
+        
+        def from_pages(found_people, pages):
+            for result, page_content in zip(targets, pages):
+                found_people.extend(extractor.extract_from_page(result, page_content, company, designation))
+            return extractor.merge_candidates(found_people)
+        
+        known = await asyncio.to_thread(extractor.find_known_executive, company, designation)
+        if known:
+            return known
+        
+        found_people, targets = await asyncio.to_thread(from_snippets)
+        pages = await asyncio.gather(
+            *(self.fetch_page_content(result.get('link', '')) for result in targets)
+        )
+        return await asyncio.to_thread(from_pages, found_people, pages)
+    
+    async def lookup(self, company, designation):
+        """Run the full pipeline for one (company, designation) pair"""
+        async with self.lookup_semaphore:
+            logger.info("Async search for %s at %s", designation, company)
+            
+            pipeline = self.pipeline
+            
+            def respond(candidates):
+                response = pipeline.build_response(candidates, company, designation)
+                return pipeline.finish_response(company, designation, response)
+            
+            known = await asyncio.to_thread(self.name_extractor.find_known_executive, company, designation)
+            if known:
+                return pipeline.build_response(known, company, designation)
+            
+            cached = await asyncio.to_thread(pipeline.get_cached_response, company, designation)
+            if cached is not None:
+                return cached
+            
+            queries = pipeline.plan_queries(company, designation)
+            results = await asyncio.gather(*(self.search(query) for query in queries))
+            all_results = await asyncio.to_thread(pipeline.filter_results, queries, dict(zip(queries, results)),
+                                                  company)
+            
+            candidates = await self.extract_names(all_results, company, designation)
+            return await asyncio.to_thread(respond, candidates)
+    
+    async def run_batch(self, rows):
+        """Look up many rows concurrently, yielding results as rows finish"""
+        async def run_row(index, row):
+            company = str(row.get('company') or '').strip()
+            designation = str(row.get('designation') or '').strip()
+            
+            if not company or not designation:
+                response = {'success': False, 'error': 'Company and designation are required'}
+            else:
+                try:
+                    response = await self.lookup(company, designation)
+                except Exception as e:
+                    logger.error("Batch row %s failed: %s", index, e, exc_info=True)
+                    response = {'success': False, 'error': str(e)}
+            
+            return dict({'index': index, 'company': company, 'designation': designation}, **response)
+        
+        tasks = [asyncio.ensure_future(run_row(index, row)) for index, row in enumerate(rows)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class AsyncLookupService:
+    """One long-lived AsyncLookupPipeline per worker process, on its own event loop
+    
+    Flask runs every async view in a fresh event loop, so a pipeline opened
+    per request would open and close its aiohttp and search sessions each
+    time. Requests hand their lookups to this loop instead, sharing pooled
+    connections and in-flight searches and page fetches. The loop is
+    (re)started on first use in each process, so forking servers are safe.
+    """
+    
+    def __init__(self, pipeline, **options):
+        self.pipeline = pipeline
+        self.options = dict(options, keep_results=False)
+        self.loop = None
+        self.async_pipeline = None
+        self.pid = None
+        self.lock = threading.Lock()
+    
+    def start(self):
+        with self.lock:
+            if self.loop is not None and self.pid == os.getpid():
+                return self.loop
+            
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='async-lookups', daemon=True).start()
+            async_pipeline = AsyncLookupPipeline(self.pipeline, **self.options)
+            asyncio.run_coroutine_threadsafe(async_pipeline.__aenter__(), loop).result()
+            
+            self.loop, self.async_pipeline, self.pid = loop, async_pipeline, os.getpid()
+            return loop
+    
+    async def lookup(self, company, designation, budget=None):
+        """Run a lookup on the service loop within deadline_scope(budget), from any event loop"""
+        future = asyncio.run_coroutine_threadsafe(self._lookup(company, designation, budget), self.start())
+        return await asyncio.wrap_future(future)
+    
+    async def _lookup(self, company, designation, budget):
+        with deadline_scope(budget):
+            return await self.async_pipeline.lookup(company, designation)
+    
+    def close(self):
+        with self.lock:
+            if self.loop is None or self.pid != os.getpid():
+                return
+            loop, self.loop = self.loop, None
+        
+        try:
+            asyncio.run_coroutine_threadsafe(self.async_pipeline.__aexit__(None, None, None), loop).result(timeout=5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,67 @@
+"""
+Command-line batch lookup using the asyncio pipeline
+
+Reads a CSV with company and designation columns and writes one JSON line
+per row to stdout (or --output) as rows complete:
+
+    python batch_lookup.py companies.csv --output results.ndjson
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables before the project modules read their settings
+load_dotenv()
+
+from query_builder import QueryBuilder
+from search_engine import SearchEngine
+from name_extractor import NameExtractor
+from validator import Validator
+from pipeline import LookupPipeline
+from async_pipeline import AsyncLookupPipeline
+from rate_limiter import BATCH
+
+logger = logging.getLogger(__name__)
+
+def read_rows(path):
+    """Read {company, designation} rows from a CSV file"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return [
+            {'company': row.get('company', ''), 'designation': row.get('designation', '')}
+            for row in csv.DictReader(f)
+        ]
+
+async def run(rows, output, max_lookups):
+    pipeline = LookupPipeline(QueryBuilder(), SearchEngine(), NameExtractor(), Validator())
+    
+    async with AsyncLookupPipeline(pipeline, max_lookups=max_lookups, priority=BATCH) as async_pipeline:
+        async for result in async_pipeline.run_batch(rows):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch person lookup')
+    parser.add_argument('input', help='CSV file with company and designation columns')
+    parser.add_argument('--output', help='NDJSON output file (default: stdout)')
+    parser.add_argument('--max-lookups', type=int, default=None,
+                        help='Maximum lookups in flight at once')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    
+    rows = read_rows(args.input)
+    logger.info("Loaded %s rows from %s", len(rows), args.input)
+    
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        asyncio.run(run(rows, output, args.max_lookups))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmarks for the per-result hot paths of a lookup
+
+Times find_name_candidates, analyze_context, filter_credible_sources and
+calculate_confidence on representative inputs. Run from the repository root:
+    
+    python benchmarks/bench_hot_paths.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_extractor import NameExtractor
+from search_engine import SearchEngine
+from validator import Validator
+
+COMPANY = 'Essence of Italy'
+DESIGNATION = 'Founder'
+
+SNIPPET = (
+    "Giulia Bianchi - Founder & CEO - Essence of Italy | LinkedIn "
+    "Giulia Bianchi is the Founder and CEO of Essence of Italy, a luxury tour operator "
+    "based in Florence. Previously she worked at Grand Hotel Bohemia in Prague."
+)
+
+PAGE_PARAGRAPH = (
+    "Our Team. Meet the people behind Essence of Italy. Giulia Bianchi founded the "
+    "company in 2009 after ten years in luxury travel; today she leads Sales and "
+    "Partnerships together with Marco De Luca, our Operations Director. Jean-Luc "
+    "O'Brien heads the Paris office, and Elena R. Papadopoulou manages our Greek "
+    "villas portfolio. Contact us on +39 055 123 4567 or visit our offices in "
+    "Florence, Rome and Milan. Cookie settings and privacy policy apply. "
+)
+PAGE = (PAGE_PARAGRAPH * 20)[:10000]
+
+RESULTS = [
+    {'title': 'Giulia Bianchi - Founder & CEO - Essence of Italy | LinkedIn',
+     'link': 'https://it.linkedin.com/in/giulia-bianchi-123',
+     'snippet': 'Giulia Bianchi is the Founder and CEO of Essence of Italy.'},
+    {'title': 'Our Team | Essence of Italy',
+     'link': 'https://www.essenceofitaly.com/about/team',
+     'snippet': 'Meet the leadership team of Essence of Italy.'},
+    {'title': 'Essence of Italy appoints new sales director',
+     'link': 'https://www.travelweekly.com/news/essence-of-italy',
+     'snippet': 'The tour operator announced a new director of sales.'},
+    {'title': 'Essence of Italy reviews',
+     'link': 'https://www.tripadvisor.com/essence-of-italy',
+     'snippet': 'Read traveller reviews, photos and prices.'},
+    {'title': 'Essence of Italy - Crunchbase Company Profile',
+     'link': 'https://www.crunchbase.com/organization/essence-of-italy',
+     'snippet': 'Essence of Italy is a travel company founded in 2009.'}
+]
+
+CANDIDATE = {
+    'name': 'Giulia Bianchi',
+    'source_url': 'https://it.linkedin.com/in/giulia-bianchi-123',
+    'source_title': RESULTS[0]['title'],
+    'context_score': 0.7,
+    'validation': ''
+}
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    per_call = seconds / number * 1e6
+    print(f"  {label:<28} {per_call:10.1f} us/call")
+    return per_call
+
+
+def main():
+    extractor = NameExtractor(page_cache=None)
+    validator = Validator()
+    search_engine = SearchEngine()
+    
+    print('NameExtractor')
+    bench('find_name_candidates snippet', lambda: extractor.find_name_candidates(SNIPPET), 2000)
+    bench('find_name_candidates page', lambda: extractor.find_name_candidates(PAGE), 100)
+    bench('analyze_context snippet', lambda: extractor.analyze_context(SNIPPET, COMPANY, DESIGNATION), 5000)
+    bench('analyze_context page', lambda: extractor.analyze_context(PAGE, COMPANY, DESIGNATION), 500)
+    
+    print('SearchEngine')
+    bench('filter_credible_sources', lambda: search_engine.filter_credible_sources([dict(r) for r in RESULTS], COMPANY), 5000)
+    
+    print('Validator')
+    bench('calculate_confidence', lambda: validator.calculate_confidence(dict(CANDIDATE), COMPANY, DESIGNATION),
+          5000)
+
+
+if __name__ == '__main__':
+    main()
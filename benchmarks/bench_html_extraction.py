@@ -0,0 +1,76 @@
+"""
+Benchmark: streaming leadership-first extraction vs the full BeautifulSoup parse
+
+Runs both extractors over the saved pages in benchmarks/fixtures and reports
+time per page and where (if at all) the expected leadership names land in
+the 10,000 characters kept for name extraction.
+
+    python benchmarks/bench_html_extraction.py
+"""
+import os
+import sys
+import timeit
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_text import LeadershipTextExtractor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Names each fixture should surface
+EXPECTED_NAMES = {
+    'team_page.html': ['Giulia Bianchi', 'Marco De Luca'],
+    'about_jsonld.html': ['Pieter van der Merwe', 'Sofia Georgiou'],
+    'large_page.html': ['Nikos Vlachos', 'Anna Pappas']
+}
+
+
+def soup_text(html):
+    """The previous fetch_page_content parsing path"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+    return text[:10000]
+
+
+def streaming_text(html, chunk_size=16384):
+    """Feed the page in network-sized chunks, stopping when the extractor is done"""
+    extractor = LeadershipTextExtractor(max_chars=10000)
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor.get_text()
+
+
+def describe(text, names):
+    positions = [text.find(name) for name in names]
+    return ', '.join(f"{name}@{position}" if position >= 0 else f"{name}:missing"
+                     for name, position in zip(names, positions))
+
+
+def main():
+    for filename in sorted(EXPECTED_NAMES):
+        with open(os.path.join(FIXTURES, filename), encoding='utf-8') as f:
+            html = f.read()
+        
+        names = EXPECTED_NAMES[filename]
+        print(f"{filename} ({len(html)} bytes)")
+        
+        timings = {}
+        for label, func in [('soup', soup_text), ('streaming', streaming_text)]:
+            seconds = min(timeit.repeat(lambda: func(html), number=10, repeat=3)) / 10
+            timings[label] = seconds
+            print(f"  {label:<10} {seconds * 1000:8.2f} ms   {describe(func(html), names)}")
+        
+        print(f"  speedup    {timings['soup'] / timings['streaming']:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: single-scan name matching vs the previous five-pattern approach
+
+Run from the repository root:
+
+    python benchmarks/bench_name_extraction.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_extractor import NameExtractor
+
+LEGACY_PATTERNS = [
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+))',
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+){2})',
+    r'([A-Z][a-z]+\s+[A-Z]\.\s+[A-Z][a-z]+)',
+    r'([A-Z][a-z]+(?:-[A-Z][a-z]+)?\s+[A-Z][a-z]+)',
+    r"([A-Z][a-z]+(?:'[A-Z][a-z]+)?\s+[A-Z][a-z]+)"
+]
+
+SNIPPET = (
+    "Anna Rossi - Founder & CEO - Bici e Vacanze | LinkedIn "
+    "Anna Rossi is the Founder and CEO of Bici e Vacanze, a cycling tour operator "
+    "based in Florence, Italy. Previously she worked at Grand Hotel Bohemia in Prague."
+)
+
+PAGE_PARAGRAPH = (
+    "Our Team. Meet the people behind Essence of Italy. Giulia Bianchi founded the "
+    "company in 2009 after ten years in luxury travel; today she leads Sales and "
+    "Partnerships together with Marco De Luca, our Operations Director. Jean-Luc "
+    "O'Brien heads the Paris office, and Elena R. Papadopoulou manages our Greek "
+    "villas portfolio with Ionian Estates and Villas Limited. Contact us on +39 055 "
+    "123 4567 or visit our offices in Florence, Rome and Milan. Cookie settings, "
+    "privacy policy and terms of use apply to all bookings made through this website. "
+)
+PAGE = (PAGE_PARAGRAPH * 20)[:10000]
+
+
+def legacy_is_valid_name(name):
+    if len(name) < 5 or len(name) > 40:
+        return False
+    words = name.split()
+    if len(words) < 2 or len(words) > 3:
+        return False
+    for word in words:
+        clean_word = re.sub(r'[^a-zA-Z]', '', word)
+        if len(clean_word) < 2:
+            return False
+        if not (clean_word[0].isupper() or clean_word.isupper()):
+            return False
+    return True
+
+
+def legacy_find_names(text):
+    """The pre-compiled-matcher implementation of find_names_in_text"""
+    names = []
+    text = re.sub(r'[^\w\s\.\-\']', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    for pattern in LEGACY_PATTERNS:
+        for match in re.finditer(pattern, text):
+            name = match.group(1).strip()
+            if legacy_is_valid_name(name):
+                names.append(name)
+    return list(set(names))
+
+
+def bench(label, func, text, number):
+    seconds = min(timeit.repeat(lambda: func(text), number=number, repeat=5))
+    per_call = seconds / number * 1e6
+    print(f"  {label:<12} {per_call:10.1f} us/call")
+    return per_call
+
+
+def main():
+    extractor = NameExtractor(page_cache=None)
+    
+    for label, text, number in [('snippet', SNIPPET, 5000), ('page', PAGE, 200)]:
+        print(f"{label} ({len(text)} chars)")
+        legacy = bench('legacy', legacy_find_names, text, number)
+        current = bench('single-scan', extractor.find_name_candidates, text, number)
+        print(f"  speedup      {legacy / current:10.2f}x")
+        print(f"  candidates   legacy={len(legacy_find_names(text))} "
+              f"single-scan={len(set(m.name for m in extractor.find_name_candidates(text)))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+End-to-end benchmark: run company rows through the lookup pipeline against the stub server
+
+The stub answers searches and page fetches locally with configurable latency,
+jitter, 5xx errors and 429s, so runs are repeatable and never touch the network.
+Every run starts with empty caches. Run from the repository root:
+    
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --rows synthetic:200 --concurrency 16 --latency-ms 150 --error-rate 0.02
+    python benchmarks/bench_pipeline.py --mode batch --repeat 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+
+def configure_environment(work_dir):
+    """Point every cache and rate-limit file at a scratch directory and lift the limits"""
+    os.environ['SEARCH_CACHE_PATH'] = os.path.join(work_dir, 'search_cache.db')
+    os.environ['PAGE_CACHE_PATH'] = os.path.join(work_dir, 'page_cache.db')
+    os.environ['RESULT_CACHE_PATH'] = os.path.join(work_dir, 'result_cache.db')
+    os.environ['RATE_LIMIT_DIR'] = os.path.join(work_dir, 'ratelimit')
+    # The stub is one host; the real per-host limits would only measure the limiter
+    os.environ.setdefault('SEARCH_RATE_LIMIT', '100000')
+    os.environ.setdefault('PAGE_RATE_LIMIT', '100000')
+    os.environ.setdefault('PAGE_FETCH_MAX_PER_HOST', '64')
+    os.environ.setdefault('PAGE_FETCH_POOL_SIZE', '64')
+
+
+def build_pipeline(stub_url):
+    from query_builder import QueryBuilder
+    from search_engine import SearchEngine
+    from name_extractor import NameExtractor
+    from validator import Validator
+    from pipeline import LookupPipeline
+    from stub_server import StubSearchBackend, StubPageFetcher
+    
+    search_engine = SearchEngine(backend=StubSearchBackend(stub_url))
+    name_extractor = NameExtractor(fetcher=StubPageFetcher(stub_url))
+    return LookupPipeline(QueryBuilder(), search_engine, name_extractor, Validator())
+
+
+def run_lookups(pipeline, rows, concurrency, progressive):
+    """One lookup per row with `concurrency` in flight; returns latencies and outcomes"""
+    lookup = pipeline.lookup_progressive if progressive else pipeline.lookup
+    
+    def timed(row):
+        started = time.perf_counter()
+        try:
+            response = lookup(row['company'], row['designation'])
+        except Exception as e:
+            response = {'success': False, 'error': str(e)}
+        return time.perf_counter() - started, response
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, rows))
+
+
+def run_batch(pipeline, rows):
+    """Whole list through run_batch; latency is time from start until each row is yielded"""
+    started = time.perf_counter()
+    outcomes = []
+    for response in pipeline.run_batch(rows):
+        outcomes.append((time.perf_counter() - started, response))
+    return outcomes
+
+
+def count_correct(rows, outcomes):
+    """Lookups that named the person the stub knows for the row's company
+    
+    A success alone can be the company name or a site name picked as the
+    person, so accuracy is checked against the stub's ground truth.
+    """
+    from stub_server import person_for
+    
+    correct = 0
+    for position, (_, response) in enumerate(outcomes):
+        row = rows[response.get('index', position)]
+        person = response.get('person') or {}
+        name = f"{person.get('first_name', '')} {person.get('last_name', '')}".strip()
+        if response.get('success') and name == person_for(row['company']):
+            correct += 1
+    return correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end lookup pipeline benchmark')
+    parser.add_argument('--rows', default='xlsx', help="'xlsx' (test_data.xlsx), 'synthetic:N' or an .xlsx path")
+    parser.add_argument('--mode', choices=['lookup', 'progressive', 'batch'], default='lookup')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=1, help='Passes over the rows; later passes hit the caches')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--ratelimit-rate', type=float, default=0.0)
+    parser.add_argument('--json', action='store_true', help='Print the summaries as JSON')
+    args = parser.parse_args()
+    
+    configure_environment(tempfile.mkdtemp(prefix='lookup-bench-'))
+    
+    import logging
+    logging.basicConfig(level=logging.CRITICAL)
+    
+    from workload import load_rows, summarize, print_report
+    from stub_server import StubServer
+    
+    rows = load_rows(args.rows)
+    server = StubServer(
+        [row['company'] for row in rows],
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        ratelimit_rate=args.ratelimit_rate
+    ).start()
+    
+    try:
+        pipeline = build_pipeline(server.url)
+        summaries = []
+        
+        for run in range(1, args.repeat + 1):
+            server.state.reset()
+            started = time.perf_counter()
+            if args.mode == 'batch':
+                outcomes = run_batch(pipeline, rows)
+            else:
+                outcomes = run_lookups(pipeline, rows, args.concurrency, args.mode == 'progressive')
+            wall_seconds = time.perf_counter() - started
+            
+            upstream = server.state.snapshot()
+            successes = sum(1 for _, response in outcomes if response.get('success'))
+            errors = sum(1 for _, response in outcomes if response.get('error'))
+            summary = summarize(
+                [latency for latency, _ in outcomes],
+                wall_seconds,
+                len(outcomes),
+                successes,
+                errors,
+                upstream={'search': upstream['search'], 'page': upstream['page']}
+            )
+            summary.update({
+                'correct': count_correct(rows, outcomes),
+                'run': run,
+                'mode': args.mode,
+                'injected_errors': upstream['errors'],
+                'injected_rate_limits': upstream['rate_limited']
+            })
+            summaries.append(summary)
+            
+            if not args.json:
+                print_report(f"Run {run}: {len(rows)} rows, mode={args.mode}, concurrency={args.concurrency}",
+                             summary)
+        
+        if args.json:
+            print(json.dumps(summaries, indent=2))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Load test: drive the Flask app with concurrent /search requests
+
+By default the app is served in-process by a threaded werkzeug server with its
+search backend and page fetcher pointed at the stub server, and caches in a
+scratch directory. Pass --url to load an app that is already running instead
+(start it with SEARCH_BACKEND=replay for network-free runs). From the repository root:
+    
+    python benchmarks/load_test.py --requests 300 --concurrency 32
+    python benchmarks/load_test.py --endpoint /search/async --latency-ms 200 --error-rate 0.05
+    python benchmarks/load_test.py --url http://localhost:5000 --rows synthetic:100
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import configure_environment
+from workload import load_rows, summarize, print_report
+
+
+def start_local_app(stub_url):
+    """Import the app wired to the stub and serve it on a free port; returns (server, base_url)"""
+    from werkzeug.serving import make_server
+    from stub_server import StubSearchBackend, StubPageFetcher
+    import app as app_module
+    
+    app_module.search_engine.backend = StubSearchBackend(stub_url)
+    app_module.name_extractor.fetcher = StubPageFetcher(stub_url)
+    
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for the lookup API')
+    parser.add_argument('--url', help='Base URL of a running app (default: serve one in-process)')
+    parser.add_argument('--endpoint', default='/search', choices=['/search', '/search/async'])
+    parser.add_argument('--rows', default='xlsx', help="'xlsx' (test_data.xlsx), 'synthetic:N' or an .xlsx path")
+    parser.add_argument('--requests', type=int, default=120, help='Total requests, cycling through the rows')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--progressive', action='store_true', help='Ask for progressive lookups')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--ratelimit-rate', type=float, default=0.0)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args()
+    
+    rows = load_rows(args.rows)
+    stub = server = None
+    
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        configure_environment(tempfile.mkdtemp(prefix='lookup-load-'))
+        logging.basicConfig(level=logging.CRITICAL)
+        
+        from stub_server import StubServer
+        stub = StubServer(
+            [row['company'] for row in rows],
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            ratelimit_rate=args.ratelimit_rate
+        ).start()
+        server, base_url = start_local_app(stub.url)
+        logging.getLogger().setLevel(logging.CRITICAL)
+    
+    local = threading.local()
+    
+    def send(index):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        
+        row = rows[index % len(rows)]
+        payload = {'company': row['company'], 'designation': row['designation']}
+        if args.progressive:
+            payload['progressive'] = True
+        
+        started = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}{args.endpoint}", json=payload, timeout=args.timeout)
+            ok = response.status_code == 200 and response.json().get('success', False)
+        except (requests.RequestException, ValueError):
+            ok = False
+        return time.perf_counter() - started, ok
+    
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(send, range(args.requests)))
+        wall_seconds = time.perf_counter() - started
+        
+        successes = sum(1 for _, ok in outcomes if ok)
+        upstream = None
+        if stub is not None:
+            counts = stub.state.snapshot()
+            upstream = {'search': counts['search'], 'page': counts['page']}
+        
+        summary = summarize([latency for latency, _ in outcomes], wall_seconds, len(outcomes),
+                            successes, len(outcomes) - successes, upstream=upstream)
+        summary.update({'endpoint': args.endpoint, 'concurrency': args.concurrency, 'distinct_rows': len(rows)})
+        if stub is None:
+            # The app runs in another process, so its memory is not ours to report
+            summary.pop('peak_rss_mb')
+        
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print_report(f"{args.requests} requests to {base_url}{args.endpoint}", summary)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if stub is not None:
+            stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Local stand-in for the search API and company web pages, with injected latency and errors
+
+Used by the pipeline benchmark and load test; can also be run on its own:
+    
+    python benchmarks/stub_server.py --port 8765 --latency-ms 150 --error-rate 0.02
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_backends import SearchBackend
+from page_fetcher import PageFetcher
+
+FIRST_NAMES = ['Anna', 'Marco', 'Giulia', 'Lars', 'Sofia', 'Jonas', 'Elena', 'David', 'Maria', 'Nikos',
+               'Claire', 'Tomas', 'Ingrid', 'Pablo', 'Yasmin', 'Oliver']
+LAST_NAMES = ['Rossi', 'Lindqvist', 'Bianchi', 'Papadopoulos', 'Moreau', 'Novak', 'Fischer', 'Garcia',
+              'Hansen', 'Costa', 'Keller', 'Silva', 'Meyer', 'Andersson', 'Dubois', 'Romano']
+
+
+def stable_hash(text):
+    return int(hashlib.md5(text.lower().encode('utf-8')).hexdigest()[:8], 16)
+
+
+def person_for(company):
+    """The executive the stub 'knows' for a company (same for every query)"""
+    value = stable_hash(company)
+    return f"{FIRST_NAMES[value % len(FIRST_NAMES)]} {LAST_NAMES[(value // 7) % len(LAST_NAMES)]}"
+
+
+def slug(text):
+    return quote(text.lower().replace(' ', '-'), safe='-')
+
+
+class StubState:
+    """Behaviour knobs and request counters shared by every handler thread"""
+    
+    def __init__(self, companies, latency_ms=0, jitter_ms=0, error_rate=0.0, ratelimit_rate=0.0, seed=7):
+        # Longest names first so 'Catalonia Hotels & Resorts' wins over 'Catalonia'
+        self.companies = sorted({company for company in companies if company}, key=len, reverse=True)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.ratelimit_rate = ratelimit_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {'search': 0, 'page': 0, 'errors': 0, 'rate_limited': 0}
+        self.pages = {}  # URL handed out in results -> (kind, company)
+    
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+    
+    def reset(self):
+        with self.lock:
+            for name in self.counters:
+                self.counters[name] = 0
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+    
+    def delay(self):
+        """Simulated upstream latency"""
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        if self.latency + jitter > 0:
+            time.sleep(self.latency + jitter)
+    
+    def injected_failure(self):
+        """429, 500 or None according to the configured rates"""
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.ratelimit_rate:
+            return 429
+        if roll < self.ratelimit_rate + self.error_rate:
+            return 500
+        return None
+    
+    def add_page(self, url, kind, company):
+        with self.lock:
+            self.pages[url] = (kind, company)
+    
+    def get_page(self, url):
+        with self.lock:
+            return self.pages.get(url)
+    
+    def find_company(self, query):
+        query_lower = query.lower()
+        for company in self.companies:
+            if company.lower() in query_lower:
+                return company
+        return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+    
+    def do_GET(self):
+        state = self.server.state
+        url = urlparse(self.path)
+        
+        if url.path == '/search':
+            state.count('search')
+        elif url.path == '/page':
+            state.count('page')
+        else:
+            return self.send_body(404, 'text/plain', b'not found')
+        
+        state.delay()
+        
+        failure = state.injected_failure()
+        if failure:
+            state.count('rate_limited' if failure == 429 else 'errors')
+            return self.send_body(failure, 'text/plain', b'injected failure')
+        
+        params = parse_qs(url.query)
+        if url.path == '/search':
+            query = params.get('q', [''])[0]
+            region = params.get('region', ['wt-wt'])[0]
+            max_results = int(params.get('max', ['5'])[0])
+            body = json.dumps(self.search_results(query, region, max_results)).encode('utf-8')
+            return self.send_body(200, 'application/json', body)
+        
+        page = state.get_page(params.get('url', [''])[0])
+        if page is None:
+            return self.send_body(404, 'text/plain', b'not found')
+        return self.send_body(200, 'text/html; charset=utf-8', self.render_page(*page).encode('utf-8'))
+    
+    def send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def search_results(self, query, region, max_results):
+        """Plausible results: a profile, the company's team page, news and noise"""
+        state = self.server.state
+        company = state.find_company(query)
+        if company is None:
+            return []
+        
+        person = person_for(company)
+        site = f"https://www.{slug(company)}.com"
+        results = [
+            ('profile', {'title': f"{person} - Founder & CEO - {company} | LinkedIn",
+                         'link': f"https://www.linkedin.com/in/{slug(person)}-{stable_hash(company) % 1000}",
+                         'snippet': f"{person} is the CEO and founder of {company}. "
+                                    f"Experience in travel and hospitality."}),
+            ('team', {'title': f"Our Team | {company}",
+                      'link': f"{site}/about/team",
+                      'snippet': f"Meet the leadership team of {company}."}),
+            ('news', {'title': f"{company} appoints new sales director",
+                      'link': f"https://news.example.com/{slug(company)}/{region}",
+                      'snippet': f"{company} announced changes to its management this year."}),
+            ('noise', {'title': f"{company} reviews",
+                       'link': f"https://reviews.example.com/{slug(company)}",
+                       'snippet': 'Read traveller reviews, photos and prices.'}),
+            ('noise', {'title': f"Careers at {company}",
+                       'link': f"{site}/careers",
+                       'snippet': f"Join {company} as a tour guide or sales manager."})
+        ]
+        for kind, result in results:
+            state.add_page(result['link'], kind, company)
+        
+        # Regions see the same results in a slightly different order
+        offset = stable_hash(region) % 2
+        results = [result for _, result in results[offset:] + results[:offset]]
+        return results[:max_results]
+    
+    def render_page(self, kind, company):
+        """HTML for a URL handed out in search results"""
+        person = person_for(company)
+        colleague = person_for(company + ' sales')
+        
+        if kind == 'team':
+            body = (
+                f"<h1>{company}</h1><p>Tailor-made holidays since 2009.</p>"
+                f"<h2>Our Leadership Team</h2>"
+                f"<div class='member'><h3>{person}</h3><p>Founder &amp; CEO</p></div>"
+                f"<div class='member'><h3>{colleague}</h3><p>Director of Sales</p></div>"
+            )
+        elif kind == 'profile':
+            body = f"<h1>{person}</h1><p>Founder &amp; CEO at {company}</p><p>Florence, Italy</p>"
+        elif kind == 'news':
+            body = (
+                f"<h1>{company} appoints {colleague} as sales director</h1>"
+                f"<p>The appointment was announced by chief executive {person}.</p>"
+            )
+        else:
+            body = f"<h1>{company}</h1><p>Prices, photos and reviews from travellers.</p>"
+        
+        return (
+            f"<html><head><title>{company}</title></head><body>"
+            f"<nav><a href='/'>Home</a> <a href='/tours'>Tours</a></nav>{body}"
+            f"<footer>Cookie settings. Privacy policy. All rights reserved.</footer>"
+            f"</body></html>"
+        )
+
+
+class StubServer:
+    """Threaded stub HTTP server running in a background thread"""
+    
+    def __init__(self, companies, host='127.0.0.1', port=0, **behaviour):
+        self.httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = StubState(companies, **behaviour)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    
+    @property
+    def state(self):
+        return self.httpd.state
+    
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StubSearchBackend(SearchBackend):
+    """Search backend that queries a StubServer"""
+    
+    name = 'stub'
+    
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+    
+    def text(self, query, region, timelimit, max_results):
+        response = self.session.get(
+            f"{self.base_url}/search",
+            params={'q': query, 'region': region or '', 'timelimit': timelimit or '', 'max': max_results},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class StubPageFetcher(PageFetcher):
+    """PageFetcher whose requests are routed to a StubServer, keeping the original URLs"""
+    
+    # Makes the async pipeline call fetch() instead of requesting the original URLs itself
+    offline = True
+    
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+    
+    def fetch(self, url, headers=None, timeout=None, extractor=None, **kwargs):
+        if not url or not url.startswith(('http://', 'https://')) or self.is_binary_url(url):
+            return None
+        
+        page = super().fetch(f"{self.base_url}/page?url={quote(url, safe='')}", headers=headers,
+                             timeout=timeout, extractor=extractor, **kwargs)
+        if page:
+            page['url'] = url
+        return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub search API and company pages')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rows', default='xlsx', help="Companies to know about: 'xlsx' or 'synthetic:N'")
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--ratelimit-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    from workload import load_rows
+    companies = [row['company'] for row in load_rows(args.rows)]
+    
+    server = StubServer(companies, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, ratelimit_rate=args.ratelimit_rate)
+    print(f"Stub server for {len(companies)} companies on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
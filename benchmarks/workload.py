@@ -0,0 +1,154 @@
+"""
+Shared workload and reporting helpers for the pipeline benchmarks
+"""
+import os
+import sys
+import math
+import random
+import zipfile
+import xml.etree.ElementTree as ET
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DATA_PATH = os.path.join(REPO_ROOT, 'test_data.xlsx')
+
+SHEET_NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+COMPANY_WORDS = [
+    'Alpine', 'Azure', 'Boreal', 'Cedar', 'Coastal', 'Crimson', 'Delta', 'Ember', 'Fjord',
+    'Granite', 'Harbor', 'Horizon', 'Iris', 'Juniper', 'Lumen', 'Meridian', 'Nimbus', 'Olive',
+    'Orchid', 'Pioneer', 'Quartz', 'Riviera', 'Sable', 'Summit', 'Tidal', 'Vista', 'Willow'
+]
+COMPANY_KINDS = [
+    'Travel', 'Tours', 'Yachting', 'Hotels', 'Villas', 'Adventures', 'Expeditions', 'Resorts',
+    'Holidays', 'Journeys', 'Retreats', 'Charters'
+]
+COMPANY_SUFFIXES = ['', '', '', ' Ltd', ' GmbH', ' Srl', ' AB', ' Inc']
+DESIGNATIONS = [
+    'CEO', 'Ceo', 'Founder', 'Co-Founder', 'Founder & CEO', 'Director of Sales', 'Sales Manager',
+    'Operations Director', 'CMO', 'CTO', 'President'
+]
+
+
+def column_index(reference):
+    """'C12' -> 2"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+def load_xlsx_rows(path=TEST_DATA_PATH):
+    """Read {company, designation} rows from the first sheet of an .xlsx file
+    
+    Parses the workbook XML directly so the benchmarks need no spreadsheet
+    library. The header row must contain 'Company Name' and 'Title'.
+    """
+    with zipfile.ZipFile(path) as workbook:
+        shared_strings = []
+        if 'xl/sharedStrings.xml' in workbook.namelist():
+            root = ET.fromstring(workbook.read('xl/sharedStrings.xml'))
+            for item in root.findall('s:si', SHEET_NS):
+                shared_strings.append(''.join(text.text or '' for text in item.iter(f"{{{SHEET_NS['s']}}}t")))
+        
+        sheet = ET.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+    
+    table = []
+    for row in sheet.findall('.//s:sheetData/s:row', SHEET_NS):
+        values = {}
+        for cell in row.findall('s:c', SHEET_NS):
+            cell_type = cell.get('t')
+            if cell_type == 'inlineStr':
+                value = ''.join(text.text or '' for text in cell.iter(f"{{{SHEET_NS['s']}}}t"))
+            else:
+                raw = cell.find('s:v', SHEET_NS)
+                if raw is None:
+                    continue
+                value = shared_strings[int(raw.text)] if cell_type == 's' else raw.text
+            values[column_index(cell.get('r'))] = value.strip()
+        table.append(values)
+    
+    if not table:
+        return []
+    
+    header = {name.lower(): index for index, name in table[0].items()}
+    company_column = header['company name']
+    title_column = header['title']
+    
+    return [
+        {'company': values.get(company_column, ''), 'designation': values.get(title_column, '')}
+        for values in table[1:]
+        if values.get(company_column) and values.get(title_column)
+    ]
+
+
+def synthetic_rows(count, seed=7, repeat_share=0.1):
+    """Generate company/designation rows; repeat_share of them repeat earlier rows"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        if rows and rng.random() < repeat_share:
+            rows.append(dict(rng.choice(rows)))
+            continue
+        
+        company = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_KINDS)}{rng.choice(COMPANY_SUFFIXES)}"
+        rows.append({'company': company, 'designation': rng.choice(DESIGNATIONS)})
+    return rows
+
+
+def load_rows(spec):
+    """'xlsx' (the 30 test_data.xlsx rows), 'synthetic:N' or a path to an .xlsx file"""
+    if spec == 'xlsx':
+        return load_xlsx_rows()
+    if spec.startswith('synthetic:'):
+        return synthetic_rows(int(spec.split(':', 1)[1]))
+    return load_xlsx_rows(spec)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def summarize(latencies, wall_seconds, lookups, successes, errors, upstream=None):
+    """Latency percentiles, throughput and per-lookup upstream cost"""
+    ordered = sorted(latencies)
+    summary = {
+        'lookups': lookups,
+        'successes': successes,
+        'errors': errors,
+        'wall_seconds': round(wall_seconds, 3),
+        'lookups_per_second': round(lookups / wall_seconds, 2) if wall_seconds else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 1),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 1),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1) if ordered else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    for name, count in (upstream or {}).items():
+        summary[f"{name}_calls_per_lookup"] = round(count / lookups, 2) if lookups else 0.0
+    return summary
+
+
+def print_report(title, summary):
+    print(title)
+    for key, value in summary.items():
+        print(f"  {key:<28} {value}")
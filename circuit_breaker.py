@@ -0,0 +1,86 @@
+"""
+Circuit breaker that stops calling an upstream while it keeps failing
+"""
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream
+    
+    After failure_threshold failures in a row the circuit opens and calls are
+    refused for reset_timeout seconds. Then a single trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+    
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv('SEARCH_BREAKER_FAILURES', 5))
+        self.reset_timeout = reset_timeout or float(os.getenv('SEARCH_BREAKER_RESET_SECONDS', 30))
+        
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.stats = {'opened': 0, 'rejected': 0}
+        self.lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a call may go ahead now"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.trial_in_flight = False
+            
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            
+            self.stats['rejected'] += 1
+            return False
+    
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                logger.info("Circuit for %s closed after a successful trial call", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['opened'] += 1
+                    logger.warning("Circuit for %s opened after %s consecutive failures", self.name,
+                                   self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+    
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, state=self.state, failures=self.failures)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    """Process-wide breaker for a named upstream, shared by the sync and async engines"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
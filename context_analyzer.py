@@ -0,0 +1,164 @@
+"""
+Per-document context analysis with a single-pass multi-keyword matcher
+"""
+import re
+import bisect
+
+class KeywordMatcher:
+    """Find many keywords in one scan (Aho-Corasick style, longest match first)
+    
+    Keywords map to a category. A match also reports the categories of every
+    shorter keyword contained in it, so 'chief executive officer' still
+    counts as an 'officer' indicator, along with where each of those
+    keywords sits inside the match.
+    """
+    
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, category)
+        self.categories = {}
+        for keyword, category in keywords:
+            keyword = keyword.lower().strip()
+            if keyword:
+                self.categories.setdefault(keyword, set()).add(category)
+        
+        ordered = sorted(self.categories, key=len, reverse=True)
+        
+        # Credit contained keywords to the longer keyword that swallows them
+        self.match_categories = {}
+        self.match_parts = {}  # keyword -> ((offset, end offset, category), ...) of contained keywords
+        for keyword in ordered:
+            categories = set()
+            parts = []
+            for other, other_categories in self.categories.items():
+                offset = keyword.find(other)
+                if offset < 0:
+                    continue
+                categories |= other_categories
+                while offset >= 0:
+                    parts += [(offset, offset + len(other), category) for category in other_categories]
+                    offset = keyword.find(other, offset + 1)
+            self.match_categories[keyword] = frozenset(categories)
+            self.match_parts[keyword] = tuple(parts)
+        
+        self.pattern = re.compile('|'.join(re.escape(keyword) for keyword in ordered)) if ordered else None
+    
+    def find_all(self, text_lower):
+        """Return (start, end, categories, parts) for every keyword match in text order
+        
+        parts holds (start, end, category) for each keyword inside the match.
+        """
+        if self.pattern is None:
+            return []
+        matches = []
+        for match in self.pattern.finditer(text_lower):
+            keyword, start = match.group(), match.start()
+            parts = tuple((start + offset, start + end, category)
+                          for offset, end, category in self.match_parts[keyword])
+            matches.append((start, match.end(), self.match_categories[keyword], parts))
+        return matches
+
+
+class ContextAnalyzer:
+    """Scores documents for one (company, designation) lookup"""
+    
+    def __init__(self, company, designation, designation_variants, person_indicators, proximity_window=200):
+        company_lower = company.lower()
+        designation_lower = designation.lower()
+        variants = {designation_lower} | {variant.lower() for variant in designation_variants}
+        
+        keywords = [(company_lower, 'company')]
+        keywords += [(variant, 'designation') for variant in variants]
+        keywords += [(indicator, 'indicator') for indicator in person_indicators]
+        
+        # Check for specific patterns
+        for variant in variants:
+            keywords += [
+                (f"{variant} of {company_lower}", 'pattern'),
+                (f"{company_lower}'s {variant}", 'pattern'),
+                (f"{variant} at {company_lower}", 'pattern')
+            ]
+        
+        self.matcher = KeywordMatcher(keywords)
+        self.proximity_window = proximity_window
+    
+    def analyze(self, text):
+        """Lowercase and scan a document once"""
+        return DocumentContext(text, self.matcher.find_all(text.lower()), self.proximity_window)
+
+
+class DocumentContext:
+    """Context scores for one document, shared by every name found in it"""
+    
+    def __init__(self, text, matches, proximity_window):
+        self.text = text
+        self.proximity_window = proximity_window
+        
+        found = set()
+        designation_spans = set()
+        indicator_spans = set()
+        self.company_spans = set()
+        for start, end, categories, parts in matches:
+            found |= categories
+            
+            # Anchor on the designation keyword itself, not the whole
+            # "founder of <company>" pattern around it
+            for part_start, part_end, category in parts:
+                if category == 'designation':
+                    designation_spans.add((part_start, part_end))
+                elif category == 'indicator':
+                    indicator_spans.add((part_start, part_end))
+                elif category == 'company':
+                    self.company_spans.add((part_start, part_end))
+        
+        score = 0.0
+        if 'company' in found:
+            score += 0.3
+        if 'designation' in found:
+            score += 0.3
+        if 'indicator' in found:
+            score += 0.1
+        if 'pattern' in found:
+            score += 0.3
+        self.score = min(score, 1.0)
+        
+        # Names are scored by their distance to the designation, or failing that
+        # to any person indicator
+        self.anchor_spans = sorted(designation_spans or indicator_spans)
+        self.anchor_starts = [start for start, _ in self.anchor_spans]
+    
+    def distance_to_anchor(self, start, end):
+        """Characters between a span and the nearest designation mention"""
+        if not self.anchor_spans:
+            return None
+        
+        index = bisect.bisect_left(self.anchor_starts, start)
+        distance = None
+        for anchor_start, anchor_end in self.anchor_spans[max(0, index - 1):index + 1]:
+            if anchor_end <= start:
+                gap = start - anchor_end
+            elif anchor_start >= end:
+                gap = anchor_start - end
+            else:
+                gap = 0
+            if distance is None or gap < distance:
+                distance = gap
+        return distance
+    
+    def proximity(self, name_match):
+        """1.0 next to the designation, falling to 0.0 at proximity_window chars"""
+        distance = self.distance_to_anchor(name_match.start, name_match.end)
+        if distance is None:
+            return 0.0
+        return max(0.0, 1.0 - distance / self.proximity_window)
+    
+    def overlaps_company(self, start, end):
+        return any(company_start < end and start < company_end for company_start, company_end in self.company_spans)
+    
+    def score_name(self, name_match):
+        """Document score weighted by how close the name is to the designation
+        
+        Candidates inside the company name ('Exped Tribe' in 'Exped Tribe GmbH') score 0.
+        """
+        if self.overlaps_company(name_match.start, name_match.end):
+            return 0.0
+        return round(self.score * (0.4 + 0.6 * self.proximity(name_match)), 3)
@@ -0,0 +1,94 @@
+"""
+Per-request latency budgets, propagated to every stage of a lookup
+"""
+import os
+import time
+import threading
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Settings are read when used, not at import, so a .env loaded after this module still applies
+def get_default_budget():
+    """Seconds a lookup gets when the caller does not pass a budget (LOOKUP_BUDGET_MS)"""
+    return float(os.getenv('LOOKUP_BUDGET_MS', 20000)) / 1000
+
+
+def get_min_page_fetch_seconds():
+    """Page fetches are optional work, skipped when less than this is left (DEADLINE_MIN_PAGE_FETCH_MS)"""
+    return float(os.getenv('DEADLINE_MIN_PAGE_FETCH_MS', 1500)) / 1000
+
+
+class Deadline:
+    """Point in time by which a lookup should answer, and the work cut to meet it"""
+    
+    def __init__(self, budget):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        self.reasons = []
+        self.cuts = 0  # Calls to degrade(), repeated reasons included
+        self.lock = threading.Lock()
+    
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def degrade(self, reason):
+        with self.lock:
+            self.cuts += 1
+            if reason in self.reasons:
+                return
+            self.reasons.append(reason)
+        logger.info("Lookup degraded by its %.1fs deadline: %s", self.budget, reason)
+    
+    @property
+    def degraded(self):
+        return bool(self.reasons)
+
+
+# Deadline of the request being handled; worker threads see it when run in a copied context
+_current_deadline = contextvars.ContextVar('deadline', default=None)
+
+
+class deadline_scope:
+    """Context manager applying a latency budget (seconds, default LOOKUP_BUDGET_MS) to everything inside it"""
+    
+    def __init__(self, budget=None):
+        self.budget = get_default_budget() if budget is None else budget
+    
+    def __enter__(self):
+        self.deadline = Deadline(self.budget)
+        self.token = _current_deadline.set(self.deadline)
+        return self.deadline
+    
+    def __exit__(self, *exc_info):
+        _current_deadline.reset(self.token)
+
+
+def current_deadline():
+    return _current_deadline.get()
+
+
+def get_timeout(default=None):
+    """A stage's timeout shortened to the time left before the current deadline"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    if default is None:
+        return deadline.remaining()
+    return min(default, deadline.remaining())
+
+
+def out_of_time(reason, needed=0.0):
+    """Whether less than `needed` seconds are left, marking the lookup degraded if so"""
+    deadline = _current_deadline.get()
+    if deadline is None or deadline.remaining() > needed:
+        return False
+    deadline.degrade(reason)
+    return True
+
+
+def mark_degraded(reason):
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.degrade(reason)
@@ -0,0 +1,215 @@
+"""
+Known-executive registry loaded from a data file, indexed by normalized company name
+"""
+import os
+import re
+import csv
+import json
+import time
+import threading
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Legal-form suffixes dropped from the end of company names
+LEGAL_SUFFIXES = {
+    'ab', 'ag', 'as', 'asa', 'bv', 'co', 'company', 'corp', 'corporation', 'gmbh',
+    'inc', 'incorporated', 'kg', 'limited', 'llc', 'llp', 'ltd', 'nv', 'oy', 'oyj',
+    'plc', 'pty', 'sa', 'sarl', 'sas', 'spa', 'srl', 'sro', 'ug'
+}
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'known_executives.json')
+
+def normalize_company(name):
+    """Normalize a company name for lookups
+    
+    Lowercases, strips accents and punctuation, and drops trailing legal
+    forms: 'SkiStar AB', 'Exped Tribe GmbH' and 'Ionian Estates and Villas
+    Limited' normalize to 'skistar', 'exped tribe' and 'ionian estates and villas'.
+    """
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = text.replace('&', ' and ')
+    
+    # Collapse dotted legal forms (S.r.l., S.p.A.) before splitting on punctuation
+    text = re.sub(r'(?<!\w)(\w)\.', r'\1', text)
+    
+    words = re.sub(r'[^\w\s]', ' ', text).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    
+    return ' '.join(words)
+
+
+def contains_phrase(words, phrase):
+    """Whether the word list phrase appears as a contiguous run in words"""
+    size = len(phrase)
+    return size > 0 and any(words[start:start + size] == phrase for start in range(len(words) - size + 1))
+
+
+class ExecutiveRegistry:
+    def __init__(self, path=None, reload_interval=None):
+        self.path = path or os.getenv('EXECUTIVE_REGISTRY_PATH', DEFAULT_REGISTRY_PATH)
+        self.reload_interval = reload_interval if reload_interval is not None else \
+            float(os.getenv('EXECUTIVE_REGISTRY_RELOAD_INTERVAL', 5))
+        
+        self.index = {}  # normalized name/alias -> entry
+        self.loaded_mtime = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+        
+        self.reload()
+    
+    def reload(self):
+        """Load the data file and swap in a fresh index"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            entries = self._read_entries(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load executive registry %s: %s", self.path, e)
+            return False
+        
+        index = {}
+        for entry in entries:
+            for name in [entry['name']] + entry['aliases']:
+                key = normalize_company(name)
+                if key:
+                    index[key] = entry
+        
+        # Readers see either the old or the new index, never a partial one
+        self.index = index
+        self.loaded_mtime = mtime
+        logger.info("Loaded %s companies (%s keys) from %s", len(entries), len(index), self.path)
+        return True
+    
+    def maybe_reload(self):
+        """Reload when the data file changed, checking at most every reload_interval"""
+        now = time.time()
+        if now - self.last_check < self.reload_interval:
+            return
+        
+        with self.lock:
+            if now - self.last_check < self.reload_interval:
+                return
+            self.last_check = now
+            
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            
+            if mtime != self.loaded_mtime:
+                self.reload()
+    
+    def get_company(self, company):
+        """Registry entry for a company name, or None"""
+        self.maybe_reload()
+        return self.index.get(normalize_company(company))
+    
+    def find_executive(self, company, designation):
+        """Known executive for a (company, designation) pair
+        
+        A role matches when its words appear together in the designation, so
+        'Co-Founder' matches 'founder' but 'Director' does not match 'cto'.
+        Returns {'name', 'role', 'source_url'} or None.
+        """
+        entry = self.get_company(company)
+        if not entry:
+            return None
+        
+        words = re.findall(r'\w+', designation.lower())
+        for role, name in entry['executives'].items():
+            if contains_phrase(words, re.findall(r'\w+', role)):
+                return {
+                    'name': name,
+                    'role': role,
+                    'source_url': entry['source_url']
+                }
+        return None
+    
+    def get_known_people(self, company):
+        """Name -> confidence for every known executive of a company
+        
+        Full names score 1.0 and single name parts 0.9.
+        """
+        entry = self.get_company(company)
+        if not entry:
+            return {}
+        
+        # Full names first so they win over a matching name part
+        names = [name.lower() for name in entry['executives'].values()]
+        people = {name: 1.0 for name in names}
+        for name in names:
+            for part in name.split():
+                people.setdefault(part, 0.9)
+        return people
+    
+    def get_stats(self):
+        """Size of the loaded registry"""
+        companies = {id(entry) for entry in self.index.values()}
+        return {
+            'path': self.path,
+            'companies': len(companies),
+            'keys': len(self.index),
+            'loaded_mtime': self.loaded_mtime
+        }
+    
+    def _read_entries(self, path):
+        """Parse a JSON or CSV registry file into entries"""
+        if path.endswith('.csv'):
+            return self._read_csv(path)
+        
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        
+        companies = data.get('companies', []) if isinstance(data, dict) else data
+        return [self._make_entry(company.get('name', ''), company.get('aliases', []),
+                                 company.get('domain'), company.get('executives', {}))
+                for company in companies if company.get('name')]
+    
+    def _read_csv(self, path):
+        """CSV rows: company, role, name, aliases (| separated), domain"""
+        companies = {}
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                company = (row.get('company') or '').strip()
+                if not company:
+                    continue
+                
+                entry = companies.setdefault(company, {'aliases': set(), 'domain': None, 'executives': {}})
+                entry['aliases'].update(alias.strip() for alias in (row.get('aliases') or '').split('|')
+                                        if alias.strip())
+                entry['domain'] = entry['domain'] or (row.get('domain') or '').strip() or None
+                
+                role = (row.get('role') or '').strip().lower()
+                name = (row.get('name') or '').strip()
+                if role and name:
+                    entry['executives'][role] = name
+        
+        return [self._make_entry(company, sorted(entry['aliases']), entry['domain'], entry['executives'])
+                for company, entry in companies.items()]
+    
+    def _make_entry(self, name, aliases, domain, executives):
+        if not domain:
+            domain = normalize_company(name).replace(' ', '') + '.com'
+        
+        return {
+            'name': name,
+            'aliases': list(aliases),
+            'domain': domain,
+            'source_url': f"https://www.{domain}/about/leadership",
+            'executives': {role.lower(): person for role, person in executives.items()}
+        }
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+def get_default_registry():
+    """Process-wide registry shared by NameExtractor and Validator"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ExecutiveRegistry()
+        return _default_registry
@@ -0,0 +1,217 @@
+"""
+Incremental HTML-to-text extraction that favours leadership/team content
+"""
+import re
+import json
+from html.parser import HTMLParser
+
+# Elements whose text is never useful for finding people
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'nav', 'iframe', 'select', 'button'}
+
+# Elements that end a block of text
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'ol', 'p', 'section', 'table', 'td', 'th', 'tr', 'ul'
+}
+
+HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+}
+
+LEADERSHIP_HEADING_RE = re.compile(
+    r'\b(team|leadership|about|management|founders?|board|executives?|our people|who we are|staff|contact)\b'
+)
+
+DESIGNATION_RE = re.compile(
+    r'\b(ceo|cto|cfo|cmo|coo|founder|co-founder|director|manager|president|chief|officer|'
+    r'executive|head of|owner|partner|principal|chairman|chairperson|managing)\b'
+)
+
+BOILERPLATE_RE = re.compile(r'\b(cookies?|privacy policy|terms of (use|service)|all rights reserved|newsletter)\b')
+
+# Text priorities
+BOILERPLATE = 0
+NORMAL = 1
+RELEVANT = 2
+
+
+class LeadershipTextExtractor(HTMLParser):
+    """Streaming HTML parser that keeps the text most likely to name people
+    
+    Feed HTML in chunks with feed(); once `done` is True enough relevant
+    text has been collected and the rest of the document can be skipped.
+    get_text() returns relevant blocks first (in document order), then the
+    remaining text, up to max_chars.
+    """
+    
+    def __init__(self, max_chars=10000, relevant_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.relevant_chars = relevant_chars or max_chars // 2
+        self.done = False
+        
+        self.stack = []  # (tag, skip, person) for open elements
+        self.skip_depth = 0
+        self.person_depth = 0
+        self.leadership_level = None  # Heading level of the current team section
+        
+        self.heading_level = None
+        self.json_ld = None  # Collected text of an application/ld+json script
+        
+        self.buffer = []
+        self.blocks = {RELEVANT: [], NORMAL: [], BOILERPLATE: []}
+        self.collected = {RELEVANT: 0, NORMAL: 0, BOILERPLATE: 0}
+        self.order = 0
+    
+    def feed(self, data):
+        if not self.done:
+            super().feed(data)
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.flush()
+        
+        if tag == 'script':
+            attributes = dict(attrs)
+            if (attributes.get('type') or '').lower() == 'application/ld+json':
+                self.json_ld = []
+        
+        if tag in VOID_TAGS:
+            return
+        
+        skip = tag in SKIP_TAGS
+        person = False
+        for name, value in attrs:
+            if name == 'itemtype' and value and 'schema.org/person' in value.lower():
+                person = True
+        
+        self.stack.append((tag, skip, person))
+        self.skip_depth += skip
+        self.person_depth += person
+        
+        if tag in HEADING_TAGS:
+            self.heading_level = HEADING_TAGS[tag]
+    
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.flush()
+        
+        if tag == 'script' and self.json_ld is not None:
+            self.handle_json_ld(''.join(self.json_ld))
+            self.json_ld = None
+        
+        # Pop up to the matching open element, tolerating unclosed tags
+        if not any(open_tag == tag for open_tag, _, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, skip, person = self.stack.pop()
+            self.skip_depth -= skip
+            self.person_depth -= person
+            if open_tag == tag:
+                break
+    
+    def handle_data(self, data):
+        if self.json_ld is not None:
+            self.json_ld.append(data)
+            return
+        
+        if self.skip_depth or self.done:
+            return
+        
+        self.buffer.append(data)
+    
+    def handle_json_ld(self, text):
+        """Turn schema.org Person objects into 'Name, Job Title' text"""
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        
+        pending = [data]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, list):
+                pending.extend(item)
+            elif isinstance(item, dict):
+                item_type = item.get('@type')
+                types = item_type if isinstance(item_type, list) else [item_type]
+                if 'Person' in types and isinstance(item.get('name'), str):
+                    parts = [item['name']]
+                    if isinstance(item.get('jobTitle'), str):
+                        parts.append(item['jobTitle'])
+                    self.add_block(', '.join(parts), RELEVANT)
+                pending.extend(value for value in item.values() if isinstance(value, (dict, list)))
+    
+    def flush(self):
+        """Close the current block of text and classify it"""
+        if not self.buffer:
+            return
+        
+        text = ' '.join(' '.join(self.buffer).split())
+        self.buffer = []
+        if not text:
+            return
+        
+        text_lower = text.lower()
+        
+        if self.heading_level is not None and self.in_heading():
+            # A heading opens or closes a leadership section
+            if LEADERSHIP_HEADING_RE.search(text_lower):
+                self.leadership_level = self.heading_level
+            elif self.leadership_level is not None and self.heading_level <= self.leadership_level:
+                self.leadership_level = None
+        
+        if self.person_depth or self.leadership_level is not None or DESIGNATION_RE.search(text_lower):
+            priority = RELEVANT
+        elif BOILERPLATE_RE.search(text_lower):
+            priority = BOILERPLATE
+        else:
+            priority = NORMAL
+        
+        self.add_block(text, priority)
+    
+    def in_heading(self):
+        return any(tag in HEADING_TAGS for tag, _, _ in self.stack)
+    
+    def add_block(self, text, priority):
+        if self.collected[priority] >= self.max_chars:
+            return
+        
+        self.blocks[priority].append((self.order, text))
+        self.order += 1
+        self.collected[priority] += len(text) + 1
+        
+        if self.collected[RELEVANT] >= self.relevant_chars:
+            self.done = True
+    
+    def close(self):
+        if not self.done:
+            super().close()
+        self.flush()
+    
+    def get_text(self):
+        """Relevant text first, then the rest, limited to max_chars"""
+        self.flush()
+        
+        parts = []
+        length = 0
+        for priority in (RELEVANT, NORMAL, BOILERPLATE):
+            for _, text in sorted(self.blocks[priority]):
+                if length >= self.max_chars:
+                    break
+                parts.append(text)
+                length += len(text) + 1
+        
+        return ' '.join(parts)[:self.max_chars]
+
+
+def extract_text(html, max_chars=10000):
+    """Extract prioritized text from a complete HTML document"""
+    extractor = LeadershipTextExtractor(max_chars=max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.get_text()
@@ -0,0 +1,249 @@
+"""
+Per-stage timing histograms and counters, exposed in the Prometheus text format
+"""
+import os
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+
+# With metrics disabled, timed() calls straight through and stage() is a shared no-op
+_enabled = None
+
+def is_enabled():
+    """METRICS_ENABLED, read on first use rather than at import so a .env loaded later still applies"""
+    global _enabled
+    if _enabled is None:
+        _enabled = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    return _enabled
+
+# Seconds; lookups run from sub-millisecond parsing up to multi-second searches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+    
+    def inc(self, amount=1, **labels):
+        if not is_enabled():
+            return
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{format_labels(self.labelnames, key)} {value}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values with optional labels"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.lock = threading.Lock()
+    
+    def observe(self, value, **labels):
+        if not is_enabled():
+            return
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self):
+        with self.lock:
+            series = sorted(
+                (key, (list(counts), total, count)) for key, (counts, total, count) in self.series.items()
+            )
+        
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.labelnames + ('le',), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together for the /metrics endpoint"""
+    
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+    
+    def register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name, description, labelnames=()):
+        return self.register(Counter(name, description, labelnames))
+    
+    def histogram(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, description, labelnames, buckets))
+    
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'lookup_stage_seconds',
+    'Time spent in each lookup stage (stages nest: search includes search_call, page_fetch includes html_parse)',
+    ['stage']
+)
+SEARCH_CALLS = REGISTRY.counter(
+    'search_backend_calls_total', 'Upstream search calls by backend and outcome', ['backend', 'outcome']
+)
+SEARCH_HEDGES = REGISTRY.counter(
+    'search_hedged_calls_total', 'Search calls duplicated after the p95 latency, by which call answered first',
+    ['winner']
+)
+PAGE_FETCHES = REGISTRY.counter(
+    'page_fetches_total', 'Full-page fetches by outcome', ['outcome']
+)
+PAGE_PREFETCHES = REGISTRY.counter(
+    'page_prefetches_total', 'Speculative page fetches by whether the lookup used them', ['outcome']
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'API requests by endpoint and status code', ['endpoint', 'status']
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'API request latency by endpoint', ['endpoint']
+)
+
+
+class StageTimings:
+    """Per-request breakdown of time spent in each stage"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.lock = threading.Lock()
+    
+    def add(self, stage, seconds):
+        with self.lock:
+            total, calls = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, calls + 1)
+    
+    def to_dict(self):
+        with self.lock:
+            stages = dict(self.stages)
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'stages': {
+                stage: {'ms': round(total * 1000, 1), 'calls': calls}
+                for stage, (total, calls) in stages.items()
+            }
+        }
+
+
+# Timings of the request being handled; worker threads see it when run in a copied context
+_current_timings = contextvars.ContextVar('stage_timings', default=None)
+
+
+class collect_timings:
+    """Context manager collecting a StageTimings for everything run inside it"""
+    
+    def __enter__(self):
+        self.timings = StageTimings()
+        self.token = _current_timings.set(self.timings)
+        return self.timings
+    
+    def __exit__(self, *exc_info):
+        _current_timings.reset(self.token)
+
+
+def record_stage(stage, seconds):
+    """Record a stage duration in the histogram and the current request's timings"""
+    if not is_enabled():
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+class Stage:
+    __slots__ = ('name', 'started')
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        record_stage(self.name, time.perf_counter() - self.started)
+
+
+_NULL_STAGE = nullcontext()
+
+def stage(name):
+    """Context manager timing a block as a lookup stage"""
+    return Stage(name) if is_enabled() else _NULL_STAGE
+
+
+def timed(name):
+    """Decorator timing every call of a function as a lookup stage"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_stage(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
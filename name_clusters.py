@@ -0,0 +1,149 @@
+"""
+Clustering of name variants across sources with blocking keys
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from executive_registry import normalize_company
+
+NAME_PREFIXES = {'dr', 'mr', 'mrs', 'ms', 'prof', 'rev', 'sir'}
+
+SOUNDEX_CODES = {}
+for letters, code in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6')):
+    for letter in letters:
+        SOUNDEX_CODES[letter] = code
+
+NON_LETTER_RE = re.compile(r'[^a-z]')
+
+# Site names and page or navigation words that turn up in name candidates ('Reviva LinkedIn', 'Our Team')
+SITE_WORDS = {
+    'linkedin', 'facebook', 'instagram', 'twitter', 'youtube', 'wikipedia', 'crunchbase', 'bloomberg',
+    'team', 'tour', 'tours', 'home', 'about', 'contact', 'careers', 'jobs', 'news', 'blog', 'reviews',
+    'privacy', 'policy', 'cookie', 'cookies', 'login', 'menu', 'search', 'profile'
+}
+
+# Minimum similarity for two spellings to count as the same surname or first name
+SURNAME_SIMILARITY = 0.85
+FIRST_NAME_SIMILARITY = 0.8
+
+
+def strip_accents(text):
+    """'José Müller' -> 'Jose Muller'"""
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+
+def name_tokens(name):
+    """Lowercase ASCII tokens of a name without prefixes or punctuation"""
+    tokens = []
+    for word in strip_accents(name).lower().split():
+        token = NON_LETTER_RE.sub('', word)
+        if token and token not in NAME_PREFIXES:
+            tokens.append(token)
+    return tokens
+
+
+def soundex(token):
+    """American Soundex code, the blocking key for surnames"""
+    if not token:
+        return ''
+    code = token[0].upper()
+    previous = SOUNDEX_CODES.get(token[0], '')
+    for letter in token[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # 'h' and 'w' do not separate letters with the same code
+        if letter not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def similar(a, b, threshold):
+    return a == b or SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+def first_names_match(a, b):
+    """First names agree: one is missing, an initial of the other, a prefix or a close spelling"""
+    if not a or not b:
+        return True
+    if len(a) == 1 or len(b) == 1:
+        return a[0] == b[0]
+    return a.startswith(b) or b.startswith(a) or similar(a, b, FIRST_NAME_SIMILARITY)
+
+
+class NameCluster:
+    """Candidates that refer to the same person"""
+    
+    def __init__(self, surname, first):
+        self.surname = surname
+        self.first = first  # Fullest first name seen, or an initial, or None
+        self.members = []
+        self.tokens = set()  # Every word (not initial) of every member's name
+    
+    def matches(self, surname, first):
+        return similar(self.surname, surname, SURNAME_SIMILARITY) and first_names_match(self.first, first)
+    
+    def add(self, candidate, first, tokens):
+        self.members.append(candidate)
+        self.tokens.update(token for token in tokens if len(token) > 1)
+        if first and (not self.first or len(first) > len(self.first)):
+            self.first = first
+
+
+def cluster_candidates(candidates):
+    """Group candidates whose names are variants of one another
+    
+    'Elon Musk', 'E. Musk', 'Musk' and 'Élon Musk' end up together. Only
+    clusters sharing the Soundex key of the surname are compared, so the
+    cost grows with the number of candidates, not with its square. Fuller
+    names seed clusters first; a surname-only mention joins the largest
+    compatible cluster.
+    """
+    parsed = []
+    for candidate in candidates:
+        tokens = name_tokens(candidate.get('name', ''))
+        if tokens:
+            parsed.append((candidate, tokens, tokens[-1], tokens[0] if len(tokens) > 1 else None))
+    
+    # Full first names before initials before surname-only mentions
+    parsed.sort(key=lambda item: -min(len(item[3] or ''), 2))
+    
+    blocks = {}
+    clusters = []
+    seen = {}  # Exact (surname, first) spellings already placed, to skip the fuzzy comparisons
+    for candidate, tokens, surname, first in parsed:
+        cluster = seen.get((surname, first))
+        
+        if cluster is None:
+            block = blocks.setdefault(soundex(surname), [])
+            compatible = [cluster for cluster in block if cluster.matches(surname, first)]
+            
+            if compatible:
+                cluster = max(compatible, key=lambda cluster: len(cluster.members))
+            else:
+                cluster = NameCluster(surname, first)
+                block.append(cluster)
+                clusters.append(cluster)
+            seen[(surname, first)] = cluster
+        
+        cluster.add(candidate, first, tokens)
+    
+    return clusters
+
+
+def get_company_tokens(company):
+    """Name tokens of a company without its legal form ('Exped Tribe GmbH' -> {'exped', 'tribe'})"""
+    return set(name_tokens(normalize_company(company)))
+
+
+def is_person_cluster(cluster, company_tokens):
+    """False for clusters that only spell out the company name or name a site or page
+    
+    The company name is mentioned on nearly every source, so without this it
+    would out-corroborate the person ('Exped Tribe', 'Reviva LinkedIn').
+    """
+    if not cluster.tokens or cluster.tokens <= company_tokens:
+        return False
+    return not cluster.tokens & SITE_WORDS
@@ -0,0 +1,158 @@
+"""
+Compact first/last name gazetteer backed by a sorted, memory-mapped file
+
+The file holds one 'name<TAB>weight' line per name, sorted by the UTF-8
+bytes of the normalized name. Lookups binary-search the mapping in place,
+so nothing is loaded into the Python heap and every worker process shares
+the same OS page-cache pages.
+
+Build a gazetteer from a name list (name,count or name<TAB>weight per line):
+
+    python name_gazetteer.py census_first_names.csv data/first_names.tsv --counts
+"""
+import os
+import sys
+import csv
+import math
+import mmap
+import argparse
+import threading
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+def normalize_name(name):
+    """Lowercase and strip accents so 'Tomáš' and 'tomas' match"""
+    text = unicodedata.normalize('NFKD', name or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower().strip()
+
+
+class NameGazetteer:
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.size = 0
+        self.entries = None  # Counted lazily for stats
+        
+        try:
+            with open(path, 'rb') as f:
+                self.size = os.fstat(f.fileno()).st_size
+                if self.size:
+                    # The mapping stays valid after the file object is closed
+                    self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            logger.warning("Name gazetteer %s unavailable: %s", path, e)
+    
+    def lookup(self, name):
+        """Frequency weight (0-1] of a name, or None when unknown"""
+        if self.data is None:
+            return None
+        
+        key = normalize_name(name).encode('utf-8')
+        if not key:
+            return None
+        
+        data = self.data
+        low, high = 0, self.size
+        
+        # Invariant: low and high are always at line starts
+        while low < high:
+            middle = (low + high) // 2
+            line_start = data.rfind(b'\n', 0, middle) + 1
+            line_end = data.find(b'\n', line_start)
+            if line_end == -1:
+                line_end = self.size
+            
+            entry, _, weight = data[line_start:line_end].partition(b'\t')
+            if entry == key:
+                return float(weight or 1.0)
+            if entry < key:
+                low = line_end + 1
+            else:
+                high = line_start
+        
+        return None
+    
+    def __contains__(self, name):
+        return self.lookup(name) is not None
+    
+    def get_stats(self):
+        """File size and entry count"""
+        if self.entries is None:
+            self.entries = 0
+            position = 0
+            while self.data is not None and position < self.size:
+                position = self.data.find(b'\n', position)
+                self.entries += 1
+                if position == -1:
+                    break
+                position += 1
+        
+        return {'path': self.path, 'bytes': self.size, 'entries': self.entries}
+
+
+def build_gazetteer(rows, path, counts=False):
+    """Write (name, value) rows as a sorted gazetteer file
+    
+    With counts=True the values are raw frequencies, log-scaled to weights in
+    (0, 1]; otherwise they are used as weights directly.
+    """
+    names = {}
+    for name, value in rows:
+        key = normalize_name(name)
+        if not key or '\t' in key or '\n' in key:
+            continue
+        value = float(value) if value not in (None, '') else 1.0
+        names[key] = names.get(key, 0.0) + value if counts else max(names.get(key, 0.0), value)
+    
+    if counts and names:
+        top = math.log1p(max(names.values()))
+        names = {key: math.log1p(count) / top if top else 1.0 for key, count in names.items()}
+    
+    entries = sorted((key.encode('utf-8'), weight) for key, weight in names.items())
+    
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        for key, weight in entries:
+            f.write(key + b'\t' + f"{weight:.3f}\n".encode())
+    os.replace(temporary_path, path)  # Readers keep their old mapping until they reopen
+    
+    return len(entries)
+
+
+_default_gazetteers = None
+_default_gazetteers_lock = threading.Lock()
+
+def get_default_gazetteers():
+    """Process-wide (first_names, last_names) gazetteers"""
+    global _default_gazetteers
+    with _default_gazetteers_lock:
+        if _default_gazetteers is None:
+            _default_gazetteers = (
+                NameGazetteer(os.getenv('FIRST_NAMES_PATH', os.path.join(DATA_DIR, 'first_names.tsv'))),
+                NameGazetteer(os.getenv('LAST_NAMES_PATH', os.path.join(DATA_DIR, 'last_names.tsv')))
+            )
+        return _default_gazetteers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a name gazetteer file')
+    parser.add_argument('input', help='CSV/TSV with a name and a count or weight per line')
+    parser.add_argument('output', help='Gazetteer file to write')
+    parser.add_argument('--counts', action='store_true',
+                        help='Second column holds raw counts rather than weights')
+    args = parser.parse_args()
+    
+    with open(args.input, newline='', encoding='utf-8-sig') as f:
+        dialect = csv.excel_tab if args.input.endswith('.tsv') else csv.excel
+        rows = [(row[0], row[1] if len(row) > 1 else None) for row in csv.reader(f, dialect) if row]
+    
+    written = build_gazetteer(rows, args.output, counts=args.counts)
+    print(f"Wrote {written} names to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Disk-backed cache of extracted page text with negative caching for failures
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+class PageCache:
+    """Hits only read; access times for LRU eviction are batched and written with the next store
+    
+    Database errors (a locked or corrupt file) are logged and treated as
+    misses, so the cache can slow a lookup down but never fail it.
+    """
+    
+    def __init__(self, path=None, ttl=None, max_entries=None, touch_batch=None):
+        self.path = path or os.getenv('PAGE_CACHE_PATH', 'cache/page_cache.db')
+        self.ttl = ttl if ttl is not None else int(os.getenv('PAGE_CACHE_TTL', 24 * 3600))
+        self.max_entries = max_entries or int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 20000))
+        self.touch_batch = touch_batch or int(os.getenv('PAGE_CACHE_TOUCH_BATCH', 500))
+        self.touched = {}  # url -> accessed_at not yet written to disk
+        
+        # Negative caching: exponential backoff for failing URLs and hosts
+        self.backoff_base = float(os.getenv('PAGE_CACHE_BACKOFF_BASE', 60))
+        self.backoff_max = float(os.getenv('PAGE_CACHE_BACKOFF_MAX', 6 * 3600))
+        self.domain_failure_threshold = 2
+        
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'negative_hits': 0,
+            'evictions': 0
+        }
+        
+        self.db = None
+        if self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.db = sqlite3.connect(self.path, check_same_thread=False)
+                self.db.execute(
+                    'CREATE TABLE IF NOT EXISTS pages ('
+                    'url TEXT PRIMARY KEY, text TEXT NOT NULL, etag TEXT, last_modified TEXT, '
+                    'fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+                )
+                self.db.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+                self.db.execute(
+                    'CREATE TABLE IF NOT EXISTS failures ('
+                    'key TEXT PRIMARY KEY, failures INTEGER NOT NULL, retry_at REAL NOT NULL)'
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Page cache disabled: %s", e)
+                self.db = None
+    
+    def get_domain(self, url):
+        """Host part of a URL, used as the domain-level negative cache key"""
+        return 'domain:' + urlparse(url).netloc.lower()
+    
+    def get(self, url):
+        """Return the cached entry for a URL (fresh or stale) or None
+        
+        The entry dict has text, etag, last_modified and a 'fresh' flag; stale
+        entries should be revalidated with get_conditional_headers().
+        """
+        if self.db is None:
+            return None
+        
+        now = time.time()
+        with self.lock:
+            try:
+                row = self.db.execute(
+                    'SELECT text, etag, last_modified, fetched_at FROM pages WHERE url = ?', (url,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug("Page cache read failed: %s", e)
+                row = None
+            
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            
+            self._touch(url, now)
+            
+            fresh = now - row[3] <= self.ttl
+            self.stats['hits' if fresh else 'stale_hits'] += 1
+            
+            return {
+                'text': row[0],
+                'etag': row[1],
+                'last_modified': row[2],
+                'fresh': fresh
+            }
+    
+    def get_conditional_headers(self, entry):
+        """Request headers to revalidate a stale entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def set(self, url, text, etag=None, last_modified=None):
+        """Store extracted text for a URL and clear its failure records"""
+        if self.db is None:
+            return
+        
+        now = time.time()
+        with self.lock:
+            self.touched.pop(url, None)
+            try:
+                self._write_touched()
+                self.db.execute(
+                    'INSERT OR REPLACE INTO pages (url, text, etag, last_modified, fetched_at, accessed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', (url, text, etag, last_modified, now, now)
+                )
+                self.db.execute(
+                    'DELETE FROM failures WHERE key IN (?, ?)', (url, self.get_domain(url))
+                )
+                
+                self.writes += 1
+                if self.writes % 100 == 0:
+                    self._evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('write', e)
+    
+    def mark_revalidated(self, url):
+        """A 304 came back: the cached text is fresh again"""
+        if self.db is None:
+            return
+        
+        with self.lock:
+            self.stats['revalidated'] += 1
+            try:
+                self.db.execute('UPDATE pages SET fetched_at = ? WHERE url = ?', (time.time(), url))
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('revalidation', e)
+    
+    def is_blocked(self, url):
+        """Check whether the URL or its host is backing off after failures"""
+        if self.db is None:
+            return False
+        
+        now = time.time()
+        domain = self.get_domain(url)
+        with self.lock:
+            try:
+                rows = self.db.execute(
+                    'SELECT key, failures, retry_at FROM failures WHERE key IN (?, ?)', (url, domain)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.debug("Page cache read failed: %s", e)
+                return False
+            
+            for key, failures, retry_at in rows:
+                if retry_at <= now:
+                    continue
+                if key == domain and failures < self.domain_failure_threshold:
+                    continue
+                self.stats['negative_hits'] += 1
+                return True
+            return False
+    
+    def record_failure(self, url, domain_failure=False):
+        """Back off a failing URL (and its host for connection errors/timeouts)"""
+        if self.db is None:
+            return
+        
+        keys = [url]
+        if domain_failure:
+            keys.append(self.get_domain(url))
+        
+        now = time.time()
+        with self.lock:
+            try:
+                for key in keys:
+                    row = self.db.execute('SELECT failures FROM failures WHERE key = ?', (key,)).fetchone()
+                    failures = (row[0] if row else 0) + 1
+                    delay = min(self.backoff_base * (2 ** (failures - 1)), self.backoff_max)
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO failures (key, failures, retry_at) VALUES (?, ?, ?)',
+                        (key, failures, now + delay)
+                    )
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('failure record', e)
+    
+    def clear(self):
+        """Drop all cached pages and failure records"""
+        if self.db is None:
+            return
+        
+        with self.lock:
+            self.touched.clear()
+            self.db.execute('DELETE FROM pages')
+            self.db.execute('DELETE FROM failures')
+            self.db.commit()
+    
+    def flush(self):
+        """Write pending access times to disk"""
+        if self.db is None:
+            return
+        
+        with self.lock:
+            try:
+                self._write_touched()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('flush', e)
+    
+    def get_stats(self):
+        """Size, hit rate and eviction counters"""
+        stats = dict(self.stats)
+        
+        stats['size'] = stats['size_bytes'] = stats['backing_off'] = 0
+        with self.lock:
+            if self.db is not None:
+                try:
+                    stats['size'] = self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+                    stats['size_bytes'] = self.db.execute(
+                        'SELECT COALESCE(SUM(LENGTH(text)), 0) FROM pages'
+                    ).fetchone()[0]
+                    stats['backing_off'] = self.db.execute(
+                        'SELECT COUNT(*) FROM failures WHERE retry_at > ?', (time.time(),)
+                    ).fetchone()[0]
+                except sqlite3.Error as e:
+                    logger.debug("Page cache stats failed: %s", e)
+        
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['revalidated']) / lookups, 3) if lookups else 0.0
+        return stats
+    
+    def _touch(self, url, now):
+        """Note an access, writing the batch once it is full"""
+        self.touched[url] = now
+        if len(self.touched) >= self.touch_batch:
+            try:
+                self._write_touched()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('flush', e)
+    
+    def _rollback(self, action, e):
+        """Log a failed write and drop whatever part of it reached the open transaction"""
+        logger.debug("Page cache %s failed: %s", action, e)
+        try:
+            self.db.rollback()
+        except sqlite3.Error:
+            pass
+    
+    def _write_touched(self):
+        """Apply pending access times in one statement (the caller commits)"""
+        if self.touched:
+            touched, self.touched = self.touched, {}
+            self.db.executemany(
+                'UPDATE pages SET accessed_at = MAX(accessed_at, ?) WHERE url = ?',
+                [(accessed_at, url) for url, accessed_at in touched.items()]
+            )
+    
+    def _evict(self):
+        """Trim pages to max_entries by least recent use, and prune failure records
+        
+        A failure record is kept for backoff_max after its retry time, so
+        that a URL failing again soon backs off further, then dropped.
+        """
+        size = self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self.db.execute(
+                'DELETE FROM pages WHERE url IN ('
+                'SELECT url FROM pages ORDER BY accessed_at LIMIT ?)', (overflow,)
+            )
+            self.stats['evictions'] += overflow
+        
+        self.db.execute('DELETE FROM failures WHERE retry_at < ?', (time.time() - self.backoff_max,))
+        failures = self.db.execute('SELECT COUNT(*) FROM failures').fetchone()[0]
+        if failures > self.max_entries:
+            self.db.execute(
+                'DELETE FROM failures WHERE key IN ('
+                'SELECT key FROM failures ORDER BY retry_at LIMIT ?)', (failures - self.max_entries,)
+            )
@@ -0,0 +1,266 @@
+"""
+Pooled, streaming page fetcher used for full-page extraction
+"""
+import os
+import re
+import codecs
+import time
+import weakref
+import threading
+import logging
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import INTERACTIVE, get_default_rate_limiter, get_retry_after
+from metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+class PageFetcher:
+    offline = False  # Replay fetchers serve recorded pages without the network
+    
+    def __init__(self, max_bytes=None, max_per_host=None, pool_size=None, timeout=5, rate_limiter=None):
+        self.max_bytes = max_bytes or int(os.getenv('PAGE_FETCH_MAX_BYTES', 300000))
+        self.max_per_host = max_per_host or int(os.getenv('PAGE_FETCH_MAX_PER_HOST', 2))
+        self.pool_size = pool_size or int(os.getenv('PAGE_FETCH_POOL_SIZE', 20))
+        self.timeout = timeout
+        self.chunk_size = 16384
+        
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,text/plain;q=0.8'
+        }
+        
+        # One shared session so connections are kept alive and reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(self.headers)
+        
+        # Hosts with a fetch in flight; idle hosts' semaphores are garbage collected
+        self.host_limits = weakref.WeakValueDictionary()
+        self.host_limits_lock = threading.Lock()
+        
+        # Per-host token buckets, shared with other worker processes
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        
+        # Content we can extract text from
+        self.text_content_types = ['text/html', 'application/xhtml+xml', 'text/plain']
+        
+        # Extensions that are never worth downloading
+        self.binary_extensions = (
+            '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+            '.zip', '.gz', '.rar', '.png', '.jpg', '.jpeg', '.gif', '.webp',
+            '.svg', '.mp3', '.mp4', '.avi', '.mov', '.exe', '.dmg'
+        )
+        
+        # Magic numbers of common binary formats
+        self.binary_signatures = (
+            b'%PDF', b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'PK\x03\x04',
+            b'\x1f\x8b', b'RIFF', b'\xd0\xcf\x11\xe0'
+        )
+    
+    def get_host_limit(self, host):
+        """Semaphore bounding concurrent connections to one host"""
+        with self.host_limits_lock:
+            limit = self.host_limits.get(host)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.max_per_host)
+                self.host_limits[host] = limit
+            return limit
+    
+    def is_binary_url(self, url):
+        """Check the URL path for extensions we cannot extract text from"""
+        path = urlparse(url).path.lower()
+        return path.endswith(self.binary_extensions)
+    
+    def is_text_content_type(self, content_type):
+        """Check a Content-Type header against the types we parse"""
+        if not content_type:
+            return True  # Unknown, decide by sniffing the body
+        
+        media_type = content_type.split(';')[0].strip().lower()
+        return media_type in self.text_content_types
+    
+    def looks_binary(self, head):
+        """Sniff the first bytes of a body for binary formats"""
+        if head.startswith(self.binary_signatures):
+            return True
+        return b'\x00' in head[:1024]
+    
+    def detect_encoding(self, content_type, body):
+        """Pick a charset from the header, a <meta> tag, or fall back to UTF-8"""
+        charset = None
+        
+        match = re.search(r'charset=["\']?([\w-]+)', content_type or '', re.I)
+        if match:
+            charset = match.group(1)
+        else:
+            match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', body[:2048], re.I)
+            if match:
+                charset = match.group(1).decode('ascii', errors='ignore')
+        
+        if charset:
+            try:
+                return codecs.lookup(charset).name
+            except LookupError:
+                pass
+        return 'utf-8'
+    
+    def fetch(self, url, headers=None, timeout=None, extractor=None, priority=INTERACTIVE):
+        """Fetch up to max_bytes of a text page
+        
+        Returns a dict with status, headers and the (possibly truncated) body,
+        or None when the page is binary, unreachable or not a text document.
+        When an extractor (see html_text) is given it is fed as bytes arrive,
+        reading stops as soon as it is done, and its text is returned as 'text'.
+        A 429 response backs off the host's rate-limit bucket before raising.
+        timeout bounds the whole fetch, not just each socket read, so a server
+        dripping bytes raises requests.Timeout once it runs out.
+        """
+        if not url or not url.startswith(('http://', 'https://')):
+            return None
+        
+        if self.is_binary_url(url):
+            logger.debug("Skipping binary URL %s", url)
+            return None
+        
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        
+        host = urlparse(url).netloc.lower()
+        bucket = self.rate_limiter.host(host)
+        if not bucket.acquire(priority, timeout=timeout):
+            raise requests.Timeout(f"No rate-limit token for {host} within {timeout}s")
+        
+        with self.get_host_limit(host):
+            response = self.session.get(
+                url,
+                headers=headers,
+                timeout=max(deadline - time.monotonic(), 0.001),
+                stream=True
+            )
+            
+            try:
+                if response.status_code == 304:
+                    return {
+                        'url': url,
+                        'status': 304,
+                        'headers': dict(response.headers),
+                        'body': '',
+                        'truncated': False
+                    }
+                
+                if response.status_code == 429:
+                    bucket.backoff(get_retry_after(response.headers))
+                
+                response.raise_for_status()
+                
+                content_type = response.headers.get('Content-Type', '')
+                if not self.is_text_content_type(content_type):
+                    logger.debug("Skipping %s with content type %s", url, content_type)
+                    return None
+                
+                body = StreamingBody(self, content_type, extractor)
+                for chunk in self.iter_chunks(response):
+                    if not body.add(chunk):
+                        break
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout(f"Reading {url} took longer than {timeout}s")
+                
+                if body.binary:
+                    logger.debug("Skipping %s: body looks binary", url)
+                    return None
+                
+                return body.to_page(url, response.status_code, dict(response.headers))
+            finally:
+                # Closing drops the rest of a truncated body instead of reading it
+                response.close()
+    
+    def iter_chunks(self, response):
+        """Body chunks as soon as any bytes arrive, so the caller can check its deadline between them
+        
+        iter_content() waits for a full chunk_size, which a slow server can
+        stretch far past the timeout; urllib3's read1() (2.3+) returns early.
+        """
+        raw = response.raw
+        if not hasattr(raw, 'read1'):
+            yield from response.iter_content(chunk_size=self.chunk_size)
+            return
+        
+        while True:
+            chunk = raw.read1(self.chunk_size, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    
+    def record(self, url, page):
+        """Hook called with every network fetch result (see replay_store)"""
+        pass
+
+
+class StreamingBody:
+    """Accumulates a streamed response body within the fetcher's byte budget"""
+    
+    def __init__(self, fetcher, content_type, extractor=None):
+        self.fetcher = fetcher
+        self.content_type = content_type
+        self.extractor = extractor
+        self.decoder = None
+        
+        self.chunks = []
+        self.received = 0
+        self.truncated = False
+        self.binary = False
+        self.parse_seconds = 0.0  # Time spent in the extractor, interleaved with the download
+    
+    def add(self, chunk):
+        """Add a chunk, returning False once reading should stop"""
+        if not chunk:
+            return True
+        
+        if not self.chunks and self.fetcher.looks_binary(chunk):
+            self.binary = True
+            return False
+        
+        self.chunks.append(chunk)
+        self.received += len(chunk)
+        
+        if self.extractor is not None:
+            if self.decoder is None:
+                encoding = self.fetcher.detect_encoding(self.content_type, chunk)
+                self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            
+            started = time.perf_counter()
+            self.extractor.feed(self.decoder.decode(chunk))
+            self.parse_seconds += time.perf_counter() - started
+            if self.extractor.done:
+                return False
+        
+        if self.received >= self.fetcher.max_bytes:
+            self.truncated = True
+            return False
+        
+        return True
+    
+    def to_page(self, url, status, headers):
+        """Build the fetch result dict"""
+        body = b''.join(self.chunks)[:self.fetcher.max_bytes]
+        encoding = self.fetcher.detect_encoding(self.content_type, body)
+        
+        page = {
+            'url': url,
+            'status': status,
+            'headers': headers,
+            'body': body.decode(encoding, errors='replace'),
+            'truncated': self.truncated
+        }
+        
+        if self.extractor is not None:
+            started = time.perf_counter()
+            self.extractor.close()
+            page['text'] = self.extractor.get_text()
+            record_stage('html_parse', self.parse_seconds + time.perf_counter() - started)
+        
+        return page
@@ -0,0 +1,151 @@
+"""
+Speculative page prefetching, ranked by credibility, path hints and per-domain name yield
+"""
+import os
+import threading
+import logging
+from contextvars import copy_context
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError
+from deadline import get_timeout, mark_degraded
+from metrics import PAGE_PREFETCHES
+
+logger = logging.getLogger(__name__)
+
+class DomainYields:
+    """How many names fetched pages of each domain have yielded, as a 0..1 average
+    
+    A page with two or more names scores 1, one without any (including pages
+    that could not be fetched, such as login walls) scores 0. Domains not
+    fetched yet get the prior.
+    """
+    
+    def __init__(self, prior=0.5, smoothing=0.2):
+        self.prior = prior
+        self.smoothing = smoothing
+        self.yields = {}
+        self.lock = threading.Lock()
+    
+    def record(self, domain, names):
+        value = min(names, 2) / 2
+        with self.lock:
+            average = self.yields.get(domain)
+            self.yields[domain] = value if average is None else average + self.smoothing * (value - average)
+    
+    def get(self, domain):
+        return self.yields.get(domain, self.prior)
+    
+    def get_stats(self):
+        with self.lock:
+            return {domain: round(value, 3) for domain, value in sorted(self.yields.items())}
+
+
+class PagePrefetch:
+    """Page fetches for one lookup, started before it is known whether they are needed
+    
+    add() is fed (credibility-filtered) results as they arrive and starts
+    fetching the best-ranked ones, up to max_pages, on the extractor's
+    prefetch pool. Their snippets are analysed on the way in, once per link:
+    when they name enough people that the extractor's page-fetch fallback
+    will not run (NameExtractor.needs_page_fetch), pending prefetches are
+    cancelled and no more are started. fetch() returns the pages actually
+    wanted, reusing downloads already under way (and resubmitting cancelled
+    ones), and close() cancels the rest. A fetch that already started is
+    left to finish into the page cache.
+    """
+    
+    def __init__(self, extractor, company, designation, fetch_page, max_pages=None, min_score=None,
+                 enabled=None):
+        self.extractor = extractor
+        self.company = company
+        self.designation = designation
+        self.fetch_page = fetch_page
+        self.max_pages = max_pages or int(os.getenv('PREFETCH_MAX_PAGES', 2))
+        self.min_score = min_score if min_score is not None else float(os.getenv('PREFETCH_MIN_SCORE', 0.8))
+        if enabled is None:
+            enabled = os.getenv('PAGE_PREFETCH', 'true').lower() in ('1', 'true', 'yes')
+        self.enabled = enabled
+        
+        # Fetches run in the creator's context so they see its deadline and stage timings
+        self.context = copy_context()
+        self.futures = {}  # url -> future
+        self.speculative = set()  # urls started by add()
+        self.used = set()
+        self.closed = False
+        
+        # Snippet candidates of every link seen so far, counted the way the fallback counts them
+        self.analyzer = None
+        self.seen = set()
+        self.found_people = []
+        self.enough = False
+        self.lock = threading.Lock()
+    
+    def submit(self, url):
+        return self.extractor.prefetch_executor.submit(self.context.copy().run, self.fetch_page, url)
+    
+    def add(self, results):
+        """Start fetching the most promising of these results within the prefetch limit"""
+        if not self.enabled:
+            return
+        
+        with self.lock:
+            if self.closed or self.enough:
+                return
+            
+            if self.analyzer is None:
+                self.analyzer = self.extractor.get_context_analyzer(self.company, self.designation)
+            for result in results:
+                link = result.get('link')
+                if link not in self.seen:
+                    self.seen.add(link)
+                    self.found_people.extend(self.extractor.snippet_candidates(result, self.analyzer))
+            
+            if not self.extractor.needs_page_fetch(self.found_people):
+                logger.debug("Snippets already name enough people, cancelling page prefetches")
+                self.enough = True
+                for url in self.speculative - self.used:
+                    self.futures[url].cancel()
+                return
+            
+            if len(self.speculative) >= self.max_pages:
+                return
+            
+            for score, result in self.extractor.rank_fetch_targets(results, self.company):
+                if score < self.min_score or len(self.speculative) >= self.max_pages:
+                    break
+                
+                url = result['link']
+                if url not in self.futures:
+                    logger.debug("Prefetching %s (score %.2f)", url, score)
+                    self.futures[url] = self.submit(url)
+                    self.speculative.add(url)
+    
+    def fetch(self, targets):
+        """Page text for every target result, fetched concurrently and yielded in target order"""
+        with self.lock:
+            for result in targets:
+                url = result['link']
+                if url not in self.futures or self.futures[url].cancelled():
+                    self.futures[url] = self.submit(url)
+                self.used.add(url)
+            futures = [self.futures[result['link']] for result in targets]
+        
+        for future in futures:
+            try:
+                yield future.result(timeout=get_timeout())
+            except FutureTimeoutError:
+                mark_degraded('page_fetch_timeout')
+                yield None
+            except CancelledError:
+                yield None
+    
+    def close(self):
+        """Cancel prefetches that were not needed and have not started"""
+        with self.lock:
+            self.closed = True
+            for url in self.speculative:
+                if url in self.used:
+                    PAGE_PREFETCHES.inc(outcome='used')
+                elif self.futures[url].cancel():
+                    PAGE_PREFETCHES.inc(outcome='cancelled')
+                else:
+                    PAGE_PREFETCHES.inc(outcome='unused')
@@ -0,0 +1,493 @@
+"""
+Lookup pipeline: query building, search, extraction and validation
+"""
+import os
+import queue
+import threading
+import logging
+from functools import partial
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rate_limiter import INTERACTIVE, BATCH
+from singleflight import SingleFlight
+from result_cache import ResultCache
+from deadline import current_deadline, deadline_scope
+
+logger = logging.getLogger(__name__)
+
+
+class LookupProgress:
+    """Turns a lookup's intermediate steps into stream events on a queue
+    
+    Search attempts report from worker threads, so the candidates found so
+    far are kept under a lock. Events: 'planned', 'results' (per attempt),
+    'candidates' (newly extracted names) and 'provisional' (whenever the
+    best match changes).
+    """
+    
+    def __init__(self, pipeline, company, designation, events):
+        self.pipeline = pipeline
+        self.company = company
+        self.designation = designation
+        self.events = events
+        
+        self.found_people = []
+        self.seen_urls = set()
+        self.provisional = None
+        self.lock = threading.Lock()
+    
+    def planned(self, queries):
+        attempts = sum(self.pipeline.search_engine.count_attempts(query) for query in queries)
+        self.events.put(('planned', {'queries': queries, 'attempts': attempts}))
+    
+    def results(self, results, query):
+        """An attempt's results; names in snippets not seen in an earlier attempt become candidates"""
+        with self.lock:
+            fresh = [result for result in results if result.get('link') not in self.seen_urls]
+            self.seen_urls.update(result.get('link') for result in fresh)
+        
+        self.events.put(('results', {'query': query, 'results': len(results), 'new': len(fresh)}))
+        self.candidates(self.pipeline.name_extractor.extract_from_snippets(fresh, self.company, self.designation))
+    
+    def candidates(self, people):
+        with self.lock:
+            self.found_people.extend(people)
+            if people:
+                self.events.put(('candidates', {'candidates': [
+                    {key: person.get(key) for key in ('name', 'source_url', 'validation', 'context_score')}
+                    for person in people
+                ]}))
+            
+            candidates = self.pipeline.name_extractor.merge_candidates(self.found_people)
+            response = self.pipeline.build_response(candidates, self.company, self.designation)
+            if response['success'] and response['person'] != self.provisional:
+                self.provisional = response['person']
+                self.events.put(('provisional', response))
+
+
+class LookupPipeline:
+    def __init__(self, query_builder, search_engine, name_extractor, validator, max_workers=None,
+                 result_cache=None):
+        self.query_builder = query_builder
+        self.search_engine = search_engine
+        self.name_extractor = name_extractor
+        self.validator = validator
+        
+        # Final responses, served stale while a background refresh runs
+        self.result_cache = result_cache if result_cache is not None else \
+            ResultCache(query_builder=query_builder)
+        self.refreshing = set()
+        self.refreshing_lock = threading.Lock()
+        
+        # Bounded concurrency for batch lookups (rows and shared queries)
+        self.max_workers = max_workers or int(os.getenv('BATCH_MAX_WORKERS', 8))
+        self.max_results = 5
+        
+        # Progressive mode stops once a candidate is confident and corroborated
+        self.progressive = os.getenv('PROGRESSIVE_SEARCH', 'false').lower() in ('1', 'true', 'yes')
+        self.min_confidence = float(os.getenv('PROGRESSIVE_MIN_CONFIDENCE', 0.8))
+        self.min_sources = int(os.getenv('PROGRESSIVE_MIN_SOURCES', 2))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='lookup')
+        
+        # Concurrent identical lookups share one pipeline execution
+        self.lookups = SingleFlight('lookup')
+    
+    def filter_results(self, queries, results_by_query, company):
+        """Filter each query's results for credibility, preserving query order"""
+        all_results = []
+        for query in queries:
+            logger.info("Executing query: %s", query)
+            results = results_by_query.get(query, [])
+            logger.info("Got %s raw results", len(results))
+            
+            filtered = self.search_engine.filter_credible_sources(results, company)
+            logger.info("Filtered to %s results", len(filtered))
+            
+            all_results.extend(filtered)
+        
+        logger.info("Total results after all queries: %s", len(all_results))
+        return all_results
+    
+    def evaluate(self, company, designation, all_results, fetch_page=None, prefetch=None, on_page=None):
+        """Extract names from results and build the response payload"""
+        # Step 3: Extract names
+        candidates = self.name_extractor.extract_names(all_results, company, designation, fetch_page=fetch_page,
+                                                       prefetch=prefetch, on_page=on_page)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Found %s candidates: %s", len(candidates), [c['name'] for c in candidates])
+        
+        return self.build_response(candidates, company, designation)
+    
+    def build_response(self, candidates, company, designation):
+        """Validate candidates and build the response payload"""
+        # Step 4: Validate and calculate confidence
+        best_match = self.validator.cross_validate(candidates, company, designation)
+        
+        if best_match:
+            logger.info("Best match: %s with confidence %s", best_match['name'], best_match['confidence'])
+            
+            # Split name
+            first_name, last_name = self.validator.split_name(best_match['name'])
+            sources = best_match.get('sources') or [best_match]
+            
+            return {
+                'success': True,
+                'person': {
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'current_title': designation,
+                    'source_url': best_match.get('source_url', ''),
+                    'confidence': round(best_match['confidence'], 2)
+                },
+                'sources_used': len(sources),
+                'all_sources': [source.get('source_url', '') for source in sources],
+                'degraded': False
+            }
+        
+        logger.warning("No person found matching the criteria")
+        return {
+            'success': False,
+            'error': 'No person found matching the criteria',
+            'suggestions': 'Try broader search terms or check company spelling',
+            'degraded': False
+        }
+    
+    def plan_queries(self, company, designation):
+        """Queries for a lookup, within a budget of upstream search calls (query x region attempts)"""
+        return self.query_builder.build_queries(company, designation, cost=self.search_engine.count_attempts)
+    
+    def get_lookup_key(self, company, designation):
+        """Normalized (company, designation) identifying equivalent lookups"""
+        return self.result_cache.make_key(company, designation)
+    
+    def get_cached_response(self, company, designation):
+        """Cached response for a lookup, refreshing stale entries in the background"""
+        entry = self.result_cache.get(company, designation)
+        if entry is None:
+            return None
+        
+        if not entry['fresh']:
+            self.refresh_in_background(company, designation)
+        
+        return dict(entry['response'], cached=True, cache_age=entry['age'], stale=not entry['fresh'])
+    
+    def store_response(self, company, designation, response):
+        """Cache successful responses; failures are retried on the next request"""
+        if response.get('success'):
+            self.result_cache.set(company, designation, response)
+    
+    def finish_response(self, company, designation, response):
+        """Cache a complete response, or flag one the deadline cut short (and keep it out of the cache)"""
+        deadline = current_deadline()
+        if deadline is not None and deadline.degraded:
+            return dict(response, degraded=True, degraded_reasons=list(deadline.reasons))
+        
+        self.store_response(company, designation, response)
+        return response
+    
+    def refresh_in_background(self, company, designation):
+        """Re-run a lookup with batch priority to replace a stale cached response"""
+        key = self.get_lookup_key(company, designation)
+        with self.refreshing_lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+        
+        def refresh():
+            try:
+                logger.info("Refreshing stale cached result for %s at %s", designation, company)
+                self.lookups.do(('lookup',) + key, self._lookup, company, designation, BATCH)
+            except Exception as e:
+                logger.warning("Background refresh for %s at %s failed: %s", designation, company, e)
+            finally:
+                with self.refreshing_lock:
+                    self.refreshing.discard(key)
+        
+        self.executor.submit(refresh)
+    
+    def lookup(self, company, designation):
+        """Run the full pipeline for one (company, designation) pair
+        
+        Cached responses are returned straight away (stale ones are refreshed
+        in the background). A lookup already in flight for the same normalized
+        pair (from another request or a batch row) is joined instead of run again.
+        """
+        # Known executives need no network calls at all
+        known = self.name_extractor.find_known_executive(company, designation)
+        if known:
+            return self.build_response(known, company, designation)
+        
+        cached = self.get_cached_response(company, designation)
+        if cached is not None:
+            return cached
+        
+        key = ('lookup',) + self.get_lookup_key(company, designation)
+        return self.lookups.do(key, self._lookup, company, designation)
+    
+    def _lookup(self, company, designation, priority=INTERACTIVE, progress=None, cancel_event=None):
+        """Search, extract and validate; progress (a LookupProgress) is told about each step
+        
+        Returns None without caching anything if cancel_event is set before
+        the searches finish.
+        """
+        logger.info("Searching for %s at %s", designation, company)
+        
+        # Step 1: Build queries
+        queries = self.plan_queries(company, designation)
+        logger.debug("Generated %s queries: %s", len(queries), queries)
+        if progress is not None:
+            progress.planned(queries)
+        
+        # Promising pages start downloading as soon as search results arrive,
+        # overlapping the searches still in flight
+        fetch_page = partial(self.name_extractor.fetch_page_content, priority=priority)
+        prefetch = self.name_extractor.start_prefetch(company, designation, fetch_page)
+        
+        def on_results(results, query):
+            # The fallback only sees credible results, so the prefetch counts names from those alone
+            prefetch.add(self.search_engine.filter_credible_sources(results, company))
+            if progress is not None:
+                progress.results(results, query)
+        
+        # Step 2: Search (all queries fanned out concurrently)
+        results_by_query = self.search_engine.search_many(queries, max_results=self.max_results, priority=priority,
+                                                          cancel_event=cancel_event, on_results=on_results)
+        if cancel_event is not None and cancel_event.is_set():
+            prefetch.close()
+            return None
+        all_results = self.filter_results(queries, results_by_query, company)
+        
+        response = self.evaluate(company, designation, all_results, fetch_page=fetch_page, prefetch=prefetch,
+                                 on_page=progress.candidates if progress is not None else None)
+        return self.finish_response(company, designation, response)
+    
+    def lookup_progressive(self, company, designation, min_confidence=None, min_sources=None):
+        """Run the pipeline incrementally, stopping as soon as the answer is settled
+        
+        Queries are searched concurrently but evaluated in priority order; after
+        each query (and each fetched page) the candidates are re-validated. Once
+        the best candidate reaches min_confidence with at least min_sources
+        corroborating domains, the remaining searches and fetches are cancelled.
+        """
+        min_confidence = self.min_confidence if min_confidence is None else min_confidence
+        min_sources = self.min_sources if min_sources is None else min_sources
+        
+        key = ('progressive',) + self.get_lookup_key(company, designation) + (min_confidence, min_sources)
+        return self.lookups.do(key, self._lookup_progressive, company, designation, min_confidence, min_sources)
+    
+    def _lookup_progressive(self, company, designation, min_confidence, min_sources):
+        logger.info("Progressive search for %s at %s", designation, company)
+        
+        stats = {'queries_planned': 0, 'queries_executed': 0, 'pages_fetched': 0, 'early_stop': False}
+        
+        known = self.name_extractor.find_known_executive(company, designation)
+        if known:
+            return dict(self.build_response(known, company, designation), **stats)
+        
+        cached = self.get_cached_response(company, designation)
+        if cached is not None:
+            return dict(cached, **stats)
+        
+        queries = self.plan_queries(company, designation)
+        stats['queries_planned'] = len(queries)
+        
+        cancelled = threading.Event()
+        lock = threading.Lock()
+        
+        def run_query(query):
+            if cancelled.is_set():
+                return []
+            with lock:
+                stats['queries_executed'] += 1
+            return self.search_engine.search(query, self.max_results, cancel_event=cancelled)
+        
+        def fetch_page(url):
+            if cancelled.is_set():
+                return None
+            with lock:
+                stats['pages_fetched'] += 1
+            return self.name_extractor.fetch_page_content(url)
+        
+        all_results = []
+        found_people = []
+        # Workers run in this context so they see the request's deadline and stage timings
+        futures = [self.executor.submit(copy_context().run, run_query, query) for query in queries]
+        try:
+            for query, future in zip(queries, futures):
+                results = self.filter_results([query], {query: future.result()}, company)
+                all_results.extend(results)
+                found_people.extend(self.name_extractor.extract_from_snippets(results, company, designation))
+                
+                if self.is_settled(found_people, company, designation, min_confidence, min_sources):
+                    stats['early_stop'] = True
+                    break
+            
+            if not stats['early_stop']:
+                targets = self.name_extractor.get_page_fetch_targets(found_people, all_results, company)
+                page_futures = [self.executor.submit(copy_context().run, fetch_page, result.get('link', ''))
+                                for result in targets]
+                futures += page_futures
+                
+                for result, future in zip(targets, page_futures):
+                    found_people.extend(self.name_extractor.extract_from_page(
+                        result, future.result(), company, designation))
+                    
+                    if self.is_settled(found_people, company, designation, min_confidence, min_sources):
+                        stats['early_stop'] = True
+                        break
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+        
+        logger.info("Progressive search spent %s/%s queries and %s page fetches",
+                    stats['queries_executed'], stats['queries_planned'], stats['pages_fetched'])
+        
+        candidates = self.name_extractor.merge_candidates(found_people)
+        response = self.build_response(candidates, company, designation)
+        return dict(self.finish_response(company, designation, response), **stats)
+    
+    def stream_lookup(self, company, designation, budget=None):
+        """Run a lookup, yielding (event, data) pairs as the pipeline progresses
+        
+        The lookup runs on its own thread, inside a deadline_scope(budget),
+        through the same search, prefetch and finish_response path as
+        lookup(); LookupProgress reports each search attempt as it completes,
+        so a provisional answer is available after the first upstream call.
+        Events: 'planned', 'results', 'candidates', 'provisional' and finally
+        'done' with the same response /search returns, which is cached like
+        lookup()'s unless the deadline degraded it. Closing the generator
+        cancels the searches that have not started; a lookup closed before its
+        searches finish caches nothing.
+        """
+        logger.info("Streaming search for %s at %s", designation, company)
+        
+        known = self.name_extractor.find_known_executive(company, designation)
+        if known:
+            yield 'done', self.build_response(known, company, designation)
+            return
+        
+        cached = self.get_cached_response(company, designation)
+        if cached is not None:
+            yield 'done', cached
+            return
+        
+        events = queue.Queue()
+        cancelled = threading.Event()
+        outcome = {}
+        
+        def run():
+            try:
+                with deadline_scope(budget):
+                    progress = LookupProgress(self, company, designation, events)
+                    outcome['response'] = self._lookup(company, designation, progress=progress,
+                                                       cancel_event=cancelled)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                events.put((None, None))
+        
+        # The worker runs in a copy of this context, keeping the request's stage timings
+        worker = threading.Thread(target=copy_context().run, args=(run,), name='stream-lookup', daemon=True)
+        worker.start()
+        try:
+            while True:
+                event, data = events.get()
+                if event is None:
+                    break
+                yield event, data
+        finally:
+            cancelled.set()
+        
+        if 'error' in outcome:
+            raise outcome['error']
+        yield 'done', outcome['response']
+    
+    def is_settled(self, found_people, company, designation, min_confidence, min_sources):
+        """Whether the best candidate so far is confident and independently corroborated"""
+        candidates = self.name_extractor.merge_candidates(found_people)
+        best_match = self.validator.cross_validate(candidates, company, designation)
+        if not best_match or best_match['confidence'] < min_confidence:
+            return False
+        
+        # Domains mentioning any variant of the best match's name
+        return len(best_match.get('domains', [])) >= min_sources
+    
+    def run_batch(self, rows):
+        """Look up many (company, designation) rows, yielding results as rows finish
+        
+        All queries are planned up front and every distinct query is searched
+        once per batch, however many rows share it. Full-page fetches are also
+        shared across rows. Each yielded dict carries the row's index. Batch
+        searches and fetches queue behind interactive requests for rate limits.
+        """
+        planned = []
+        for index, row in enumerate(rows):
+            company = str(row.get('company') or '').strip()
+            designation = str(row.get('designation') or '').strip()
+            
+            if not company or not designation:
+                yield {
+                    'index': index,
+                    'company': company,
+                    'designation': designation,
+                    'success': False,
+                    'error': 'Company and designation are required'
+                }
+                continue
+            
+            known = self.name_extractor.find_known_executive(company, designation)
+            if known:
+                response = self.build_response(known, company, designation)
+                yield dict({'index': index, 'company': company, 'designation': designation}, **response)
+                continue
+            
+            cached = self.get_cached_response(company, designation)
+            if cached is not None:
+                yield dict({'index': index, 'company': company, 'designation': designation}, **cached)
+                continue
+            
+            queries = self.plan_queries(company, designation)
+            planned.append((index, company, designation, queries))
+        
+        unique_queries = list(dict.fromkeys(q for _, _, _, queries in planned for q in queries))
+        total_queries = sum(len(queries) for _, _, _, queries in planned)
+        logger.info("Batch of %s rows needs %s unique queries (%s before deduplication)",
+                    len(planned), len(unique_queries), total_queries)
+        
+        # Page fetches are shared through the extractor's in-flight map and page cache
+        fetch_page = partial(self.name_extractor.fetch_page_content, priority=BATCH)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch-query') as query_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='batch-row') as row_pool:
+            query_futures = {
+                query: query_pool.submit(self.search_engine.search, query, self.max_results, priority=BATCH)
+                for query in unique_queries
+            }
+            
+            def evaluate_row(company, designation, queries):
+                results_by_query = {query: query_futures[query].result() for query in queries}
+                all_results = self.filter_results(queries, results_by_query, company)
+                response = self.evaluate(company, designation, all_results, fetch_page=fetch_page)
+                self.store_response(company, designation, response)
+                return response
+            
+            def run_row(company, designation, queries):
+                # Rows also coalesce with interactive lookups for the same pair
+                key = ('lookup',) + self.get_lookup_key(company, designation)
+                return self.lookups.do(key, evaluate_row, company, designation, queries)
+            
+            row_futures = {
+                row_pool.submit(run_row, company, designation, queries): (index, company, designation)
+                for index, company, designation, queries in planned
+            }
+            
+            for future in as_completed(row_futures):
+                index, company, designation = row_futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.error("Batch row %s failed: %s", index, e, exc_info=True)
+                    response = {'success': False, 'error': str(e)}
+                
+                yield dict({'index': index, 'company': company, 'designation': designation}, **response)
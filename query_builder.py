@@ -1,8 +1,169 @@
 """
 Smart query construction with aliases and variations
 """
+import os
+import re
+from metrics import timed
+
+# Separators between the roles of a compound title: "Founder & CEO", "CEO | Sales Manager"
+ROLE_SEPARATOR_RE = re.compile(r'\s*(?:&|\||/|,|;|\+|\s-\s|\band\b)\s*', re.IGNORECASE)
+
+# Trailing qualifiers that only narrow a role down: "Sales Manager for Israel", "Director presso Essence"
+ROLE_QUALIFIER_RE = re.compile(r'\s+(?:for|in|at|presso|@)\s+.*$', re.IGNORECASE)
+
+# Words that make a title fragment a role rather than a qualifier ("Americas", "VIP")
+ROLE_WORDS = {
+    'ceo', 'cto', 'cfo', 'cmo', 'coo', 'cio', 'cso', 'founder', 'cofounder', 'owner', 'coowner',
+    'director', 'manager', 'head', 'chief', 'officer', 'president', 'chairman', 'chairperson',
+    'partner', 'principal', 'lead', 'executive', 'vp', 'md'
+}
+
+# Words ignored when deciding whether two queries are near-identical
+QUERY_STOPWORDS = {'of', 'the', 'who', 'is', 'name', 'a', 'an', 'at', 'for', 'and'}
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+class QueryPlanner:
+    """Plans a small, ranked set of queries for a lookup within a search-call budget
+    
+    Compound titles are split into roles, each role is mapped through the
+    designation aliases, and candidate queries from the templates below are
+    ranked by expected usefulness. Near-identical queries are dropped, as are
+    candidates below min_score, so simple titles use less than the budget.
+    The budget counts upstream calls: every query is charged for each of its
+    region attempts.
+    """
+    
+    # Template, score; role templates are ranked lower for each later role
+    role_templates = [
+        ("{designation} of {company}", 1.0),
+        ("who is the {designation} of {company}", 0.3),
+        ("{designation} {company} profile", 0.3)
+    ]
+    alias_template = ("{designation} of {company}", 0.6)
+    combined_template = ("{company} {designation}", 0.95)  # All roles of a compound title at once
+    company_templates = [
+        ("{company} leadership team", 0.5),
+        ("{company} executives", 0.45)
+    ]
+    well_known_templates = [
+        ("{company} {designation} wikipedia", 0.55),
+        ("{company} official website leadership", 0.45)
+    ]
+    well_known_companies = {'tesla', 'apple', 'google', 'microsoft'}
+    
+    def __init__(self, designation_aliases, budget=None, min_score=0.5, redundancy=0.75):
+        self.designation_aliases = designation_aliases
+        self.budget = budget or int(os.getenv('SEARCH_CALL_BUDGET', 9))
+        self.min_score = min_score
+        self.redundancy = redundancy  # Word-set overlap at which a query adds nothing new
+    
+    def split_roles(self, designation, company=''):
+        """Role fragments of a title, without the company name or qualifiers
+        
+        'Founder & CEO' -> ['Founder', 'CEO']; 'YACHT CHARTER & SALES DIRECTOR'
+        -> ['SALES DIRECTOR']. A title with no recognisable role is kept whole.
+        """
+        text = designation
+        if company:
+            text = re.sub(re.escape(company), ' ', text, flags=re.IGNORECASE)
+        text = ' '.join(text.split())
+        
+        roles = []
+        for part in ROLE_SEPARATOR_RE.split(text):
+            part = ROLE_QUALIFIER_RE.sub('', part).strip(' -')
+            words = {word.replace('-', '') for word in part.lower().split()}
+            if part and words & ROLE_WORDS and part.lower() not in (role.lower() for role in roles):
+                roles.append(part)
+        
+        return roles or ([text] if text else [designation.strip()])
+    
+    def resolve_role(self, role):
+        """(primary spelling, other aliases) of a role"""
+        role_lower = role.lower()
+        for key, aliases in self.designation_aliases.items():
+            alias_lowers = [alias.lower() for alias in aliases]
+            if role_lower == key or role_lower in alias_lowers:
+                # Prefer the alias spelling of what was written ('Ceo' -> 'CEO')
+                primary = aliases[alias_lowers.index(role_lower)] if role_lower in alias_lowers else aliases[0]
+                return primary, [alias for alias in aliases if alias != primary]
+        return role, []
+    
+    def get_candidates(self, company, roles):
+        """Every candidate query with its score"""
+        candidates = []
+        resolved = [self.resolve_role(role) for role in roles]
+        
+        for index, (primary, alternates) in enumerate(resolved):
+            penalty = 0.1 * index
+            for template, score in self.role_templates:
+                candidates.append((score - penalty, template.format(designation=primary, company=company)))
+            for offset, alias in enumerate(alternates):
+                template, score = self.alias_template
+                # 'Head of' already ends in the preposition
+                alias = re.sub(r'\s+of$', '', alias)
+                candidates.append((score - penalty - 0.2 * offset, template.format(designation=alias, company=company)))
+        
+        if len(resolved) > 1:
+            template, score = self.combined_template
+            combined = ' '.join(primary for primary, _ in resolved)
+            candidates.append((score, template.format(designation=combined, company=company)))
+        
+        for template, score in self.company_templates:
+            candidates.append((score, template.format(company=company)))
+        
+        if company.lower() in self.well_known_companies:
+            for template, score in self.well_known_templates:
+                candidates.append((score, template.format(designation=resolved[0][0], company=company)))
+        
+        return candidates
+    
+    def get_signature(self, query):
+        return frozenset(WORD_RE.findall(query.lower())) - QUERY_STOPWORDS
+    
+    def is_redundant(self, signature, chosen_signatures):
+        for other in chosen_signatures:
+            union = len(signature | other)
+            if union and len(signature & other) / union >= self.redundancy:
+                return True
+        return False
+    
+    def plan(self, company, designation, budget=None, cost=None):
+        """Ranked queries for a lookup costing at most `budget` search calls together
+        
+        cost(query) is the number of upstream calls a query takes (its region
+        attempts, see SearchEngine.count_attempts); without it every query
+        counts as one call.
+        """
+        budget = budget or self.budget
+        roles = self.split_roles(designation, company)
+        
+        # Highest score first; ties keep generation order
+        candidates = sorted(enumerate(self.get_candidates(company, roles)), key=lambda item: (-item[1][0], item[0]))
+        
+        queries = []
+        signatures = []
+        for _, (score, query) in candidates:
+            if budget <= 0 or score < self.min_score:
+                break
+            
+            signature = self.get_signature(query)
+            if self.is_redundant(signature, signatures):
+                continue
+            
+            calls = cost(query) if cost is not None else 1
+            if calls > budget:
+                continue
+            
+            budget -= calls
+            queries.append(query)
+            signatures.append(signature)
+        
+        return queries
+
+
 class QueryBuilder:
-    def __init__(self):
+    def __init__(self, search_budget=None):
         self.designation_aliases = {
             'ceo': ['Chief Executive Officer', 'CEO', 'Chief Executive'],
             'cmo': ['Chief Marketing Officer', 'CMO'],
@@ -14,40 +175,38 @@ class QueryBuilder:
             'president': ['President', 'Chairman']
         }
         
-        self.query_patterns = [
-            "{designation} of {company}",
-            "{company} {designation}",
-            "who is the {designation} of {company}",
-            "{company} leadership team",
-            "{company} executives",
-            "{designation} {company} profile"
-        ]
+        # Query templates and ranking live in the planner
+        self.planner = QueryPlanner(self.designation_aliases, budget=search_budget)
     
-    def get_designation_variations(self, designation):
-        """Get variations of a designation"""
-        designation_lower = designation.lower().strip()
+    def normalize_designation(self, designation):
+        """Canonical form of a designation, mapping aliases to their key
         
-        if designation_lower in self.designation_aliases:
-            return self.designation_aliases[designation_lower]
+        'Ceo', ' CEO ' and 'Chief Executive Officer' all normalize to 'ceo'.
+        """
+        designation_lower = ' '.join(designation.lower().split())
         
-        return [designation]
-    
-    def build_queries(self, company, designation):
-        """Build multiple search queries"""
-        queries = []
-        
-        # Add direct query
-        queries.append(f"{designation} of {company}")
+        if designation_lower in self.designation_aliases:
+            return designation_lower
         
-        # Add "who is" query
-        queries.append(f"who is the {designation} of {company}")
+        for key, aliases in self.designation_aliases.items():
+            if designation_lower in (alias.lower() for alias in aliases):
+                return key
         
-        # Add company leadership query
-        queries.append(f"{company} {designation} name")
+        return designation_lower
+    
+    def get_designation_variations(self, designation):
+        """Get variations of a designation, covering every role of a compound title"""
+        variations = [designation]
+        for role in self.planner.split_roles(designation):
+            primary, alternates = self.planner.resolve_role(role)
+            variations.extend([role, primary] + alternates)
         
-        # Add specific queries for known companies
-        if company.lower() in ['tesla', 'apple', 'google', 'microsoft']:
-            queries.append(f"{company} {designation} wikipedia")
-            queries.append(f"{company} official website leadership")
+        return list(dict.fromkeys(variation for variation in variations if variation))
+    
+    @timed('query_build')
+    def build_queries(self, company, designation, cost=None):
+        """Build a ranked set of search queries within the search-call budget
         
-        return list(dict.fromkeys(queries))  # Remove duplicates
\ No newline at end of file
+        cost(query) gives the upstream calls a query takes; see QueryPlanner.plan.
+        """
+        return self.planner.plan(company, designation, cost=cost)
\ No newline at end of file
@@ -0,0 +1,328 @@
+"""
+Token-bucket rate limiting shared across threads and worker processes
+"""
+import os
+import re
+import time
+import struct
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from deadline import get_timeout
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared between threads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes: interactive requests are served before batch work
+INTERACTIVE = 0
+BATCH = 1
+
+# Bucket state on disk: tokens, last refill, blocked until, backoff strikes
+STATE = struct.Struct('<dddd')
+
+class TokenBucket:
+    """Token bucket whose state lives in a small flock-protected file
+    
+    The file is opened for each update and closed straight after, so idle
+    buckets hold no file descriptors.
+    
+    Interactive callers reserve the next token even when the bucket is empty
+    (tokens go negative) and sleep until it is theirs. Batch callers only take
+    a token when one is free, so queued interactive reservations always go
+    first. A backoff after a rate-limit error blocks both lanes. Neither lane
+    waits past the current request's deadline.
+    """
+    
+    def __init__(self, name, rate, period, path=None, backoff_base=2, backoff_max=60):
+        self.name = name
+        self.capacity = max(1.0, float(rate))
+        self.rate = float(rate) / float(period)  # Tokens per second
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        self.lock = threading.Lock()
+        self.state = None
+        self.path = None
+        self.backing_off = False
+        
+        if path and fcntl is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.path = path
+    
+    def _read(self, fd, now):
+        if fd is not None:
+            data = os.pread(fd, STATE.size, 0)
+            state = list(STATE.unpack(data)) if len(data) == STATE.size else None
+        else:
+            state = list(self.state) if self.state else None
+        
+        if state is None:
+            return [self.capacity, now, 0.0, 0.0]
+        
+        # Refill for the time elapsed since the last update
+        tokens, updated, blocked_until, strikes = state
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        return [tokens, now, blocked_until, strikes]
+    
+    def _write(self, fd, state):
+        if fd is not None:
+            os.pwrite(fd, STATE.pack(*state), 0)
+        else:
+            self.state = state
+    
+    def _update(self, change):
+        """Apply change(state, now) atomically across threads and processes"""
+        with self.lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644) if self.path else None
+            try:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                now = time.time()
+                state = self._read(fd, now)
+                result = change(state, now)
+                self._write(fd, state)
+                return result
+            finally:
+                # Closing the file also releases the lock
+                if fd is not None:
+                    os.close(fd)
+    
+    def reserve(self, priority=INTERACTIVE, max_wait=None):
+        """Try to take a token, returning (granted, seconds to wait)
+        
+        When granted the caller may proceed after waiting; otherwise it should
+        wait and call reserve() again. An interactive reservation that would
+        wait longer than max_wait is refused without taking the token.
+        """
+        def take(state, now):
+            tokens, _, blocked_until, _ = state
+            blocked = max(0.0, blocked_until - now)
+            
+            if priority == INTERACTIVE:
+                wait = max(blocked, (1 - tokens) / self.rate)
+                if max_wait is not None and wait > max_wait:
+                    return False, wait
+                state[0] = tokens - 1
+                return True, wait
+            
+            if tokens >= 1 and not blocked:
+                state[0] = tokens - 1
+                return True, 0.0
+            return False, max(blocked, (1 - tokens) / self.rate, 0.01)
+        
+        return self._update(take)
+    
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Block until a token is available in the given lane, returning True
+        
+        Waits at most timeout seconds, cut to the current deadline; when the
+        bucket needs longer it returns False straight away instead of sleeping.
+        """
+        expires_at = self._expires_at(timeout)
+        while True:
+            max_wait = self._max_wait(expires_at)
+            granted, wait = self.reserve(priority, max_wait)
+            if max_wait is not None and wait > max_wait:
+                return False
+            if wait > 0:
+                time.sleep(wait)
+            if granted:
+                return True
+    
+    async def acquire_async(self, priority=INTERACTIVE, timeout=None):
+        """Async counterpart of acquire(); the locked state file is read off the event loop"""
+        expires_at = self._expires_at(timeout)
+        while True:
+            max_wait = self._max_wait(expires_at)
+            granted, wait = await asyncio.to_thread(self.reserve, priority, max_wait)
+            if max_wait is not None and wait > max_wait:
+                return False
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if granted:
+                return True
+    
+    def _expires_at(self, timeout):
+        limit = get_timeout(timeout)
+        return None if limit is None else time.monotonic() + limit
+    
+    def _max_wait(self, expires_at):
+        return None if expires_at is None else max(0.0, expires_at - time.monotonic())
+    
+    def backoff(self, retry_after=None):
+        """Block the bucket after a rate-limit response, returning the delay
+        
+        Without a Retry-After value the delay doubles with every consecutive
+        rate-limit error, from backoff_base up to backoff_max seconds.
+        """
+        def block(state, now):
+            state[3] += 1
+            delay = retry_after if retry_after else self.backoff_base * 2 ** (state[3] - 1)
+            delay = min(float(delay), self.backoff_max)
+            state[2] = max(state[2], now + delay)
+            return delay
+        
+        self.backing_off = True
+        delay = self._update(block)
+        logger.warning("Rate limited by %s, backing off for %.1fs", self.name, delay)
+        return delay
+    
+    def succeeded(self):
+        """Reset the backoff strikes after a successful call"""
+        if not self.backing_off:
+            return
+        
+        def reset(state, now):
+            state[3] = 0.0
+        
+        self._update(reset)
+        self.backing_off = False
+    
+    def get_stats(self):
+        """Current tokens and backoff state"""
+        def read(state, now):
+            return {
+                'tokens': round(state[0], 2),
+                'capacity': self.capacity,
+                'rate_per_second': self.rate,
+                'blocked_for': round(max(0.0, state[2] - now), 2),
+                'strikes': int(state[3])
+            }
+        
+        return self._update(read)
+
+
+class RateLimiter:
+    """Named token buckets for the search upstream and every fetched host
+    
+    At most max_buckets are kept in memory, least recently used dropped
+    first; a dropped bucket's state stays on disk and is picked up again
+    when the host comes back. State files untouched for state_ttl seconds
+    hold nothing a fresh bucket would not, and are deleted every
+    prune_interval seconds.
+    """
+    
+    def __init__(self, state_dir=None, max_buckets=None):
+        self.state_dir = state_dir if state_dir is not None else os.getenv('RATE_LIMIT_DIR', 'cache/ratelimit')
+        
+        self.search_rate = float(os.getenv('SEARCH_RATE_LIMIT', 10))
+        self.search_period = float(os.getenv('SEARCH_PERIOD', 1))
+        self.host_rate = float(os.getenv('PAGE_RATE_LIMIT', 2))
+        self.host_period = float(os.getenv('PAGE_PERIOD', 1))
+        self.backoff_base = float(os.getenv('RATE_LIMIT_BACKOFF_BASE', 2))
+        self.backoff_max = float(os.getenv('RATE_LIMIT_BACKOFF_MAX', 60))
+        
+        self.max_buckets = max_buckets or int(os.getenv('RATE_LIMIT_MAX_BUCKETS', 1024))
+        # Must outlast backoff_max and a full refill, or pruning would reset a bucket early
+        self.state_ttl = max(float(os.getenv('RATE_LIMIT_STATE_TTL', 86400)), self.backoff_max)
+        self.prune_interval = float(os.getenv('RATE_LIMIT_PRUNE_INTERVAL', 3600))
+        
+        self.buckets = OrderedDict()  # name -> TokenBucket, most recently used last
+        self.lock = threading.Lock()
+        self.pruned_at = 0.0
+    
+    def get_bucket(self, name, rate, period):
+        """Bucket for a name, created on first use"""
+        with self.lock:
+            bucket = self.buckets.get(name)
+            if bucket is not None:
+                self.buckets.move_to_end(name)
+                return bucket
+            
+            path = None
+            if self.state_dir:
+                path = os.path.join(self.state_dir, re.sub(r'[^\w.-]', '_', name) + '.bucket')
+            bucket = TokenBucket(name, rate, period, path=path,
+                                 backoff_base=self.backoff_base, backoff_max=self.backoff_max)
+            self.buckets[name] = bucket
+            while len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+            
+            now = time.time()
+            prune = bucket.path is not None and now - self.pruned_at >= self.prune_interval
+            if prune:
+                self.pruned_at = now
+        
+        if prune:
+            self.prune_state_files(now)
+        return bucket
+    
+    def prune_state_files(self, now=None):
+        """Delete bucket state files nobody has updated for state_ttl seconds"""
+        cutoff = (now or time.time()) - self.state_ttl
+        removed = 0
+        try:
+            entries = list(os.scandir(self.state_dir))
+        except OSError as e:
+            logger.debug("Could not list %s: %s", self.state_dir, e)
+            return 0
+        
+        for entry in entries:
+            if not entry.name.endswith('.bucket'):
+                continue
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                fd = os.open(entry.path, os.O_RDWR)
+                try:
+                    # Another process may have updated the file since the first stat
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                    if os.fstat(fd).st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.debug("Could not prune %s: %s", entry.path, e)
+        
+        if removed:
+            logger.debug("Pruned %d idle rate-limit state files", removed)
+        return removed
+    
+    def search(self):
+        """Bucket for the search API"""
+        return self.get_bucket('search', self.search_rate, self.search_period)
+    
+    def host(self, host):
+        """Bucket for one fetched host"""
+        return self.get_bucket(f"host-{host}", self.host_rate, self.host_period)
+    
+    def get_stats(self):
+        with self.lock:
+            buckets = dict(self.buckets)
+        return {name: bucket.get_stats() for name, bucket in buckets.items()}
+
+
+def is_rate_limit_error(error):
+    """Whether an exception from DDGS or requests means we are being rate limited"""
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None) == 429:
+        return True
+    message = str(error).lower()
+    return 'ratelimit' in message or '429' in message
+
+
+def get_retry_after(headers):
+    """Seconds from a Retry-After header, or None"""
+    value = (headers or {}).get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None  # HTTP-date form, fall back to exponential backoff
+
+
+_default_rate_limiter = None
+_default_rate_limiter_lock = threading.Lock()
+
+def get_default_rate_limiter():
+    """Process-wide rate limiter shared by the search engine and page fetcher"""
+    global _default_rate_limiter
+    with _default_rate_limiter_lock:
+        if _default_rate_limiter is None:
+            _default_rate_limiter = RateLimiter()
+        return _default_rate_limiter
@@ -0,0 +1,128 @@
+"""
+Per-region search statistics used to skip, demote and hedge region attempts
+"""
+import os
+import re
+import threading
+from collections import deque
+from query_builder import ROLE_WORDS, QUERY_STOPWORDS
+
+# Words kept when reducing a query to its shape; everything else is a company or name
+SHAPE_WORDS = ROLE_WORDS | QUERY_STOPWORDS | {
+    'leadership', 'team', 'executives', 'wikipedia', 'profile', 'official', 'website'
+}
+
+WORD_RE = re.compile(r'[\w-]+')
+
+
+def get_query_shape(query):
+    """'CEO of Exped Tribe GmbH' -> 'ceo of *', 'Sentima leadership team' -> '* leadership team'"""
+    shape = []
+    for word in WORD_RE.findall(query.lower()):
+        word = word if word.replace('-', '') in SHAPE_WORDS else '*'
+        if word != '*' or not shape or shape[-1] != '*':
+            shape.append(word)
+    return ' '.join(shape)
+
+
+class RegionStats:
+    """Unique-result yield per (query shape, region) and call latency per region
+    
+    A region's yield is the share of its results that no earlier attempt of
+    the same query returned, as an exponentially weighted average. Once a
+    region has min_samples observations for a query shape, it is skipped
+    below skip_yield (still probed every probe_every queries so it can
+    recover) and merged last below demote_yield.
+    """
+    
+    def __init__(self, min_samples=None, skip_yield=None, demote_yield=None, probe_every=None, window=200):
+        self.min_samples = min_samples or int(os.getenv('REGION_MIN_SAMPLES', 20))
+        self.skip_yield = skip_yield if skip_yield is not None else float(os.getenv('REGION_SKIP_YIELD', 0.05))
+        self.demote_yield = demote_yield if demote_yield is not None else float(
+            os.getenv('REGION_DEMOTE_YIELD', 0.15))
+        self.probe_every = probe_every or int(os.getenv('REGION_PROBE_EVERY', 10))
+        self.smoothing = 0.1
+        self.window = window
+        
+        self.yields = {}  # (shape, region) -> [samples, average yield, times skipped]
+        self.latencies = {}  # region -> recent call latencies in seconds
+        self.lock = threading.Lock()
+    
+    def plan(self, query, attempts, record=True):
+        """Attempts worth running for a query, in merge order
+        
+        The first attempt always runs. Low-yield regions are skipped or moved
+        to the end so their results only fill the slots that are left. With
+        record=False the plan is only previewed and skips are not counted
+        towards the next probe.
+        """
+        shape = get_query_shape(query)
+        kept, demoted = attempts[:1], []
+        
+        with self.lock:
+            for attempt in attempts[1:]:
+                stats = self.yields.get((shape, attempt['region']))
+                if stats is None or stats[0] < self.min_samples:
+                    kept.append(attempt)
+                elif stats[1] < self.skip_yield:
+                    skipped = stats[2] + 1
+                    if record:
+                        stats[2] = skipped
+                    if skipped % self.probe_every == 0:
+                        demoted.append(attempt)
+                elif stats[1] < self.demote_yield:
+                    demoted.append(attempt)
+                else:
+                    kept.append(attempt)
+        
+        return kept + demoted
+    
+    def record_yields(self, query, attempts, attempt_results):
+        """Record how many new URLs each attempt added, in merge order
+        
+        Attempts that did not complete (None: errors, an open circuit, the
+        deadline) say nothing about the region and are not recorded.
+        """
+        shape = get_query_shape(query)
+        seen_urls = set()
+        
+        with self.lock:
+            for attempt, results in zip(attempts, attempt_results):
+                if results is None:
+                    continue
+                urls = {result.get('link') for result in results if result.get('link')}
+                new_urls = urls - seen_urls
+                seen_urls |= urls
+                value = len(new_urls) / len(urls) if urls else 0.0
+                
+                stats = self.yields.get((shape, attempt['region']))
+                if stats is None:
+                    self.yields[(shape, attempt['region'])] = [1, value, 0]
+                else:
+                    stats[0] += 1
+                    stats[1] += self.smoothing * (value - stats[1])
+    
+    def record_latency(self, region, seconds):
+        with self.lock:
+            latencies = self.latencies.get(region)
+            if latencies is None:
+                latencies = self.latencies[region] = deque(maxlen=self.window)
+            latencies.append(seconds)
+    
+    def get_latency_percentile(self, region, percentile=0.95):
+        """Latency percentile of a region's recent calls, or None with too few samples"""
+        with self.lock:
+            latencies = sorted(self.latencies.get(region, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+    
+    def get_stats(self):
+        with self.lock:
+            yields = {
+                f"{shape} @ {region}": {'samples': samples, 'yield': round(value, 3), 'skipped': skipped}
+                for (shape, region), (samples, value, skipped) in sorted(self.yields.items())
+            }
+            regions = list(self.latencies)
+        latency = {region: self.get_latency_percentile(region) for region in regions}
+        return {'yields': yields, 'p95_seconds': latency}
@@ -0,0 +1,185 @@
+"""
+Compact local store of recorded search results and fetched pages for offline replay
+"""
+import os
+import json
+import zlib
+import sqlite3
+import threading
+import time
+import logging
+from page_fetcher import PageFetcher
+from rate_limiter import INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+class ReplayStore:
+    """SQLite file holding zlib-compressed search results and page bodies"""
+    
+    def __init__(self, path=None):
+        self.path = path or os.getenv('REPLAY_STORE_PATH', 'replay/replay.db')
+        self.lock = threading.Lock()
+        self.stats = {
+            'search_hits': 0,
+            'search_misses': 0,
+            'page_hits': 0,
+            'page_misses': 0,
+            'recorded_searches': 0,
+            'recorded_pages': 0
+        }
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS searches ('
+            'key TEXT PRIMARY KEY, results BLOB NOT NULL, recorded_at REAL NOT NULL)'
+        )
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'url TEXT PRIMARY KEY, status INTEGER NOT NULL, headers BLOB NOT NULL, '
+            'body BLOB NOT NULL, truncated INTEGER NOT NULL, recorded_at REAL NOT NULL)'
+        )
+        self.db.commit()
+    
+    def make_search_key(self, query, region, timelimit, max_results):
+        normalized_query = ' '.join(query.lower().split())
+        return json.dumps([normalized_query, region or '', timelimit or '', int(max_results or 0)])
+    
+    def pack(self, value):
+        return zlib.compress(json.dumps(value).encode('utf-8'))
+    
+    def unpack(self, blob):
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+    
+    def get_search(self, query, region, timelimit, max_results):
+        """Recorded results for a search, or None when it was never recorded"""
+        key = self.make_search_key(query, region, timelimit, max_results)
+        with self.lock:
+            row = self.db.execute('SELECT results FROM searches WHERE key = ?', (key,)).fetchone()
+            self.stats['search_hits' if row else 'search_misses'] += 1
+        return self.unpack(row[0]) if row else None
+    
+    def put_search(self, query, region, timelimit, max_results, results):
+        key = self.make_search_key(query, region, timelimit, max_results)
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO searches (key, results, recorded_at) VALUES (?, ?, ?)',
+                (key, self.pack(results), time.time())
+            )
+            self.db.commit()
+            self.stats['recorded_searches'] += 1
+    
+    def get_page(self, url):
+        """Recorded fetch for a URL: a page dict, False for a recorded failure, None if unknown"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT status, headers, body, truncated FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+            self.stats['page_hits' if row else 'page_misses'] += 1
+        
+        if row is None:
+            return None
+        if not row[0]:
+            return False
+        
+        return {
+            'url': url,
+            'status': row[0],
+            'headers': self.unpack(row[1]),
+            'body': zlib.decompress(row[2]).decode('utf-8'),
+            'truncated': bool(row[3])
+        }
+    
+    def put_page(self, url, page):
+        """Record a fetch result; None records a failed or skipped fetch"""
+        status = page['status'] if page else 0
+        headers = page['headers'] if page else {}
+        body = page['body'] if page else ''
+        truncated = page['truncated'] if page else False
+        
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO pages (url, status, headers, body, truncated, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, status, self.pack(headers), zlib.compress(body.encode('utf-8')), int(truncated), time.time())
+            )
+            self.db.commit()
+            self.stats['recorded_pages'] += 1
+    
+    def get_stats(self):
+        stats = dict(self.stats)
+        with self.lock:
+            stats['searches'] = self.db.execute('SELECT COUNT(*) FROM searches').fetchone()[0]
+            stats['pages'] = self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        stats['path'] = self.path
+        return stats
+
+
+class RecordingPageFetcher(PageFetcher):
+    """PageFetcher that records every fetch result into a ReplayStore"""
+    
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+    
+    def fetch(self, url, headers=None, timeout=None, extractor=None, priority=INTERACTIVE):
+        try:
+            page = super().fetch(url, headers=headers, timeout=timeout, extractor=extractor, priority=priority)
+        except Exception:
+            self.record(url, None)
+            raise
+        
+        self.record(url, page)
+        return page
+    
+    def record(self, url, page):
+        # Conditional 304s carry no body worth replaying
+        if url and (page is None or page['status'] != 304):
+            self.store.put_page(url, page)
+
+
+class ReplayPageFetcher(PageFetcher):
+    """PageFetcher that serves recorded pages and never touches the network"""
+    
+    offline = True
+    
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+    
+    def fetch(self, url, headers=None, timeout=None, extractor=None, priority=INTERACTIVE):
+        """Same contract as PageFetcher.fetch; unknown URLs behave like failed fetches"""
+        page = self.store.get_page(url)
+        if not page:
+            logger.debug("No recorded page for %s", url)
+            return None
+        
+        if extractor is not None:
+            extractor.feed(page['body'])
+            extractor.close()
+            page['text'] = extractor.get_text()
+        return page
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_default_replay_store():
+    """Process-wide replay store shared by the search backend and page fetcher"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ReplayStore()
+        return _default_store
+
+
+def create_page_fetcher(mode=None):
+    """PageFetcher matching SEARCH_BACKEND (recording, replaying or live)"""
+    mode = (mode or os.getenv('SEARCH_BACKEND', 'ddgs')).lower()
+    if mode == 'record':
+        return RecordingPageFetcher(get_default_replay_store())
+    if mode == 'replay':
+        return ReplayPageFetcher(get_default_replay_store())
+    return PageFetcher()
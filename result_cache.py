@@ -0,0 +1,257 @@
+"""
+Disk-backed cache of final lookup responses with stale-while-revalidate
+"""
+import os
+import json
+import sqlite3
+import threading
+import time
+import logging
+from query_builder import QueryBuilder
+from executive_registry import normalize_company
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """Hits only read; access times and hit counts are batched and written with the next store
+    
+    Database errors on the lookup path are logged and treated as misses or
+    skipped writes, so a locked or corrupt cache falls through to a live lookup.
+    """
+    
+    def __init__(self, path=None, ttl=None, stale_ttl=None, max_entries=None, query_builder=None,
+                 touch_batch=None):
+        self.path = path or os.getenv('RESULT_CACHE_PATH', 'cache/result_cache.db')
+        self.ttl = ttl if ttl is not None else int(os.getenv('RESULT_CACHE_TTL', 7 * 24 * 3600))
+        # How long past the TTL an entry is still served while it is refreshed
+        self.stale_ttl = stale_ttl if stale_ttl is not None else \
+            int(os.getenv('RESULT_CACHE_STALE_TTL', 30 * 24 * 3600))
+        self.max_entries = max_entries or int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 20000))
+        self.query_builder = query_builder or QueryBuilder()
+        self.touch_batch = touch_batch or int(os.getenv('RESULT_CACHE_TOUCH_BATCH', 500))
+        self.touched = {}  # key -> (accessed_at, hits) not yet written to disk
+        
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0
+        }
+        
+        self.db = None
+        if self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.db = sqlite3.connect(self.path, check_same_thread=False)
+                self.db.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    'company TEXT NOT NULL, designation TEXT NOT NULL, response TEXT NOT NULL, '
+                    'stored_at REAL NOT NULL, accessed_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, '
+                    'PRIMARY KEY (company, designation))'
+                )
+                self.db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)')
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Result cache disabled: %s", e)
+                self.db = None
+    
+    def make_key(self, company, designation):
+        """Normalized (company, designation) key
+        
+        Case, whitespace and legal suffixes are ignored and designation aliases
+        collapse to one entry, so 'Tesla Inc'/'Ceo' and 'tesla'/'CEO' match.
+        """
+        return normalize_company(company), self.query_builder.normalize_designation(designation)
+    
+    def get(self, company, designation):
+        """Return the cached entry for a lookup (fresh or stale) or None
+        
+        The entry dict has the response, its age in seconds and a 'fresh'
+        flag; stale entries should be served and refreshed in the background.
+        """
+        if self.db is None:
+            return None
+        
+        key = self.make_key(company, designation)
+        now = time.time()
+        with self.lock:
+            try:
+                row = self.db.execute(
+                    'SELECT response, stored_at FROM results WHERE company = ? AND designation = ?', key
+                ).fetchone()
+                response = json.loads(row[0]) if row is not None else None
+            except (sqlite3.Error, ValueError) as e:
+                logger.debug("Result cache read failed: %s", e)
+                row = None
+            
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            
+            age = now - row[1]
+            if age > self.ttl + self.stale_ttl:
+                # Expired rows are purged by the next eviction pass
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            
+            self._touch(key, now)
+            
+            fresh = age <= self.ttl
+            self.stats['hits' if fresh else 'stale_hits'] += 1
+            
+            return {
+                'response': response,
+                'age': round(age, 1),
+                'fresh': fresh
+            }
+    
+    def set(self, company, designation, response):
+        """Store a lookup response"""
+        if self.db is None:
+            return
+        
+        key = self.make_key(company, designation)
+        now = time.time()
+        with self.lock:
+            self.touched.pop(key, None)
+            try:
+                self._write_touched()
+                self.db.execute(
+                    'INSERT OR REPLACE INTO results (company, designation, response, stored_at, accessed_at, hits) '
+                    'VALUES (?, ?, ?, ?, ?, 0)', key + (json.dumps(response), now, now)
+                )
+                
+                self.writes += 1
+                if self.writes % 100 == 0:
+                    self._evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('write', e)
+    
+    def list_entries(self, company=None, limit=100):
+        """Cached entries, most recently stored first, optionally for one company"""
+        if self.db is None:
+            return []
+        
+        sql = 'SELECT company, designation, response, stored_at, accessed_at, hits FROM results'
+        params = ()
+        if company:
+            sql += ' WHERE company = ?'
+            params = (normalize_company(company),)
+        sql += ' ORDER BY stored_at DESC LIMIT ?'
+        
+        now = time.time()
+        with self.lock:
+            self._write_touched()
+            self.db.commit()
+            rows = self.db.execute(sql, params + (int(limit),)).fetchall()
+        
+        entries = []
+        for company_key, designation_key, response, stored_at, accessed_at, hits in rows:
+            entries.append({
+                'company': company_key,
+                'designation': designation_key,
+                'response': json.loads(response),
+                'age': round(now - stored_at, 1),
+                'fresh': now - stored_at <= self.ttl,
+                'last_accessed': round(now - accessed_at, 1),
+                'hits': hits
+            })
+        return entries
+    
+    def purge(self, company=None, designation=None):
+        """Delete one entry, every entry for a company, or everything; returns the count"""
+        if self.db is None:
+            return 0
+        
+        if company and designation:
+            sql, params = 'DELETE FROM results WHERE company = ? AND designation = ?', \
+                self.make_key(company, designation)
+        elif company:
+            sql, params = 'DELETE FROM results WHERE company = ?', (normalize_company(company),)
+        else:
+            sql, params = 'DELETE FROM results', ()
+        
+        with self.lock:
+            self._write_touched()
+            deleted = self.db.execute(sql, params).rowcount
+            self.db.commit()
+        return deleted
+    
+    def flush(self):
+        """Write pending access times and hit counts to disk"""
+        if self.db is None:
+            return
+        
+        with self.lock:
+            try:
+                self._write_touched()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('flush', e)
+    
+    def get_stats(self):
+        """Size and hit counters"""
+        stats = dict(self.stats, size=0)
+        
+        with self.lock:
+            if self.db is not None:
+                try:
+                    stats['size'] = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+                except sqlite3.Error as e:
+                    logger.debug("Result cache stats failed: %s", e)
+        
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+    
+    def _touch(self, key, now):
+        """Note a hit, writing the batch once it is full"""
+        hits = self.touched.get(key, (now, 0))[1]
+        self.touched[key] = (now, hits + 1)
+        if len(self.touched) >= self.touch_batch:
+            try:
+                self._write_touched()
+                self.db.commit()
+            except sqlite3.Error as e:
+                self._rollback('flush', e)
+    
+    def _rollback(self, action, e):
+        """Log a failed write and drop whatever part of it reached the open transaction"""
+        logger.debug("Result cache %s failed: %s", action, e)
+        try:
+            self.db.rollback()
+        except sqlite3.Error:
+            pass
+    
+    def _write_touched(self):
+        """Apply pending access times and hit counts in one statement (the caller commits)"""
+        if self.touched:
+            touched, self.touched = self.touched, {}
+            self.db.executemany(
+                'UPDATE results SET accessed_at = MAX(accessed_at, ?), hits = hits + ? '
+                'WHERE company = ? AND designation = ?',
+                [(accessed_at, hits) + key for key, (accessed_at, hits) in touched.items()]
+            )
+    
+    def _evict(self):
+        """Drop expired responses, then trim to max_entries by least recent use"""
+        expired = self.db.execute(
+            'DELETE FROM results WHERE stored_at < ?', (time.time() - self.ttl - self.stale_ttl,)
+        ).rowcount
+        self.stats['evictions'] += max(expired, 0)
+        
+        size = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self.db.execute(
+                'DELETE FROM results WHERE rowid IN ('
+                'SELECT rowid FROM results ORDER BY accessed_at LIMIT ?)', (overflow,)
+            )
+            self.stats['evictions'] += overflow
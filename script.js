@@ -32,8 +32,9 @@ const testData = [
     { company: "Kuoni Group", designation: "Senior Group Sales Manager for Israel, Sweden, Switzeralnd and Iceland" }
 ];
 
-// API endpoint (update with your backend URL)
+// API endpoints (update with your backend URL)
 const API_URL = 'http://localhost:5000/search';
+const STREAM_URL = 'http://localhost:5000/search/stream';
 
 // Populate test data dropdown
 function populateTestData() {
@@ -68,18 +69,17 @@ async function handleSearch(event) {
     }
     
     // Show loading state
-    const searchBtn = document.getElementById('searchBtn');
-    const btnText = searchBtn.querySelector('.btn-text');
-    const spinner = searchBtn.querySelector('.loading-spinner');
-    
-    btnText.style.display = 'none';
-    spinner.style.display = 'inline-block';
-    searchBtn.disabled = true;
+    setLoading(true);
     
     // Hide previous results/errors
     document.getElementById('resultsSection').style.display = 'none';
     document.getElementById('errorSection').style.display = 'none';
     
+    if (window.EventSource) {
+        streamSearch(company, designation);
+        return;
+    }
+    
     try {
         const response = await fetch(API_URL, {
             method: 'POST',
@@ -101,19 +101,70 @@ async function handleSearch(event) {
         console.error('Error:', error);
     } finally {
         // Hide loading state
-        btnText.style.display = 'inline';
-        spinner.style.display = 'none';
-        searchBtn.disabled = false;
+        setLoading(false);
     }
 }
 
-// Display results
-function displayResults(person, sourcesUsed) {
+// Stream pipeline progress, showing the provisional answer as soon as there is one
+function streamSearch(company, designation) {
+    const params = new URLSearchParams({ company, designation });
+    const source = new EventSource(`${STREAM_URL}?${params}`);
+    let finished = false;
+    
+    const finish = () => {
+        finished = true;
+        source.close();
+        setLoading(false);
+    };
+    
+    source.addEventListener('provisional', (e) => {
+        const data = JSON.parse(e.data);
+        displayResults(data.person, data.sources_used, true);
+    });
+    
+    source.addEventListener('done', (e) => {
+        const data = JSON.parse(e.data);
+        finish();
+        
+        if (data.success) {
+            displayResults(data.person, data.sources_used);
+        } else {
+            document.getElementById('resultsSection').style.display = 'none';
+            showError(data.error || 'No results found');
+        }
+    });
+    
+    // Server-side failures arrive as an 'error' event with a message;
+    // connection failures fire the same event without data
+    source.addEventListener('error', (e) => {
+        if (finished) {
+            return;
+        }
+        finish();
+        
+        const message = e.data ? JSON.parse(e.data).error : null;
+        showError(message || 'Error connecting to server. Make sure the backend is running.');
+        console.error('Error:', e);
+    });
+}
+
+// Toggle the search button's loading state
+function setLoading(loading) {
+    const searchBtn = document.getElementById('searchBtn');
+    searchBtn.querySelector('.btn-text').style.display = loading ? 'none' : 'inline';
+    searchBtn.querySelector('.loading-spinner').style.display = loading ? 'inline-block' : 'none';
+    searchBtn.disabled = loading;
+}
+
+// Display results; provisional answers are still being refined
+function displayResults(person, sourcesUsed, provisional = false) {
     const resultsDiv = document.getElementById('results');
     
     resultsDiv.innerHTML = `
         <div class="person-info">
-            <h3>🎯 Person Found</h3>
+            <h3>🎯 ${provisional ? 'Best Match So Far' : 'Person Found'}</h3>
+            
+            ${provisional ? '<div class="provisional-note">Still searching, this answer may change...</div>' : ''}
             
             <div class="info-row">
                 <span class="info-label">First Name:</span>
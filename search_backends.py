@@ -0,0 +1,211 @@
+"""
+Search backends: DuckDuckGo, Brave, and record/replay for offline runs
+"""
+import os
+import re
+import asyncio
+import threading
+import logging
+import requests
+from duckduckgo_search import DDGS, AsyncDDGS
+from replay_store import get_default_replay_store
+
+logger = logging.getLogger(__name__)
+
+class SearchBackend:
+    """Interface every search backend implements
+    
+    text() runs one search and returns results in the pipeline's format:
+    a list of {'title', 'link', 'snippet'} dicts. It may raise; rate-limit
+    errors are recognised by rate_limiter.is_rate_limit_error().
+    """
+    
+    name = None
+    rate_limited = True  # Whether calls go through the shared search token bucket
+    
+    def text(self, query, region, timelimit, max_results):
+        raise NotImplementedError
+    
+    def open_async(self):
+        """Session for the asyncio pipeline; by default runs text() in a thread"""
+        return AsyncBackendSession(self)
+    
+    def get_stats(self):
+        return {'backend': self.name}
+
+
+class AsyncBackendSession:
+    """Async wrapper around a backend's blocking text()"""
+    
+    def __init__(self, backend):
+        self.backend = backend
+    
+    async def text(self, query, region, timelimit, max_results):
+        return await asyncio.to_thread(self.backend.text, query, region, timelimit, max_results)
+    
+    async def close(self):
+        pass
+
+
+class DDGSBackend(SearchBackend):
+    name = 'ddgs'
+    
+    def __init__(self):
+        # DDGS keeps a session internally, so give every worker thread its own
+        self._local = threading.local()
+    
+    def get_ddgs(self):
+        """Get the DDGS client for the current thread"""
+        ddgs = getattr(self._local, 'ddgs', None)
+        if ddgs is None:
+            ddgs = DDGS()
+            self._local.ddgs = ddgs
+        return ddgs
+    
+    def text(self, query, region, timelimit, max_results):
+        search_results = list(self.get_ddgs().text(
+            query,
+            region=region,
+            safesearch='off',
+            timelimit=timelimit,
+            max_results=max_results
+        ))
+        return self.format_results(search_results)
+    
+    def format_results(self, search_results):
+        """Convert raw DDGS results to the pipeline's result format"""
+        return [{
+            'title': result.get('title', ''),
+            'link': result.get('href', ''),
+            'snippet': result.get('body', '')
+        } for result in search_results]
+    
+    def open_async(self):
+        return DDGSAsyncSession(self)
+
+
+class DDGSAsyncSession:
+    """Native AsyncDDGS session for the asyncio pipeline"""
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self.ddgs = AsyncDDGS()
+    
+    async def text(self, query, region, timelimit, max_results):
+        search_results = [result async for result in self.ddgs.text(
+            query,
+            region=region,
+            safesearch='off',
+            timelimit=timelimit,
+            max_results=max_results
+        )]
+        return self.backend.format_results(search_results)
+    
+    async def close(self):
+        # AsyncDDGS.__aexit__ hands back the session's close() coroutine
+        closing = await self.ddgs.__aexit__(None, None, None)
+        if asyncio.iscoroutine(closing):
+            await closing
+
+
+class BraveBackend(SearchBackend):
+    """Brave Search API (needs BRAVE_API_KEY)"""
+    
+    name = 'brave'
+    url = 'https://api.search.brave.com/res/v1/web/search'
+    
+    # DDGS regions and time limits mapped to Brave's country and freshness
+    countries = {'us-en': 'us', 'uk-en': 'gb', 'de-de': 'de', 'fr-fr': 'fr', 'in-en': 'in'}
+    freshness = {'d': 'pd', 'w': 'pw', 'm': 'pm', 'y': 'py'}
+    
+    def __init__(self, api_key=None, timeout=10):
+        self.api_key = api_key or os.getenv('BRAVE_API_KEY')
+        if not self.api_key:
+            raise ValueError('BRAVE_API_KEY is required for the brave search backend')
+        self.timeout = timeout
+        
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'X-Subscription-Token': self.api_key
+        })
+    
+    def text(self, query, region, timelimit, max_results):
+        params = {'q': query, 'count': min(int(max_results or 10), 20)}
+        if region in self.countries:
+            params['country'] = self.countries[region]
+        if timelimit in self.freshness:
+            params['freshness'] = self.freshness[timelimit]
+        
+        response = self.session.get(self.url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        
+        results = response.json().get('web', {}).get('results', [])
+        return [{
+            'title': self.strip_tags(result.get('title', '')),
+            'link': result.get('url', ''),
+            'snippet': self.strip_tags(result.get('description', ''))
+        } for result in results]
+    
+    def strip_tags(self, text):
+        """Brave highlights matches with <strong> tags"""
+        return re.sub(r'<[^>]+>', '', text or '')
+
+
+class RecordingBackend(SearchBackend):
+    """Wraps a live backend and records every response into a ReplayStore"""
+    
+    def __init__(self, backend, store=None):
+        self.backend = backend
+        self.store = store or get_default_replay_store()
+        self.name = f"record:{backend.name}"
+    
+    def text(self, query, region, timelimit, max_results):
+        results = self.backend.text(query, region, timelimit, max_results)
+        self.store.put_search(query, region, timelimit, max_results, results)
+        return results
+    
+    def get_stats(self):
+        return dict(self.store.get_stats(), backend=self.name)
+
+
+class ReplayBackend(SearchBackend):
+    """Serves recorded responses; searches that were never recorded return []"""
+    
+    name = 'replay'
+    rate_limited = False
+    
+    def __init__(self, store=None):
+        self.store = store or get_default_replay_store()
+    
+    def text(self, query, region, timelimit, max_results):
+        results = self.store.get_search(query, region, timelimit, max_results)
+        if results is None:
+            logger.debug("No recorded results for '%s' in region %s", query, region)
+            return []
+        return results
+    
+    def get_stats(self):
+        return dict(self.store.get_stats(), backend=self.name)
+
+
+def create_search_backend(name=None):
+    """Backend selected by SEARCH_BACKEND: ddgs (default), brave, record or replay
+    
+    'record' wraps the backend named by SEARCH_RECORD_BACKEND (default ddgs).
+    """
+    name = (name or os.getenv('SEARCH_BACKEND', 'ddgs')).lower()
+    
+    if name == 'ddgs':
+        return DDGSBackend()
+    if name == 'brave':
+        return BraveBackend()
+    if name == 'record':
+        inner = os.getenv('SEARCH_RECORD_BACKEND', 'ddgs').lower()
+        if inner in ('record', 'replay'):
+            raise ValueError(f"Cannot record from the {inner} backend")
+        return RecordingBackend(create_search_backend(inner))
+    if name == 'replay':
+        return ReplayBackend()
+    
+    raise ValueError(f"Unknown search backend: {name}")
@@ -0,0 +1,199 @@
+"""
+Two-tier TTL cache for search results (in-process LRU in front of SQLite)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class SearchCache:
+    """Hits only read; access times for LRU eviction are batched and written with the next store"""
+    
+    def __init__(self, path=None, ttl=None, max_entries=None, memory_entries=None, touch_batch=None):
+        self.path = path or os.getenv('SEARCH_CACHE_PATH', 'cache/search_cache.db')
+        self.ttl = ttl if ttl is not None else int(os.getenv('SEARCH_CACHE_TTL', 7 * 24 * 3600))
+        self.max_entries = max_entries or int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 50000))
+        self.memory_entries = memory_entries or int(os.getenv('SEARCH_CACHE_MEMORY_ENTRIES', 1000))
+        self.touch_batch = touch_batch or int(os.getenv('SEARCH_CACHE_TOUCH_BATCH', 500))
+        
+        self.memory = OrderedDict()  # key -> (stored_at, results)
+        self.touched = {}  # key -> accessed_at not yet written to disk
+        self.lock = threading.Lock()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'writes': 0
+        }
+        
+        self.db = None
+        if self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self.db = sqlite3.connect(self.path, check_same_thread=False)
+                self.db.execute(
+                    'CREATE TABLE IF NOT EXISTS search_cache ('
+                    'key TEXT PRIMARY KEY, results TEXT NOT NULL, '
+                    'stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+                )
+                self.db.execute(
+                    'CREATE INDEX IF NOT EXISTS search_cache_accessed '
+                    'ON search_cache (accessed_at)'
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Search cache disk tier disabled: %s", e)
+                self.db = None
+    
+    def make_key(self, query, region, timelimit, max_results):
+        """Build a normalized cache key"""
+        normalized_query = ' '.join(query.lower().split())
+        return json.dumps([normalized_query, region or '', timelimit or '', int(max_results or 0)])
+    
+    def get(self, query, region, timelimit, max_results):
+        """Return cached results or None"""
+        key = self.make_key(query, region, timelimit, max_results)
+        now = time.time()
+        
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                stored_at, results = entry
+                if now - stored_at <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self._touch(key, now)
+                    self.stats['memory_hits'] += 1
+                    return [dict(result) for result in results]
+                del self.memory[key]
+                self.stats['expired'] += 1
+            
+            if self.db is not None:
+                try:
+                    row = self.db.execute(
+                        'SELECT results, stored_at FROM search_cache WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row is not None:
+                        if now - row[1] <= self.ttl:
+                            results = json.loads(row[0])
+                            self._remember(key, row[1], results)
+                            self._touch(key, now)
+                            self.stats['disk_hits'] += 1
+                            return [dict(result) for result in results]
+                        # Expired rows are purged by the next eviction pass
+                        self.stats['expired'] += 1
+                except sqlite3.Error as e:
+                    logger.debug("Search cache read failed: %s", e)
+            
+            self.stats['misses'] += 1
+            return None
+    
+    def set(self, query, region, timelimit, max_results, results):
+        """Store results in both tiers"""
+        key = self.make_key(query, region, timelimit, max_results)
+        now = time.time()
+        
+        with self.lock:
+            self._remember(key, now, [dict(result) for result in results])
+            self.stats['writes'] += 1
+            
+            if self.db is not None:
+                try:
+                    self.touched.pop(key, None)
+                    self._write_touched()
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO search_cache (key, results, stored_at, accessed_at) '
+                        'VALUES (?, ?, ?, ?)', (key, json.dumps(results), now, now)
+                    )
+                    if self.stats['writes'] % 100 == 0:
+                        self._evict_disk()
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    logger.debug("Search cache write failed: %s", e)
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.memory.clear()
+            self.touched.clear()
+            if self.db is not None:
+                self.db.execute('DELETE FROM search_cache')
+                self.db.commit()
+    
+    def flush(self):
+        """Write pending access times to disk"""
+        with self.lock:
+            if self.db is None or not self.touched:
+                return
+            try:
+                self._write_touched()
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.debug("Search cache flush failed: %s", e)
+    
+    def get_stats(self):
+        """Hit/miss counters and current sizes"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['memory_size'] = len(self.memory)
+            stats['disk_size'] = self._disk_size()
+        
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+    
+    def _remember(self, key, stored_at, results):
+        """Put an entry in the memory tier, evicting the least recently used"""
+        self.memory[key] = (stored_at, results)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+    
+    def _touch(self, key, now):
+        """Note an access, writing the batch once it is full"""
+        if self.db is None:
+            return
+        self.touched[key] = now
+        if len(self.touched) >= self.touch_batch:
+            try:
+                self._write_touched()
+                self.db.commit()
+            except sqlite3.Error as e:
+                logger.debug("Search cache flush failed: %s", e)
+    
+    def _write_touched(self):
+        """Apply pending access times in one statement (the caller commits)"""
+        if self.touched:
+            touched, self.touched = self.touched, {}
+            self.db.executemany(
+                'UPDATE search_cache SET accessed_at = MAX(accessed_at, ?) WHERE key = ?',
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+    
+    def _disk_size(self):
+        if self.db is None:
+            return 0
+        return self.db.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+    
+    def _evict_disk(self):
+        """Drop expired rows, then trim the disk tier to max_entries by least recent use"""
+        expired = self.db.execute(
+            'DELETE FROM search_cache WHERE stored_at < ?', (time.time() - self.ttl,)
+        ).rowcount
+        self.stats['evictions'] += max(expired, 0)
+        
+        overflow = self._disk_size() - self.max_entries
+        if overflow > 0:
+            self.db.execute(
+                'DELETE FROM search_cache WHERE key IN ('
+                'SELECT key FROM search_cache ORDER BY accessed_at LIMIT ?)', (overflow,)
+            )
+            self.stats['evictions'] += overflow
@@ -1,112 +1,354 @@
 """
 Enhanced search engine with better coverage
 """
-import requests
+import os
 import time
 import logging
-from duckduckgo_search import DDGS
+from functools import partial
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+from search_cache import SearchCache
+from search_backends import create_search_backend
+from rate_limiter import INTERACTIVE, BATCH, get_default_rate_limiter, is_rate_limit_error
+from singleflight import SingleFlight
+from region_stats import RegionStats
+from circuit_breaker import get_breaker
+from deadline import get_timeout, out_of_time, mark_degraded
+from metrics import SEARCH_CALLS, SEARCH_HEDGES, stage, timed
+from url_classifier import get_default_classifier
 
 logger = logging.getLogger(__name__)
 
 class SearchEngine:
-    def __init__(self):
+    def __init__(self, max_workers=None, cache=None, rate_limiter=None, backend=None, classifier=None):
         self.results_per_query = 10  # Increased for better coverage
-        self.ddgs = DDGS()
+        
+        # URL classifications are shared with the Validator
+        self.classifier = classifier or get_default_classifier()
+        self.person_terms = ['ceo', 'founder', 'director', 'president', 'executive', 'manager']
+        
+        self.backend = backend or create_search_backend()
+        self.cache = cache if cache is not None else SearchCache()
+        
+        # Token bucket shared with other threads and worker processes
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.rate_limit_retries = int(os.getenv('SEARCH_RATE_LIMIT_RETRIES', 2))
+        
+        # Identical attempts already in flight are joined rather than repeated
+        self.flights = SingleFlight('search')
+        
+        # Bounded worker pool for fanning out query x region attempts.
+        # A value of 1 keeps the original serial behaviour.
+        if max_workers is None:
+            max_workers = int(os.getenv('SEARCH_MAX_WORKERS', 8))
+        self.max_workers = max(1, max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                           thread_name_prefix='search')
+        
+        # Batch attempts run on their own smaller pool so they never queue ahead of interactive ones
+        self.batch_workers = max(1, int(os.getenv('SEARCH_BATCH_WORKERS', self.max_workers // 2)))
+        self.batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers,
+                                                 thread_name_prefix='search-batch')
+        
+        # Regions that rarely add new results for a query shape are skipped or merged last
+        self.region_stats = RegionStats()
+        self.adaptive_regions = os.getenv('ADAPTIVE_REGIONS', 'true').lower() in ('1', 'true', 'yes')
+        
+        # A call still running after its region's p95 latency is duplicated once
+        self.hedging = os.getenv('SEARCH_HEDGING', 'true').lower() in ('1', 'true', 'yes')
+        self.min_hedge_delay = float(os.getenv('SEARCH_HEDGE_MIN_DELAY', 0.05))
+        self.hedge_executor = ThreadPoolExecutor(max_workers=self.max_workers * 2,
+                                                 thread_name_prefix='search-hedge')
+        
+        # Stops calling the backend while it keeps failing
+        self.breaker = get_breaker(self.backend.name)
     
-    def search(self, query, max_results=10):
-        """Search using DuckDuckGo with multiple attempts"""
-        logger.info(f"Searching for: {query}")
+    def get_search_attempts(self, max_results, query=None, record=True):
+        """Search configurations tried for a query, in merge order
         
-        try:
-            # Try multiple search configurations
-            search_attempts = [
-                {'region': 'wt-wt', 'timelimit': None, 'max': max_results},  # Worldwide
-                {'region': 'us-en', 'timelimit': 'y', 'max': max_results},   # US, past year
-                {'region': 'uk-en', 'timelimit': None, 'max': max_results},  # UK
-            ]
-            
-            all_results = []
-            
-            for attempt in search_attempts:
-                try:
-                    logger.info(f"Search attempt with region: {attempt['region']}")
-                    
-                    search_results = list(self.ddgs.text(
-                        query,
-                        region=attempt['region'],
-                        safesearch='off',
-                        timelimit=attempt['timelimit'],
-                        max_results=attempt['max']
-                    ))
-                    
-                    for result in search_results:
-                        all_results.append({
-                            'title': result.get('title', ''),
-                            'link': result.get('href', ''),
-                            'snippet': result.get('body', '')
-                        })
-                    
-                    time.sleep(0.5)  # Be nice to the API
-                    
-                except Exception as e:
-                    logger.debug(f"Search attempt failed: {e}")
-                    continue
+        Without a query (or with ADAPTIVE_REGIONS=false) every region is
+        tried in its default order; with one, region_stats drops or demotes
+        regions that have rarely added new results for queries of its shape.
+        record=False previews the plan without advancing region probes.
+        """
+        attempts = [
+            {'region': 'wt-wt', 'timelimit': None, 'max': max_results},  # Worldwide
+            {'region': 'us-en', 'timelimit': 'y', 'max': max_results},   # US, past year
+            {'region': 'uk-en', 'timelimit': None, 'max': max_results},  # UK
+        ]
+        if query is None or not self.adaptive_regions:
+            return attempts
+        return self.region_stats.plan(query, attempts, record)
+    
+    def count_attempts(self, query):
+        """Upstream calls a query will cost, the unit of the query planner's budget"""
+        return len(self.get_search_attempts(1, query, record=False))
+    
+    def run_attempt(self, query, attempt, cancel_event=None, priority=INTERACTIVE):
+        """Run a single search attempt, returning None if it did not complete
+        
+        None (failure, open circuit, cancellation or no time left) is kept
+        apart from an empty result list so that region yields are only
+        learned from attempts that actually ran. Concurrent identical
+        attempts share one upstream call. Every upstream call takes a token
+        from the shared search bucket first.
+        """
+        cached = self.cache.get(query, attempt['region'], attempt['timelimit'], attempt['max'])
+        if cached is not None:
+            logger.debug("Cache hit for '%s' in region %s", query, attempt['region'])
+            return cached
+        
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        
+        if out_of_time('search_skipped'):
+            return None
+        
+        key = (query, attempt['region'], attempt['timelimit'], attempt['max'])
+        results = self.flights.do(key, self._fetch_attempt, query, attempt, priority)
+        if results is None:
+            return None
+        
+        # Callers annotate result dicts, so every caller gets its own copies
+        return [dict(result) for result in results]
+    
+    def _fetch_attempt(self, query, attempt, priority):
+        """Call the backend for one attempt, retrying after rate-limit errors; None if it fails"""
+        # The previous leader may have filled the cache since run_attempt checked it
+        cached = self.cache.get(query, attempt['region'], attempt['timelimit'], attempt['max'])
+        if cached is not None:
+            return cached
+        
+        if not self.breaker.allow():
+            SEARCH_CALLS.inc(backend=self.backend.name, outcome='circuit_open')
+            logger.debug("Circuit for %s is open, skipping region %s", self.backend.name, attempt['region'])
+            return None
+        
+        bucket = self.rate_limiter.search()
+        
+        for retry in range(self.rate_limit_retries + 1):
+            if self.backend.rate_limited and not bucket.acquire(priority):
+                # The next token is further off than the deadline; not the backend's fault
+                mark_degraded('search_skipped')
+                return None
             
-            # Remove duplicates
-            unique_results = []
-            seen_urls = set()
+            try:
+                logger.info("Search attempt with region: %s", attempt['region'])
+                
+                with stage('search_call'):
+                    results = self.call_backend(query, attempt, bucket)
+                bucket.succeeded()
+                self.breaker.record_success()
+                SEARCH_CALLS.inc(backend=self.backend.name, outcome='ok')
+                
+                self.cache.set(query, attempt['region'], attempt['timelimit'], attempt['max'], results)
+                return results
             
-            for result in all_results:
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    self.breaker.record_failure()
+                    SEARCH_CALLS.inc(backend=self.backend.name, outcome='error')
+                    logger.debug("Search attempt failed: %s", e)
+                    return None
+                
+                SEARCH_CALLS.inc(backend=self.backend.name, outcome='rate_limited')
+                bucket.backoff()
+        
+        # Rate limiting that outlasts every retry counts as one failure of the backend
+        self.breaker.record_failure()
+        logger.warning("Giving up on '%s' in region %s after repeated rate limiting", query, attempt['region'])
+        return None
+    
+    def call_backend(self, query, attempt, bucket):
+        """Call the backend, sending a hedged duplicate if the call outlasts the region's p95
+        
+        The hedge needs a spare rate-limit token (it never waits for one) and
+        whichever call succeeds first wins; the other one is left to finish
+        in the background. Regions without enough latency samples are never hedged.
+        """
+        region = attempt['region']
+        delay = self.region_stats.get_latency_percentile(region) if self.hedging else None
+        if delay is None:
+            return self.timed_backend_call(query, attempt)
+        
+        primary = self.hedge_executor.submit(self.timed_backend_call, query, attempt)
+        try:
+            return primary.result(timeout=max(delay, self.min_hedge_delay))
+        except FutureTimeoutError:
+            pass
+        
+        granted, _ = bucket.reserve(BATCH)
+        if not granted:
+            return primary.result()
+        
+        logger.debug("Hedging slow search attempt in region %s after %.3fs", region, delay)
+        hedge = self.hedge_executor.submit(self.timed_backend_call, query, attempt)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    SEARCH_HEDGES.inc(winner='primary' if future is primary else 'hedge')
+                    return future.result()
+    
+    def timed_backend_call(self, query, attempt):
+        """One backend call, recording its latency for the region's hedge delay"""
+        started = time.perf_counter()
+        results = self.backend.text(query, attempt['region'], attempt['timelimit'], attempt['max'])
+        self.region_stats.record_latency(attempt['region'], time.perf_counter() - started)
+        return results
+    
+    def merge_attempts(self, query, attempts, attempt_results, max_results):
+        """Record each completed region's yield for the query, then merge its attempt results
+        
+        Attempts that did not complete are None in attempt_results.
+        """
+        self.region_stats.record_yields(query, attempts, attempt_results)
+        return self.merge_results([results or [] for results in attempt_results], max_results)
+    
+    def merge_results(self, attempt_results, max_results):
+        """Merge attempt results in attempt order, dropping duplicate URLs"""
+        unique_results = []
+        seen_urls = set()
+        
+        for results in attempt_results:
+            for result in results:
                 url = result.get('link', '')
                 if url and url not in seen_urls:
                     seen_urls.add(url)
                     unique_results.append(result)
+        
+        return unique_results[:max_results]
+    
+    def search(self, query, max_results=10, cancel_event=None, priority=INTERACTIVE):
+        """Search using the configured backend with multiple attempts"""
+        return self.search_many([query], max_results=max_results, cancel_event=cancel_event,
+                                priority=priority)[query]
+    
+    @timed('search')
+    def search_many(self, queries, max_results=10, cancel_event=None, priority=INTERACTIVE, on_results=None):
+        """Search several queries at once, returning {query: results}
+        
+        All query x region attempts are fanned out over the worker pool, then
+        merged per query in the original attempt order so the output is the
+        same as running them one after another. Attempts that have not hit
+        the network yet are skipped once cancel_event is set. Batch work passes
+        priority=BATCH so that interactive searches get rate-limit tokens first
+        and its attempts run on the separate batch pool.
+        on_results, if given, is called with (results, query) for each attempt
+        as soon as it completes (from a worker thread), e.g. to start page prefetches.
+        """
+        queries = list(dict.fromkeys(queries))
+        
+        if self.max_workers == 1:
+            return {query: self._search_serial(query, max_results, cancel_event, priority, on_results)
+                    for query in queries}
+        
+        executor = self.batch_executor if priority == BATCH else self.executor
+        futures = {}
+        attempts_by_query = {}
+        for query in queries:
+            logger.info("Searching for: %s", query)
+            attempts = attempts_by_query[query] = self.get_search_attempts(max_results, query)
+            for index, attempt in enumerate(attempts):
+                # Run in the caller's context so its per-request stage timings see the calls
+                context = copy_context()
+                future = executor.submit(context.run, self.run_attempt, query, attempt,
+                                         cancel_event, priority)
+                if on_results is not None:
+                    future.add_done_callback(partial(self.report_attempt, on_results, query, context))
+                futures[(query, index)] = future
+        
+        results_by_query = {}
+        for query in queries:
+            attempts = attempts_by_query[query]
+            try:
+                attempt_results = [self.wait_attempt(futures[(query, index)]) for index in range(len(attempts))]
+                results_by_query[query] = self.merge_attempts(query, attempts, attempt_results, max_results)
+                logger.info("Found %s unique results", len(results_by_query[query]))
+            except Exception as e:
+                logger.error("Search failed for query '%s': %s", query, e)
+                results_by_query[query] = []
+        
+        return results_by_query
+    
+    def report_attempt(self, on_results, query, context, future):
+        """Done-callback handing a finished attempt's results to on_results, in the attempt's context"""
+        if future.cancelled() or future.exception() is not None or future.result() is None:
+            return
+        try:
+            context.run(on_results, future.result(), query)
+        except Exception as e:
+            logger.warning("Results callback failed: %s", e)
+    
+    def wait_attempt(self, future):
+        """Result of an attempt future, or None if the lookup's deadline passes first"""
+        try:
+            return future.result(timeout=get_timeout())
+        except FutureTimeoutError:
+            # The call keeps running and still fills the cache for later lookups
+            mark_degraded('search_timeout')
+            future.cancel()
+            return None
+    
+    def _search_serial(self, query, max_results, cancel_event=None, priority=INTERACTIVE, on_results=None):
+        """Run the attempts for one query one after another, reporting each to on_results"""
+        logger.info("Searching for: %s", query)
+        
+        try:
+            attempts = self.get_search_attempts(max_results, query)
+            attempt_results = []
             
-            logger.info(f"Found {len(unique_results)} unique results")
-            return unique_results[:max_results]
+            for attempt in attempts:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                results = self.run_attempt(query, attempt, cancel_event, priority)
+                attempt_results.append(results)
+                if on_results is not None and results is not None:
+                    try:
+                        on_results(results, query)
+                    except Exception as e:
+                        logger.warning("Results callback failed: %s", e)
             
+            unique_results = self.merge_attempts(query, attempts, attempt_results, max_results)
+            logger.info("Found %s unique results", len(unique_results))
+            return unique_results
+        
         except Exception as e:
-            logger.error(f"Search failed for query '{query}': {e}")
+            logger.error("Search failed for query '%s': %s", query, e)
             return []
     
-    def filter_credible_sources(self, results):
-        """Filter for credible sources with lower threshold"""
+    @timed('credibility_filter')
+    def filter_credible_sources(self, results, company=''):
+        """Filter for credible sources with lower threshold
+        
+        Links are classified by the shared URLClassifier, which memoizes each
+        URL, so the Validator scoring the same source later does not parse it again.
+        """
         if not results:
             return []
         
-        credible_keywords = [
-            'linkedin.com', 'crunchbase.com', 'wikipedia.org',
-            'bloomberg.com', 'forbes.com', 'reuters.com',
-            'businessinsider.com', 'techcrunch.com',
-            '/about', '/team', '/leadership', '/executives',
-            'ceo', 'founder', 'director', 'president'
-        ]
-        
+        company_lower = company.lower()
         filtered = []
         
         for result in results:
-            url = result.get('link', '').lower()
+            info = self.classifier.classify(result.get('link', ''))
             title = result.get('title', '').lower()
             snippet = result.get('snippet', '').lower()
             
             score = 0
             
-            # Check for credible domains
-            for keyword in credible_keywords:
-                if keyword in url:
-                    score += 2
-                    break
+            # Check for credible domains, people pages and role words in the URL
+            if info.credible or info.people_path or info.role_hint:
+                score += 2
             
             # Check for person-related terms
-            person_terms = ['ceo', 'founder', 'director', 'president', 'executive', 'manager']
-            for term in person_terms:
-                if term in title or term in snippet:
-                    score += 1
-                    break
+            if any(term in title or term in snippet for term in self.person_terms):
+                score += 1
             
-            # Check for company mention in title/snippet
-            company_name = self.extract_company_from_query(result)  # We'll need to pass company
-            if company_name and company_name.lower() in title or company_name.lower() in snippet:
+            # Check for company mention in title/snippet or the URL itself
+            if company_lower and (company_lower in title or company_lower in snippet
+                                  or self.classifier.mentions_company(info, company)):
                 score += 1
             
             # Include if score is decent
@@ -121,9 +363,4 @@ class SearchEngine:
         if not filtered and results:
             return results[:3]
         
-        return filtered[:5]
-    
-    def extract_company_from_query(self, result):
-        """Helper to extract potential company name from result"""
-        # This will be set by the calling function
-        return None
\ No newline at end of file
+        return filtered[:5]
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Single-flight coalescing of concurrent identical calls
+"""
+import threading
+import logging
+from concurrent.futures import Future
+from deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Run at most one call per key at a time, sharing its outcome
+    
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running (followers) wait and get the same result, or
+    the same exception. The key is released as soon as the call finishes, so
+    later callers run it again (caches sit behind the function for that).
+    Shared results must be treated as read-only.
+    
+    A result the leader's deadline cut short is not passed to followers with
+    more time left (or no deadline): they run the call again. Other followers
+    share it and have their own deadline degraded too, so they never cache
+    it as a complete answer.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.stats = {'leaders': 0, 'followers': 0}
+    
+    def do(self, key, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) once for every concurrent caller of key"""
+        deadline = current_deadline()
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                future.cut = None  # (expires_at, reasons) once the leader's deadline cuts the call short
+                self.calls[key] = future
+                self.stats['leaders'] += 1
+            else:
+                self.stats['followers'] += 1
+        
+        if not leader:
+            logger.debug("Joining in-flight %s call for %s", self.name, key)
+            result = future.result()
+            if future.cut is None:
+                return result
+            
+            expires_at, reasons = future.cut
+            if deadline is None or deadline.expires_at > expires_at:
+                logger.debug("Re-running %s call for %s cut short by a shorter deadline", self.name, key)
+                return self.do(key, fn, *args, **kwargs)
+            for reason in reasons:
+                deadline.degrade(reason)
+            return result
+        
+        cuts = deadline.cuts if deadline is not None else 0
+        try:
+            result = fn(*args, **kwargs)
+            if deadline is not None and deadline.cuts > cuts:
+                future.cut = (deadline.expires_at, list(deadline.reasons))
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                del self.calls[key]
+        
+        return future.result()
+    
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, in_flight=len(self.calls))
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+
+# The project modules live at the repository root, the stub search server under benchmarks/
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+
+
+@pytest.fixture
+def stub_pipeline(tmp_path, monkeypatch):
+    """Factory for a LookupPipeline answering from the benchmark stub server, with scratch caches"""
+    import bench_pipeline
+    import rate_limiter
+    from stub_server import StubServer
+    
+    monkeypatch.setenv('SEARCH_CACHE_PATH', str(tmp_path / 'search_cache.db'))
+    monkeypatch.setenv('PAGE_CACHE_PATH', str(tmp_path / 'page_cache.db'))
+    monkeypatch.setenv('RESULT_CACHE_PATH', str(tmp_path / 'result_cache.db'))
+    monkeypatch.setenv('RATE_LIMIT_DIR', str(tmp_path / 'ratelimit'))
+    monkeypatch.setenv('SEARCH_RATE_LIMIT', '100000')
+    monkeypatch.setenv('PAGE_RATE_LIMIT', '100000')
+    # A limiter left over from an earlier test would keep that test's rates and state
+    monkeypatch.setattr(rate_limiter, '_default_rate_limiter', None)
+    
+    servers = []
+    
+    def build(companies, **behaviour):
+        server = StubServer(companies, **behaviour).start()
+        servers.append(server)
+        return bench_pipeline.build_pipeline(server.url), server
+    
+    yield build
+    for server in servers:
+        server.stop()
@@ -0,0 +1,89 @@
+import json
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import app
+    
+    calls = []
+    
+    def lookup_progressive(company, designation, min_confidence=None, min_sources=None):
+        calls.append((min_confidence, min_sources))
+        return {'success': True}
+    
+    monkeypatch.setattr(app.pipeline, 'lookup_progressive', lookup_progressive)
+    client = app.app.test_client()
+    client.calls = calls
+    return client
+
+
+def search(client, **fields):
+    return client.post('/search', json=dict(company='Reviva', designation='CEO', progressive=True, **fields))
+
+
+@pytest.mark.parametrize('fields', [
+    {'min_confidence': 1.5},
+    {'min_confidence': -0.1},
+    {'min_confidence': 'high'},
+    {'min_confidence': True},
+    {'min_sources': 0},
+    {'min_sources': 2.5},
+    {'min_sources': 'two'},
+    {'min_sources': [2]},
+])
+def test_search_rejects_invalid_stop_thresholds(client, fields):
+    response = search(client, **fields)
+    
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert not client.calls
+
+
+def test_search_passes_stop_thresholds_through(client):
+    assert search(client, min_confidence='0.8', min_sources=3).status_code == 200
+    assert search(client).status_code == 200
+    
+    assert client.calls == [(0.8, 3), (None, None)]
+
+
+def read_events(response):
+    """(event, data) pairs from a server-sent events body"""
+    events = []
+    for message in response.get_data(as_text=True).split('\n\n'):
+        if message:
+            fields = dict(line.split(': ', 1) for line in message.split('\n'))
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_sends_pipeline_events(client, monkeypatch):
+    import app
+    
+    def stream_lookup(company, designation, budget=None):
+        yield 'planned', ['CEO of Reviva']
+        yield 'provisional', {'success': True, 'person': {'first_name': 'Ana'}}
+        yield 'done', {'success': True, 'person': {'first_name': 'Ana'}}
+    
+    monkeypatch.setattr(app.pipeline, 'stream_lookup', stream_lookup)
+    response = client.get('/search/stream?company=Reviva&designation=CEO')
+    
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert [event for event, _ in read_events(response)] == ['planned', 'provisional', 'done']
+    assert read_events(response)[-1][1]['person'] == {'first_name': 'Ana'}
+
+
+def test_stream_reports_failures_as_an_error_event(client, monkeypatch):
+    import app
+    
+    def stream_lookup(company, designation, budget=None):
+        yield 'planned', []
+        raise RuntimeError('backend down')
+    
+    monkeypatch.setattr(app.pipeline, 'stream_lookup', stream_lookup)
+    
+    events = read_events(client.get('/search/stream?company=Reviva&designation=CEO'))
+    
+    assert events[-1] == ('error', {'success': False, 'error': 'backend down'})
+    assert client.get('/search/stream?company=Reviva').status_code == 400
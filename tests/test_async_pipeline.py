@@ -0,0 +1,122 @@
+import time
+import asyncio
+from stub_server import person_for
+from async_pipeline import AsyncLookupService
+from deadline import deadline_scope
+
+
+def test_service_keeps_one_pipeline_across_event_loops(stub_pipeline):
+    companies = ['Reviva', 'Sentima']
+    pipeline, _ = stub_pipeline(companies)
+    service = AsyncLookupService(pipeline)
+    
+    try:
+        # Flask gives every async request its own event loop
+        responses = [asyncio.run(service.lookup(company, 'CEO')) for company in companies]
+        first = service.async_pipeline
+        asyncio.run(service.lookup('Reviva', 'Founder'))
+        
+        assert service.async_pipeline is first
+        assert not first.query_tasks and not first.page_tasks
+    finally:
+        service.close()
+    
+    for company, response in zip(companies, responses):
+        person = response['person']
+        assert f"{person['first_name']} {person['last_name']}" == person_for(company)
+
+
+def test_service_lookup_runs_under_its_budget(stub_pipeline):
+    pipeline, _ = stub_pipeline(['Sentima'], latency_ms=300)
+    service = AsyncLookupService(pipeline)
+    
+    try:
+        response = asyncio.run(service.lookup('Sentima', 'CEO', budget=0.05))
+    finally:
+        service.close()
+    
+    assert response['degraded']
+    assert 'search_timeout' in response['degraded_reasons']
+
+
+class SlowSession:
+    """Async search session that sleeps, or raises the backend's own timeout"""
+    
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+    
+    async def text(self, query, region, timelimit, max_results):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [{'title': query, 'link': f'https://{region}.example/', 'snippet': ''}]
+
+
+def run_attempt(pipeline, session, budget=None):
+    from circuit_breaker import CircuitBreaker
+    from async_pipeline import AsyncSearchEngine
+    
+    engine = AsyncSearchEngine(pipeline.search_engine)
+    pipeline.search_engine.breaker = CircuitBreaker('test', failure_threshold=10)
+    
+    async def run():
+        engine.semaphore = asyncio.Semaphore(1)
+        engine.session = session
+        with deadline_scope(budget) as deadline:
+            results = await engine.run_attempt('Reviva CEO', {'region': 'wt-wt', 'timelimit': None, 'max': 5})
+            return results, deadline.reasons
+    
+    results, reasons = asyncio.run(run())
+    return results, reasons, pipeline.search_engine.breaker.failures
+
+
+def test_backend_timeouts_count_as_failures(stub_pipeline):
+    pipeline, _ = stub_pipeline(['Reviva'])
+    
+    results, reasons, failures = run_attempt(pipeline, SlowSession(error=asyncio.TimeoutError()))
+    
+    assert results is None
+    assert 'search_timeout' not in reasons
+    assert failures == 1
+
+
+def test_deadline_expiry_degrades_without_blaming_the_backend(stub_pipeline):
+    pipeline, _ = stub_pipeline(['Reviva'])
+    
+    results, reasons, failures = run_attempt(pipeline, SlowSession(delay=1), budget=0.05)
+    
+    assert results is None
+    assert 'search_timeout' in reasons
+    assert failures == 0
+
+
+def test_blocking_cache_reads_leave_the_loop_free(stub_pipeline):
+    pipeline, _ = stub_pipeline(['Reviva'])
+    cache = pipeline.search_engine.cache
+    
+    def slow_get(*args):
+        time.sleep(0.2)
+        return None
+    
+    cache.get = slow_get
+    ticks = []
+    
+    async def ticker():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+    
+    async def run():
+        from async_pipeline import AsyncSearchEngine
+        engine = AsyncSearchEngine(pipeline.search_engine)
+        engine.semaphore = asyncio.Semaphore(1)
+        engine.session = SlowSession()
+        await asyncio.gather(
+            ticker(),
+            engine.run_attempt('Reviva CEO', {'region': 'wt-wt', 'timelimit': None, 'max': 5})
+        )
+    
+    asyncio.run(run())
+    
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.1
@@ -0,0 +1,49 @@
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN, get_breaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+    
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats()['rejected'] == 1
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    
+    breaker.opened_at -= 1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=5, reset_timeout=0.01)
+    for _ in range(5):
+        breaker.record_failure()
+    
+    breaker.opened_at -= 1
+    assert breaker.allow()
+    breaker.record_failure()
+    
+    assert breaker.state == OPEN
+    assert breaker.get_stats()['opened'] == 2
+
+
+def test_breakers_are_shared_by_name():
+    assert get_breaker('shared-test') is get_breaker('shared-test')
+    assert get_breaker('shared-test') is not get_breaker('other-test')
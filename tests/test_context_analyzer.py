@@ -0,0 +1,53 @@
+from context_analyzer import ContextAnalyzer, KeywordMatcher
+from name_extractor import NameMatch
+
+
+def make_analyzer(company='Exped Tribe GmbH', designation='Founder'):
+    return ContextAnalyzer(company, designation, ['co-founder'], ['ceo', 'founder', 'director'])
+
+
+def match(text, name):
+    start = text.index(name)
+    return NameMatch(name, start, start + len(name))
+
+
+def test_keyword_matcher_reports_contained_keywords():
+    matcher = KeywordMatcher([('chief executive officer', 'designation'), ('officer', 'indicator')])
+    [(start, end, categories, parts)] = matcher.find_all('our chief executive officer')
+    
+    assert (start, end) == (4, 27)
+    assert categories == {'designation', 'indicator'}
+    assert (20, 27, 'indicator') in parts
+
+
+def test_anchor_is_designation_keyword_not_whole_pattern():
+    text = 'Lars Dubois is the founder of Exped Tribe GmbH, a travel company.'
+    document = make_analyzer().analyze(text)
+    
+    start = text.index('founder')
+    assert document.anchor_spans == [(start, start + len('founder'))]
+
+
+def test_company_name_scores_zero_and_person_wins():
+    text = 'Lars Dubois is the founder of Exped Tribe GmbH, a travel company.'
+    document = make_analyzer().analyze(text)
+    
+    assert document.score_name(match(text, 'Exped Tribe')) == 0.0
+    assert document.score_name(match(text, 'Lars Dubois')) > 0.9
+
+
+def test_company_before_designation_scores_zero():
+    text = 'Exped Tribe GmbH founder Lars Dubois'
+    document = make_analyzer().analyze(text)
+    
+    assert document.score_name(match(text, 'Exped Tribe')) == 0.0
+    assert document.score_name(match(text, 'Lars Dubois')) > 0.5
+
+
+def test_proximity_falls_with_distance():
+    text = 'Founder Anna Berg. ' + 'x ' * 60 + 'Marco Rossi'
+    document = make_analyzer().analyze(text)
+    
+    near = document.score_name(match(text, 'Anna Berg'))
+    far = document.score_name(match(text, 'Marco Rossi'))
+    assert near > far
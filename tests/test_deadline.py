@@ -0,0 +1,55 @@
+import time
+import threading
+from contextvars import copy_context
+from deadline import deadline_scope, current_deadline, get_timeout, out_of_time, mark_degraded
+
+
+def test_budget_from_env_set_after_import(monkeypatch):
+    # app.py imports this module before load_dotenv() runs
+    monkeypatch.setenv('LOOKUP_BUDGET_MS', '1500')
+    
+    with deadline_scope() as deadline:
+        assert deadline.budget == 1.5
+
+
+def test_explicit_budget_wins(monkeypatch):
+    monkeypatch.setenv('LOOKUP_BUDGET_MS', '1500')
+    
+    with deadline_scope(0.25) as deadline:
+        assert deadline.budget == 0.25
+
+
+def test_no_deadline_leaves_timeouts_alone():
+    assert current_deadline() is None
+    assert get_timeout(10) == 10
+    assert get_timeout() is None
+    assert not out_of_time('search_skipped', 1000)
+
+
+def test_timeouts_shrink_to_what_is_left():
+    with deadline_scope(0.5):
+        assert get_timeout(10) <= 0.5
+        assert get_timeout(0.1) == 0.1
+
+
+def test_out_of_time_marks_the_lookup_degraded():
+    with deadline_scope(0.01) as deadline:
+        time.sleep(0.02)
+        assert out_of_time('page_fetch_skipped', 0.5)
+        mark_degraded('page_fetch_skipped')
+        mark_degraded('search_timeout')
+    
+    assert deadline.degraded
+    assert deadline.reasons == ['page_fetch_skipped', 'search_timeout']
+
+
+def test_deadline_reaches_threads_run_in_a_copied_context():
+    seen = []
+    with deadline_scope(5) as deadline:
+        context = copy_context()
+        thread = threading.Thread(target=context.run, args=(lambda: seen.append(current_deadline()),))
+        thread.start()
+        thread.join()
+    
+    assert seen == [deadline]
+    assert current_deadline() is None
@@ -0,0 +1,88 @@
+import os
+import json
+import pytest
+from executive_registry import ExecutiveRegistry, normalize_company
+
+
+@pytest.mark.parametrize('name, normalized', [
+    ('SkiStar AB', 'skistar'),
+    ('Exped Tribe GmbH', 'exped tribe'),
+    ('Grecia365 di Karlitalia Tour Operator S.r.l.', 'grecia365 di karlitalia tour operator'),
+    ('Ionian Estates & Villas Limited', 'ionian estates and villas'),
+    ('Café Noir', 'cafe noir'),
+    ('Limited', 'limited'),
+])
+def test_normalize_company(name, normalized):
+    assert normalize_company(name) == normalized
+
+
+def write_registry(path, executives, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'companies': [
+            {'name': 'Reviva Srl', 'aliases': ['Reviva Italia'], 'executives': executives}
+        ]}, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_find_executive_by_name_or_alias(tmp_path):
+    path = str(tmp_path / 'registry.json')
+    write_registry(path, {'CEO': 'Anna Weber', 'founder': 'Marco Rossi'}, 1000)
+    registry = ExecutiveRegistry(path, reload_interval=0)
+    
+    assert registry.find_executive('reviva', 'Ceo') == {
+        'name': 'Anna Weber', 'role': 'ceo', 'source_url': 'https://www.reviva.com/about/leadership'
+    }
+    assert registry.find_executive('Reviva Italia', 'Co-Founder')['name'] == 'Marco Rossi'
+    assert registry.find_executive('Reviva', 'CFO') is None
+    assert registry.get_known_people('Reviva')['anna weber'] == 1.0
+    assert registry.get_known_people('Reviva')['weber'] == 0.9
+
+
+@pytest.mark.parametrize('designation, role', [
+    ('Director', None),
+    ('Sales Director', None),
+    ('President', 'president'),
+    ('CTO', 'cto'),
+    ('Co-Founder & CEO', 'ceo'),
+    ('Chief Executive Officer', 'chief executive officer'),
+    ('Executive Assistant', None),
+    ('Officer', None),
+])
+def test_roles_match_whole_words(tmp_path, designation, role):
+    path = str(tmp_path / 'registry.json')
+    write_registry(path, {'ceo': 'Anna Weber', 'cto': 'Luca Bianchi', 'president': 'Marco Rossi',
+                          'chief executive officer': 'Anna Weber'}, 1000)
+    registry = ExecutiveRegistry(path, reload_interval=0)
+    
+    known = registry.find_executive('Reviva', designation)
+    
+    assert (known and known['role']) == role
+
+
+def test_bundled_registry_does_not_return_the_ceo_for_other_roles():
+    registry = ExecutiveRegistry()
+    
+    assert registry.find_executive('Tesla', 'Director') is None
+    assert registry.find_executive('Tesla Motors', 'CTO')['name'] == 'Elon Musk'
+
+
+def test_registry_reloads_when_the_file_changes(tmp_path):
+    path = str(tmp_path / 'registry.json')
+    write_registry(path, {'ceo': 'Anna Weber'}, 1000)
+    registry = ExecutiveRegistry(path, reload_interval=0)
+    
+    write_registry(path, {'ceo': 'Luca Bianchi'}, 2000)
+    
+    assert registry.find_executive('Reviva', 'CEO')['name'] == 'Luca Bianchi'
+
+
+def test_csv_rows_group_by_company(tmp_path):
+    path = tmp_path / 'registry.csv'
+    path.write_text('company,role,name,aliases,domain\n'
+                    'Reviva Srl,CEO,Anna Weber,Reviva Italia,reviva.it\n'
+                    'Reviva Srl,CTO,Luca Bianchi,,\n', encoding='utf-8')
+    
+    registry = ExecutiveRegistry(str(path))
+    
+    assert registry.get_stats()['companies'] == 1
+    assert registry.find_executive('Reviva Italia', 'CTO')['source_url'] == 'https://www.reviva.it/about/leadership'
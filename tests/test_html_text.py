@@ -0,0 +1,76 @@
+from html_text import LeadershipTextExtractor, extract_text
+
+
+def test_json_ld_people_become_relevant_text():
+    html = '''
+    <p>Welcome to our shop.</p>
+    <script type="application/ld+json">
+    {"@context": "https://schema.org", "@graph": [
+        {"@type": "Organization", "name": "Acme",
+         "founder": {"@type": "Person", "name": "Jane Doe", "jobTitle": "Founder"}},
+        {"@type": ["Person"], "name": "John Roe"}
+    ]}
+    </script>
+    <script type="application/ld+json">{not json</script>
+    '''
+    
+    text = extract_text(html)
+    
+    assert text.startswith(('Jane Doe, Founder John Roe', 'John Roe Jane Doe, Founder'))
+    assert text.endswith('Welcome to our shop.')
+    assert 'not json' not in text
+
+
+def test_skipped_elements_contribute_no_text():
+    html = '''
+    <nav><a href="/">Home</a> <a href="/team">Team</a></nav>
+    <script>var ceo = "Nobody";</script>
+    <style>p { color: red }</style>
+    <svg><text>Logo</text></svg>
+    <p>Maria Rossi is our CEO.</p>
+    <button>Subscribe</button>
+    '''
+    
+    assert extract_text(html) == 'Maria Rossi is our CEO.'
+
+
+def test_leadership_sections_come_first_and_boilerplate_last():
+    html = '''
+    <p>We accept cookies.</p>
+    <p>Our products ship worldwide.</p>
+    <h2>Our Team</h2>
+    <p>Anna Berg</p>
+    <h3>Advisors</h3>
+    <p>Lars Holm</p>
+    <h2>Products</h2>
+    <p>Widgets</p>
+    '''
+    
+    assert extract_text(html) == (
+        'Our Team Anna Berg Advisors Lars Holm Our products ship worldwide. Products Widgets We accept cookies.'
+    )
+
+
+def test_unclosed_tags_do_not_leak_skipping():
+    assert extract_text('<nav><ul><li>Menu</nav><p>Chief Officer Ada Byron</p>') == 'Chief Officer Ada Byron'
+
+
+def test_done_once_enough_relevant_text_is_collected():
+    extractor = LeadershipTextExtractor(max_chars=200, relevant_chars=40)
+    
+    extractor.feed('<p>Jane Doe, Chief Executive Officer</p><p>John')
+    assert not extractor.done
+    extractor.feed(' Roe, Director of Sales</p><p>Company history')
+    assert extractor.done
+    extractor.feed('<p>Ignored once done</p>')
+    extractor.close()
+    
+    text = extractor.get_text()
+    assert text.startswith('Jane Doe, Chief Executive Officer John Roe, Director of Sales')
+    assert 'Ignored' not in text
+
+
+def test_text_is_cut_to_max_chars():
+    html = ''.join(f'<p>Paragraph number {index} about the weather.</p>' for index in range(100))
+    
+    assert len(extract_text(html, max_chars=120)) == 120
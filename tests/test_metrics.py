@@ -0,0 +1,68 @@
+import pytest
+import metrics
+from metrics import MetricsRegistry, collect_timings, stage, timed
+
+
+@pytest.fixture
+def metrics_enabled(monkeypatch):
+    """Set METRICS_ENABLED after import, as app.py's load_dotenv() used to"""
+    def configure(value):
+        monkeypatch.setenv('METRICS_ENABLED', value)
+        monkeypatch.setattr(metrics, '_enabled', None)
+    return configure
+
+
+def test_disabled_from_env_set_after_import(metrics_enabled):
+    metrics_enabled('false')
+    registry = MetricsRegistry()
+    counter = registry.counter('things_total', 'Things', ['kind'])
+    
+    @timed('example')
+    def work():
+        return 42
+    
+    with collect_timings() as timings:
+        assert work() == 42
+        with stage('block'):
+            pass
+    counter.inc(kind='a')
+    
+    assert timings.to_dict()['stages'] == {}
+    assert counter.render() == []
+
+
+def test_enabled_records_stages(metrics_enabled):
+    metrics_enabled('true')
+    
+    @timed('example')
+    def work():
+        return 42
+    
+    with collect_timings() as timings:
+        work()
+        work()
+        with stage('block'):
+            pass
+    
+    stages = timings.to_dict()['stages']
+    assert stages['example']['calls'] == 2
+    assert stages['block']['calls'] == 1
+
+
+def test_render_prometheus_text(metrics_enabled):
+    metrics_enabled('true')
+    registry = MetricsRegistry()
+    counter = registry.counter('things_total', 'Things', ['kind'])
+    histogram = registry.histogram('wait_seconds', 'Waits', buckets=(0.1, 1.0))
+    
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    histogram.observe(0.5)
+    
+    text = registry.render()
+    assert '# TYPE things_total counter' in text
+    assert 'things_total{kind="a\\"b"} 3' in text
+    assert 'wait_seconds_bucket{le="0.1"} 0' in text
+    assert 'wait_seconds_bucket{le="1.0"} 1' in text
+    assert 'wait_seconds_bucket{le="+Inf"} 1' in text
+    assert 'wait_seconds_count 1' in text
@@ -0,0 +1,38 @@
+from name_clusters import cluster_candidates, soundex, name_tokens, get_company_tokens, is_person_cluster
+
+
+def candidates(*names):
+    return [{'name': name, 'source_url': f"https://example{index}.com"} for index, name in enumerate(names)]
+
+
+def test_name_tokens_drop_prefixes_and_accents():
+    assert name_tokens('Dr. José Müller') == ['jose', 'muller']
+
+
+def test_soundex():
+    assert soundex('robert') == soundex('rupert') == 'R163'
+    assert soundex('ashcraft') == 'A261'
+
+
+def test_variants_share_a_cluster():
+    clusters = cluster_candidates(candidates('Elon Musk', 'E. Musk', 'Élon Musk', 'Musk', 'Anna Rossi'))
+    
+    sizes = sorted(len(cluster.members) for cluster in clusters)
+    assert sizes == [1, 4]
+
+
+def test_different_first_names_stay_apart():
+    clusters = cluster_candidates(candidates('Anna Rossi', 'Marco Rossi'))
+    assert len(clusters) == 2
+
+
+def test_company_and_site_clusters_are_not_people():
+    company_tokens = get_company_tokens('Exped Tribe GmbH')
+    assert company_tokens == {'exped', 'tribe'}
+    
+    clusters = {cluster.surname: cluster for cluster in cluster_candidates(
+        candidates('Exped Tribe', 'Reviva LinkedIn', 'Lars Dubois', 'L. Dubois'))}
+    
+    assert not is_person_cluster(clusters['tribe'], company_tokens)
+    assert not is_person_cluster(clusters['linkedin'], company_tokens)
+    assert is_person_cluster(clusters['dubois'], company_tokens)
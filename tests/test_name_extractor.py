@@ -0,0 +1,47 @@
+import pytest
+from name_extractor import NameExtractor
+
+
+@pytest.fixture(scope='module')
+def extractor():
+    return NameExtractor(page_cache=None)
+
+
+def names(extractor, text):
+    return [match.name for match in extractor.find_name_candidates(text)]
+
+
+@pytest.mark.parametrize('text, name', [
+    ('CEO Elon R. Musk said', 'Elon R. Musk'),
+    ("Jean-Luc O'Brien heads Paris", "Jean-Luc O'Brien"),
+    ('Ronald McDonald, founder', 'Ronald McDonald'),
+    ('Tomáš Novák, ředitel', 'Tomáš Novák'),
+    ('Anna Rossi - Founder & CEO', 'Anna Rossi'),
+])
+def test_finds_names_with_initials_hyphens_and_accents(extractor, text, name):
+    assert name in names(extractor, text)
+
+
+def test_offsets_point_at_the_name(extractor):
+    text = 'Meet our founder, Giulia Bianchi.'
+    
+    [match] = extractor.find_name_candidates(text)
+    
+    assert text[match.start:match.end] == 'Giulia Bianchi'
+
+
+def test_three_word_runs_yield_every_window(extractor):
+    assert names(extractor, 'Marco De Luca') == ['Marco De', 'Marco De Luca', 'De Luca']
+
+
+@pytest.mark.parametrize('text', [
+    'A. B. Smith joined',
+    'founded in Florence',
+    'the CEO and the CTO',
+])
+def test_needs_two_full_words(extractor, text):
+    assert names(extractor, text) == []
+
+
+def test_runs_starting_mid_word_drop_the_fragment(extractor):
+    assert names(extractor, 'the iPhone Pro Max') == ['Pro Max']
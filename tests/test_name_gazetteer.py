@@ -0,0 +1,41 @@
+import pytest
+from name_gazetteer import NameGazetteer, build_gazetteer
+
+NAMES = ['anna', 'björn', 'carla', 'david', 'elena', 'francesco', 'giulia', 'hans', 'ingrid', 'jörg']
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = str(tmp_path / 'first_names.tsv')
+    build_gazetteer([(name, 0.5) for name in NAMES], path)
+    return NameGazetteer(path)
+
+
+def test_every_name_is_found(gazetteer):
+    for name in NAMES:
+        assert gazetteer.lookup(name) == 0.5
+    assert gazetteer.get_stats()['entries'] == len(NAMES)
+
+
+@pytest.mark.parametrize('name', ['', 'aaron', 'anne', 'bjorg', 'zoe', 'hans peter'])
+def test_unknown_names_miss(gazetteer, name):
+    assert name not in gazetteer
+
+
+def test_lookups_ignore_case_and_accents(gazetteer):
+    assert 'BJORN' in gazetteer
+    assert 'Jörg' in gazetteer
+
+
+def test_counts_are_log_scaled_to_weights(tmp_path):
+    path = str(tmp_path / 'last_names.tsv')
+    
+    assert build_gazetteer([('Weber', 1000), ('weber', 1000), ('Rossi', 45), ('', 3)], path, counts=True) == 2
+    
+    gazetteer = NameGazetteer(path)
+    assert gazetteer.lookup('weber') == 1.0
+    assert 0 < gazetteer.lookup('rossi') < 0.6
+
+
+def test_missing_file_knows_no_names(tmp_path):
+    assert NameGazetteer(str(tmp_path / 'missing.tsv')).lookup('anna') is None
@@ -0,0 +1,103 @@
+import time
+import sqlite3
+from page_cache import PageCache
+
+URL = 'https://reviva.example/team'
+
+
+def make_cache(tmp_path, **options):
+    return PageCache(path=str(tmp_path / 'page_cache.db'), **options)
+
+
+def accessed_at(cache, url):
+    return cache.db.execute('SELECT accessed_at FROM pages WHERE url = ?', (url,)).fetchone()[0]
+
+
+def test_stale_entries_revalidate_with_their_validators(tmp_path):
+    cache = make_cache(tmp_path, ttl=0)
+    cache.set(URL, 'Anna Weber, CEO', etag='"v1"', last_modified='Mon, 05 Oct 2026 10:00:00 GMT')
+    time.sleep(0.01)
+    
+    entry = cache.get(URL)
+    
+    assert entry['text'] == 'Anna Weber, CEO' and not entry['fresh']
+    assert cache.get_conditional_headers(entry) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 05 Oct 2026 10:00:00 GMT'
+    }
+    
+    cache.ttl = 60
+    cache.mark_revalidated(URL)
+    assert cache.get(URL)['fresh']
+    assert cache.get('https://reviva.example/about') is None
+
+
+def test_failures_back_off_the_url_then_the_host(tmp_path):
+    cache = make_cache(tmp_path)
+    
+    cache.record_failure(URL, domain_failure=True)
+    assert cache.is_blocked(URL)
+    assert not cache.is_blocked('https://reviva.example/about')
+    
+    # A second connection failure on the host blocks every page on it
+    cache.record_failure('https://reviva.example/news', domain_failure=True)
+    assert cache.is_blocked('https://reviva.example/about')
+    
+    cache.set(URL, 'Anna Weber, CEO')
+    assert not cache.is_blocked(URL)
+    assert not cache.is_blocked('https://reviva.example/about')
+
+
+def test_hits_do_not_write_until_the_batch_is_full(tmp_path):
+    cache = make_cache(tmp_path, touch_batch=2)
+    cache.set(URL, 'Anna Weber, CEO')
+    cache.set('https://reviva.example/about', 'About Reviva')
+    stored = accessed_at(cache, URL)
+    
+    cache.get(URL)
+    assert accessed_at(cache, URL) == stored
+    
+    cache.get('https://reviva.example/about')
+    assert accessed_at(cache, URL) > stored
+    assert not cache.touched
+
+
+class LockedDatabase:
+    """Stands in for a connection another worker holds an exclusive lock on"""
+    
+    def execute(self, *args):
+        raise sqlite3.OperationalError('database is locked')
+    
+    executemany = execute
+    
+    def commit(self):
+        raise sqlite3.OperationalError('database is locked')
+    
+    def rollback(self):
+        pass
+
+
+def test_database_errors_are_misses(tmp_path):
+    cache = make_cache(tmp_path, touch_batch=1)
+    cache.db = LockedDatabase()
+    
+    assert cache.get(URL) is None
+    assert not cache.is_blocked(URL)
+    cache.set(URL, 'Anna Weber, CEO')
+    cache.mark_revalidated(URL)
+    cache.record_failure(URL, domain_failure=True)
+    cache.flush()
+    assert cache.get_stats()['size'] == 0
+
+
+def test_old_failure_records_are_pruned(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.backoff_max = 0.01
+    for index in range(3):
+        cache.record_failure(f'https://down{index}.example/', domain_failure=True)
+    time.sleep(0.05)
+    
+    cache.writes = 99
+    cache.set(URL, 'Anna Weber, CEO')
+    
+    assert cache.db.execute('SELECT COUNT(*) FROM failures').fetchone()[0] == 0
@@ -0,0 +1,96 @@
+import gc
+import time
+import threading
+import pytest
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from page_fetcher import PageFetcher
+from rate_limiter import RateLimiter
+from html_text import LeadershipTextExtractor
+
+PAGES = {
+    '/big': ('text/html', b'<p>' + b'Anna Weber is our CEO. ' * 5000 + b'</p>'),
+    '/pdf': ('text/html', b'%PDF-1.7 binary'),
+    '/nul': ('', b'text\x00with a nul byte'),
+    '/zip': ('application/zip', b'PK\x03\x04'),
+    '/latin': ('text/html', '<meta charset="iso-8859-1"><p>Jörg Müller</p>'.encode('latin-1')),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/drip':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', '1000')
+            self.end_headers()
+            for _ in range(100):
+                self.wfile.write(b'x' * 10)
+                self.wfile.flush()
+                time.sleep(0.05)
+            return
+        
+        content_type, body = PAGES[self.path]
+        self.send_response(200)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    monkeypatch.setenv('PAGE_RATE_LIMIT', '100000')
+    return PageFetcher(max_bytes=20000, rate_limiter=RateLimiter(state_dir=str(tmp_path)))
+
+
+def test_bodies_stop_at_the_byte_budget(fetcher, server):
+    page = fetcher.fetch(server + '/big')
+    
+    assert page['truncated']
+    assert 20000 <= len(page['body']) < 20000 + fetcher.chunk_size
+
+
+@pytest.mark.parametrize('path', ['/pdf', '/nul', '/zip'])
+def test_binary_content_is_skipped(fetcher, server, path):
+    assert fetcher.fetch(server + path) is None
+
+
+def test_binary_extensions_are_never_requested(fetcher):
+    assert fetcher.fetch('http://127.0.0.1:9/report.pdf') is None
+
+
+def test_charset_comes_from_the_meta_tag(fetcher, server):
+    page = fetcher.fetch(server + '/latin', extractor=LeadershipTextExtractor())
+    
+    assert 'Jörg Müller' in page['body']
+    assert 'Jörg Müller' in page['text']
+
+
+def test_timeout_bounds_the_whole_read(fetcher, server):
+    started = time.monotonic()
+    
+    with pytest.raises(requests.Timeout):
+        fetcher.fetch(server + '/drip', timeout=0.5)
+    
+    assert time.monotonic() - started < 2
+
+
+def test_idle_hosts_release_their_connection_limits(fetcher, server):
+    fetcher.fetch(server + '/latin')
+    gc.collect()
+    
+    assert len(fetcher.host_limits) == 0
@@ -0,0 +1,122 @@
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from page_prefetch import DomainYields, PagePrefetch
+
+
+class FakeExtractor:
+    """Ranks results by their 'score' and treats snippets containing 'CEO' as naming someone"""
+    
+    def __init__(self):
+        self.prefetch_executor = ThreadPoolExecutor(1)
+    
+    def get_context_analyzer(self, company, designation):
+        return None
+    
+    def snippet_candidates(self, result, analyzer):
+        return ['Anna Weber'] if 'CEO' in result.get('snippet', '') else []
+    
+    def needs_page_fetch(self, found_people):
+        return len(found_people) < 2
+    
+    def rank_fetch_targets(self, results, company):
+        return sorted(((result['score'], result) for result in results), key=lambda pair: -pair[0])
+
+
+def result(url, score, snippet=''):
+    return {'link': url, 'score': score, 'snippet': snippet}
+
+
+@pytest.fixture
+def extractor():
+    extractor = FakeExtractor()
+    yield extractor
+    extractor.prefetch_executor.shutdown(wait=True)
+
+
+def make_prefetch(extractor, fetch_page, **options):
+    return PagePrefetch(extractor, 'Reviva', 'CEO', fetch_page, enabled=True, **options)
+
+
+def test_domain_yields_smooth_towards_recent_pages():
+    yields = DomainYields(prior=0.5, smoothing=0.5)
+    
+    assert yields.get('reviva.com') == 0.5
+    yields.record('reviva.com', 3)
+    yields.record('reviva.com', 0)
+    
+    assert yields.get('reviva.com') == 0.5
+    assert yields.get_stats() == {'reviva.com': 0.5}
+
+
+def test_add_prefetches_the_best_results_within_the_limit(extractor):
+    fetched = []
+    prefetch = make_prefetch(extractor, lambda url: fetched.append(url) or url.upper(),
+                             max_pages=2, min_score=0.5)
+    
+    prefetch.add([result('https://a/', 0.9), result('https://b/', 0.4), result('https://c/', 0.7)])
+    prefetch.add([result('https://d/', 1.0)])
+    
+    targets = [result('https://a/', 0.9), result('https://b/', 0.4)]
+    assert list(prefetch.fetch(targets)) == ['HTTPS://A/', 'HTTPS://B/']
+    prefetch.close()
+    
+    assert sorted(prefetch.speculative) == ['https://a/', 'https://c/']
+    assert fetched.count('https://a/') == 1
+
+
+def test_snippets_naming_people_cancel_pending_prefetches(extractor):
+    started = threading.Event()
+    release = threading.Event()
+    fetched = []
+    
+    def fetch_page(url):
+        started.set()
+        release.wait(5)
+        fetched.append(url)
+        return url
+    
+    prefetch = make_prefetch(extractor, fetch_page, max_pages=2, min_score=0.5)
+    prefetch.add([result('https://a/', 0.9), result('https://b/', 0.8)])
+    started.wait(5)
+    prefetch.add([result('https://c/', 0.3, 'Anna Weber, CEO'), result('https://d/', 0.3, 'Reviva CEO Anna Weber')])
+    release.set()
+    prefetch.close()
+    extractor.prefetch_executor.shutdown(wait=True)
+    
+    # The first fetch had already started; the queued one never runs
+    assert prefetch.enough
+    assert fetched == ['https://a/']
+
+
+def test_a_result_seen_twice_counts_once(extractor):
+    # The search callback and extract_names both add the same filtered results
+    prefetch = make_prefetch(extractor, lambda url: url.upper(), max_pages=1, min_score=0.5)
+    named = result('https://a/', 0.9, 'Anna Weber, CEO')
+    
+    prefetch.add([named])
+    prefetch.add([named])
+    
+    assert not prefetch.enough
+    assert list(prefetch.fetch([named])) == ['HTTPS://A/']
+    prefetch.close()
+
+
+def test_fetch_resubmits_cancelled_prefetches(extractor):
+    started = threading.Event()
+    release = threading.Event()
+    
+    def fetch_page(url):
+        started.set()
+        release.wait(5)
+        return url.upper()
+    
+    prefetch = make_prefetch(extractor, fetch_page, max_pages=2, min_score=0.5)
+    prefetch.add([result('https://a/', 0.9), result('https://b/', 0.8)])
+    started.wait(5)
+    prefetch.add([result('https://c/', 0.3, 'Anna Weber, CEO'), result('https://d/', 0.3, 'Reviva CEO Anna Weber')])
+    assert prefetch.futures['https://b/'].cancelled()
+    release.set()
+    
+    assert list(prefetch.fetch([result('https://b/', 0.8)])) == ['HTTPS://B/']
+    prefetch.close()
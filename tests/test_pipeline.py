@@ -0,0 +1,89 @@
+import time
+import pytest
+from stub_server import person_for
+
+
+@pytest.mark.parametrize('company, designation', [
+    ('Exped Tribe GmbH', 'Founder, Director'),
+    ('Reviva', 'Ceo'),
+    ('Grecia365 di Karlitalia Tour Operator Srl', 'CEO & CO-FOUNDER')
+])
+def test_lookup_names_the_person_not_the_company(stub_pipeline, company, designation):
+    # The stub puts the company name on the profile, team, news, review and careers pages
+    pipeline, _ = stub_pipeline([company])
+    
+    response = pipeline.lookup(company, designation)
+    
+    assert response['success']
+    person = response['person']
+    assert f"{person['first_name']} {person['last_name']}" == person_for(company)
+
+
+def test_lookup_stays_within_search_call_budget(stub_pipeline):
+    pipeline, server = stub_pipeline(['Sentima'])
+    pipeline.query_builder.planner.budget = 6
+    
+    pipeline.lookup('Sentima', 'Founder & CEO')
+    
+    assert 0 < server.state.snapshot()['search'] <= 6
+
+
+def test_batch_searches_each_distinct_query_once(stub_pipeline):
+    pipeline, server = stub_pipeline(['Sentima', 'Reviva'])
+    rows = [
+        {'company': 'Sentima', 'designation': 'CEO'},
+        {'company': 'Sentima', 'designation': 'Founder & CEO'},
+        {'company': 'Reviva', 'designation': 'CEO'},
+        {'company': 'Sentima', 'designation': 'CEO'},
+        {'company': '', 'designation': 'CEO'},
+    ]
+    planned = [pipeline.plan_queries(row['company'], row['designation']) for row in rows[:4]]
+    unique_queries = set(query for queries in planned for query in queries)
+    assert len(unique_queries) < sum(len(queries) for queries in planned)
+    
+    responses = sorted(pipeline.run_batch(rows), key=lambda response: response['index'])
+    
+    assert [response['index'] for response in responses] == [0, 1, 2, 3, 4]
+    assert [response['success'] for response in responses] == [True, True, True, True, False]
+    assert responses[2]['person']['last_name'] == person_for('Reviva').split()[-1]
+    assert server.state.snapshot()['search'] <= 3 * len(unique_queries)
+
+
+def test_stream_ends_with_the_lookup_response(stub_pipeline):
+    pipeline, _ = stub_pipeline(['Exped Tribe GmbH'])
+    
+    events = list(pipeline.stream_lookup('Exped Tribe GmbH', 'Founder, Director'))
+    
+    names = [event for event, _ in events]
+    assert names[0] == 'planned'
+    assert 'results' in names and 'provisional' in names
+    assert names[-1] == 'done'
+    
+    done = events[-1][1]
+    assert f"{done['person']['first_name']} {done['person']['last_name']}" == person_for('Exped Tribe GmbH')
+    assert pipeline.lookup('Exped Tribe GmbH', 'Founder, Director')['cached']
+
+
+def test_stream_runs_under_its_budget(stub_pipeline):
+    pipeline, _ = stub_pipeline(['Sentima'], latency_ms=300)
+    
+    events = list(pipeline.stream_lookup('Sentima', 'CEO', budget=0.05))
+    
+    done = events[-1][1]
+    assert done['degraded']
+    assert 'search_timeout' in done['degraded_reasons']
+    assert pipeline.result_cache.get('Sentima', 'CEO') is None
+
+
+def test_closing_the_stream_cancels_the_lookup(stub_pipeline, monkeypatch):
+    monkeypatch.setenv('SEARCH_MAX_WORKERS', '2')
+    pipeline, server = stub_pipeline(['Sentima'], latency_ms=100)
+    
+    stream = pipeline.stream_lookup('Sentima', 'CEO')
+    assert next(stream)[0] == 'planned'
+    stream.close()
+    time.sleep(0.4)
+    
+    # Attempts already in flight finish, the rest never start and nothing is cached
+    assert server.state.snapshot()['search'] <= 2
+    assert pipeline.result_cache.get('Sentima', 'CEO') is None
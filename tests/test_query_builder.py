@@ -0,0 +1,40 @@
+from query_builder import QueryBuilder, QueryPlanner
+
+
+def test_split_roles():
+    planner = QueryBuilder().planner
+    
+    assert planner.split_roles('Founder & CEO') == ['Founder', 'CEO']
+    assert planner.split_roles('CEO | Sales Manager') == ['CEO', 'Sales Manager']
+    assert planner.split_roles('Senior Group Sales Manager for Israel, Sweden') == ['Senior Group Sales Manager']
+    assert planner.split_roles('Chief Executive Officer, Americas') == ['Chief Executive Officer']
+
+
+def test_budget_counts_search_calls_not_queries():
+    builder = QueryBuilder(search_budget=9)
+    queries = builder.build_queries('Sentima', 'Founder & CEO', cost=lambda query: 3)
+    
+    assert len(queries) == 3
+    assert queries[0] == 'Founder of Sentima'
+
+
+def test_query_costing_more_than_what_is_left_is_skipped():
+    costs = {'CEO of Sentima': 3, 'Chief Executive Officer of Sentima': 3, 'Sentima leadership team': 1}
+    queries = QueryBuilder(search_budget=4).build_queries('Sentima', 'CEO', cost=costs.get)
+    
+    assert queries == ['CEO of Sentima', 'Sentima leadership team']
+
+
+def test_near_identical_queries_are_dropped():
+    planner = QueryPlanner({}, budget=10, redundancy=0.75)
+    first = planner.get_signature('CEO of Sentima')
+    
+    assert planner.is_redundant(planner.get_signature('who is the CEO of Sentima'), [first])
+    assert not planner.is_redundant(planner.get_signature('Sentima leadership team'), [first])
+
+
+def test_designation_variations_cover_every_role():
+    variations = QueryBuilder().get_designation_variations('Founder & CEO')
+    
+    assert 'Co-Founder' in variations
+    assert 'Chief Executive Officer' in variations
@@ -0,0 +1,107 @@
+import os
+import time
+import asyncio
+import pytest
+from deadline import deadline_scope
+from rate_limiter import RateLimiter, TokenBucket, INTERACTIVE, BATCH, get_retry_after, is_rate_limit_error
+
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def test_batch_waits_while_interactive_reserves_ahead():
+    bucket = TokenBucket('test', rate=1, period=1)
+    
+    assert bucket.reserve(BATCH) == (True, 0.0)
+    granted, wait = bucket.reserve(BATCH)
+    assert not granted and wait > 0
+    
+    granted, wait = bucket.reserve(INTERACTIVE)
+    assert granted and 0.9 < wait <= 1.0
+
+
+def test_acquire_fails_fast_past_the_deadline():
+    bucket = TokenBucket('test', rate=1, period=1)
+    bucket.backoff(retry_after=30)
+    
+    with deadline_scope(0.5):
+        started = time.monotonic()
+        assert not bucket.acquire(INTERACTIVE)
+        assert not bucket.acquire(BATCH)
+        assert not asyncio.run(bucket.acquire_async(INTERACTIVE))
+        assert time.monotonic() - started < 0.2
+    
+    # A refused interactive caller leaves its token in the bucket
+    assert bucket.get_stats()['tokens'] >= 0.9
+
+
+def test_acquire_waits_when_the_token_comes_in_time():
+    bucket = TokenBucket('test', rate=10, period=1)
+    for _ in range(10):
+        bucket.reserve(BATCH)
+    
+    with deadline_scope(1):
+        assert bucket.acquire(INTERACTIVE)
+    assert not bucket.acquire(INTERACTIVE, timeout=0.01)
+
+
+def test_backoff_doubles_and_resets():
+    bucket = TokenBucket('test', rate=10, period=1, backoff_base=2, backoff_max=5)
+    
+    assert bucket.backoff() == 2
+    assert bucket.backoff() == 4
+    assert bucket.backoff() == 5
+    assert bucket.backoff(retry_after=1) == 1
+    bucket.succeeded()
+    assert bucket.get_stats()['strikes'] == 0
+
+
+def test_state_is_shared_through_the_state_dir(tmp_path):
+    first = RateLimiter(state_dir=str(tmp_path))
+    second = RateLimiter(state_dir=str(tmp_path))
+    
+    first.search().backoff(retry_after=30)
+    
+    assert second.search().get_stats()['blocked_for'] > 25
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc')
+def test_host_buckets_hold_no_file_descriptors(tmp_path):
+    limiter = RateLimiter(state_dir=str(tmp_path), max_buckets=50)
+    before = open_fds()
+    
+    for index in range(200):
+        limiter.host(f"host{index}.example.com").reserve(BATCH)
+    
+    # Other tests' background threads may still open or close a descriptor meanwhile
+    assert open_fds() - before < 10
+    assert len(limiter.buckets) == 50
+
+
+def test_evicted_bucket_resumes_from_disk(tmp_path):
+    limiter = RateLimiter(state_dir=str(tmp_path), max_buckets=1)
+    limiter.host('slow.example.com').backoff(retry_after=30)
+    limiter.host('other.example.com')
+    
+    assert 'host-slow.example.com' not in limiter.buckets
+    assert limiter.host('slow.example.com').get_stats()['blocked_for'] > 25
+
+
+def test_idle_state_files_are_pruned(tmp_path):
+    limiter = RateLimiter(state_dir=str(tmp_path))
+    limiter.host('old.example.com').backoff(retry_after=1)
+    limiter.host('recent.example.com').backoff(retry_after=1)
+    
+    stale = time.time() - limiter.state_ttl - 60
+    os.utime(tmp_path / 'host-old.example.com.bucket', (stale, stale))
+    
+    assert limiter.prune_state_files() == 1
+    assert sorted(os.listdir(tmp_path)) == ['host-recent.example.com.bucket']
+
+
+def test_rate_limit_helpers():
+    assert is_rate_limit_error(Exception('202 Ratelimit'))
+    assert not is_rate_limit_error(Exception('timeout'))
+    assert get_retry_after({'Retry-After': '3'}) == 3.0
+    assert get_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) is None
@@ -0,0 +1,93 @@
+import pytest
+from region_stats import RegionStats, get_query_shape
+from search_backends import SearchBackend
+from search_engine import SearchEngine
+from rate_limiter import RateLimiter
+
+ATTEMPTS = [{'region': 'wt-wt'}, {'region': 'us-en'}, {'region': 'uk-en'}]
+
+
+def results(*urls):
+    return [{'link': url, 'title': '', 'snippet': ''} for url in urls]
+
+
+def test_query_shape():
+    assert get_query_shape('CEO of Exped Tribe GmbH') == 'ceo of *'
+    assert get_query_shape('Sentima leadership team') == '* leadership team'
+
+
+def test_low_yield_regions_are_skipped_then_probed():
+    stats = RegionStats(min_samples=3, skip_yield=0.05, demote_yield=0.15, probe_every=2)
+    for _ in range(3):
+        # us-en repeats what wt-wt found, uk-en adds a third of its results
+        stats.record_yields('CEO of Sentima', ATTEMPTS,
+                            [results('a', 'b'), results('a', 'b'), results('a', 'c', 'd')])
+    
+    planned = [attempt['region'] for attempt in stats.plan('CEO of Reviva', ATTEMPTS)]
+    assert planned == ['wt-wt', 'uk-en']
+    
+    # Every probe_every-th skip runs the region again, last
+    planned = [attempt['region'] for attempt in stats.plan('CEO of Reviva', ATTEMPTS)]
+    assert planned == ['wt-wt', 'uk-en', 'us-en']
+
+
+def test_preview_does_not_advance_probes():
+    stats = RegionStats(min_samples=1, probe_every=2)
+    stats.record_yields('CEO of Sentima', ATTEMPTS, [results('a'), results('a'), results('b')])
+    
+    for _ in range(3):
+        assert len(stats.plan('CEO of Sentima', ATTEMPTS, record=False)) == 2
+    assert len(stats.plan('CEO of Sentima', ATTEMPTS)) == 2
+    assert len(stats.plan('CEO of Sentima', ATTEMPTS)) == 3
+
+
+def test_attempts_that_did_not_complete_are_not_recorded():
+    stats = RegionStats(min_samples=1)
+    stats.record_yields('CEO of Sentima', ATTEMPTS, [results('a'), None, []])
+    
+    yields = stats.get_stats()['yields']
+    assert 'ceo of * @ us-en' not in yields
+    assert yields['ceo of * @ uk-en']['yield'] == 0.0
+
+
+def test_latency_percentile_needs_samples():
+    stats = RegionStats(min_samples=5)
+    for value in (0.1, 0.2, 0.3, 0.4):
+        stats.record_latency('wt-wt', value)
+    assert stats.get_latency_percentile('wt-wt') is None
+    
+    stats.record_latency('wt-wt', 1.0)
+    assert stats.get_latency_percentile('wt-wt') == 1.0
+
+
+class FailingBackend(SearchBackend):
+    name = 'failing-test'
+    rate_limited = False
+    
+    def text(self, query, region, timelimit, max_results):
+        if region != 'wt-wt':
+            raise RuntimeError('upstream error')
+        return results('https://example.com/a')
+
+
+class MemoryCache:
+    def get(self, *key):
+        return None
+    
+    def set(self, *key_and_results):
+        pass
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = SearchEngine(backend=FailingBackend(), cache=MemoryCache(),
+                          rate_limiter=RateLimiter(state_dir=str(tmp_path)))
+    engine.hedging = False
+    return engine
+
+
+def test_failed_attempts_do_not_demote_healthy_regions(engine):
+    merged = engine.search_many(['CEO of Sentima'], max_results=5)['CEO of Sentima']
+    
+    assert [result['link'] for result in merged] == ['https://example.com/a']
+    assert list(engine.region_stats.get_stats()['yields']) == ['ceo of * @ wt-wt']
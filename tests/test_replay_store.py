@@ -0,0 +1,99 @@
+import pytest
+import requests
+from page_fetcher import PageFetcher
+from html_text import LeadershipTextExtractor
+from replay_store import ReplayStore, RecordingPageFetcher, ReplayPageFetcher
+from search_backends import SearchBackend, RecordingBackend, ReplayBackend, create_search_backend
+
+
+class FakeBackend(SearchBackend):
+    name = 'fake'
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def text(self, query, region, timelimit, max_results):
+        self.calls += 1
+        return [{'title': f'{query} ({region})', 'link': 'https://example.com/team', 'snippet': 'Zoë Müller, CEO'}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReplayStore(path=str(tmp_path / 'replay.db'))
+
+
+def test_recorded_searches_replay_offline(store):
+    live = FakeBackend()
+    recorded = RecordingBackend(live, store=store).text('CEO of Acme', 'us-en', 'y', 5)
+    
+    replay = ReplayBackend(store=store)
+    
+    # Queries are matched ignoring case and spacing, everything else exactly
+    assert replay.text('  ceo of  ACME', 'us-en', 'y', 5) == recorded
+    assert replay.text('CEO of Acme', 'uk-en', 'y', 5) == []
+    assert replay.text('CEO of Acme', 'us-en', None, 5) == []
+    assert live.calls == 1
+    
+    stats = replay.get_stats()
+    assert stats['searches'] == 1
+    assert stats['search_hits'] == 1 and stats['search_misses'] == 2
+
+
+def test_pages_round_trip(store):
+    page = {
+        'url': 'https://example.com/team',
+        'status': 200,
+        'headers': {'Content-Type': 'text/html; charset=utf-8', 'ETag': '"v1"'},
+        'body': '<h2>Team</h2><p>Zoë Müller, CEO</p>',
+        'truncated': True
+    }
+    store.put_page(page['url'], page)
+    store.put_page('https://example.com/missing', None)
+    
+    assert store.get_page(page['url']) == page
+    assert store.get_page('https://example.com/missing') is False
+    assert store.get_page('https://example.com/unknown') is None
+
+
+def test_replay_fetcher_serves_recorded_text(store):
+    store.put_page('https://example.com/team', {
+        'url': 'https://example.com/team', 'status': 200, 'headers': {},
+        'body': '<nav>Home</nav><p>Zoë Müller, CEO</p>', 'truncated': False
+    })
+    fetcher = ReplayPageFetcher(store)
+    
+    page = fetcher.fetch('https://example.com/team', extractor=LeadershipTextExtractor())
+    
+    assert page['text'] == 'Zoë Müller, CEO'
+    assert fetcher.fetch('https://example.com/unknown') is None
+
+
+def test_recording_fetcher_records_failures_but_not_revalidations(store, monkeypatch):
+    responses = {
+        'https://example.com/down': requests.ConnectionError('refused'),
+        'https://example.com/same': {'url': 'https://example.com/same', 'status': 304, 'headers': {},
+                                     'body': '', 'truncated': False},
+    }
+    
+    def fetch(self, url, **kwargs):
+        response = responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+    
+    monkeypatch.setattr(PageFetcher, 'fetch', fetch)
+    fetcher = RecordingPageFetcher(store)
+    
+    with pytest.raises(requests.ConnectionError):
+        fetcher.fetch('https://example.com/down')
+    assert fetcher.fetch('https://example.com/same')['status'] == 304
+    
+    assert store.get_page('https://example.com/down') is False
+    assert store.get_page('https://example.com/same') is None
+
+
+def test_cannot_record_from_an_offline_backend(monkeypatch):
+    monkeypatch.setenv('SEARCH_RECORD_BACKEND', 'replay')
+    
+    with pytest.raises(ValueError):
+        create_search_backend('record')
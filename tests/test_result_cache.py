@@ -0,0 +1,79 @@
+import time
+import sqlite3
+from result_cache import ResultCache
+
+RESPONSE = {'success': True, 'person': {'first_name': 'Anna', 'last_name': 'Weber'}}
+
+
+def make_cache(tmp_path, **options):
+    return ResultCache(path=str(tmp_path / 'result_cache.db'), **options)
+
+
+def test_equivalent_lookups_share_an_entry(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set('Tesla Inc', 'Ceo', RESPONSE)
+    
+    entry = cache.get('  tesla ', 'CEO')
+    
+    assert entry['response'] == RESPONSE and entry['fresh']
+    assert cache.get('Tesla Inc', 'CTO') is None
+
+
+def test_stale_entries_are_served_until_the_stale_window_ends(tmp_path):
+    cache = make_cache(tmp_path, ttl=0, stale_ttl=60)
+    cache.set('Reviva', 'CEO', RESPONSE)
+    time.sleep(0.01)
+    
+    assert not cache.get('Reviva', 'CEO')['fresh']
+    
+    cache.stale_ttl = 0
+    assert cache.get('Reviva', 'CEO') is None
+    assert cache.get_stats()['expired'] == 1
+
+
+def test_hit_counts_are_batched_but_listed(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set('Reviva', 'CEO', RESPONSE)
+    
+    for _ in range(3):
+        cache.get('Reviva', 'CEO')
+    assert cache.db.execute('SELECT hits FROM results').fetchone()[0] == 0
+    
+    entries = cache.list_entries()
+    assert [(entry['company'], entry['hits']) for entry in entries] == [('reviva', 3)]
+    
+    assert cache.purge(company='Reviva') == 1
+    assert cache.get('Reviva', 'CEO') is None
+
+
+class LockedDatabase:
+    """Stands in for a connection another worker holds an exclusive lock on"""
+    
+    def execute(self, *args):
+        raise sqlite3.OperationalError('database is locked')
+    
+    executemany = execute
+    
+    def commit(self):
+        raise sqlite3.OperationalError('database is locked')
+    
+    def rollback(self):
+        pass
+
+
+def test_database_errors_fall_through_to_a_live_lookup(tmp_path):
+    cache = make_cache(tmp_path, touch_batch=1)
+    cache.db = LockedDatabase()
+    
+    assert cache.get('Reviva', 'CEO') is None
+    cache.set('Reviva', 'CEO', RESPONSE)
+    cache.flush()
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_corrupt_rows_are_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set('Reviva', 'CEO', RESPONSE)
+    cache.db.execute("UPDATE results SET response = '{not json'")
+    
+    assert cache.get('Reviva', 'CEO') is None
@@ -0,0 +1,141 @@
+"""
+Stream handling in script.js, run under node against a stubbed DOM and EventSource
+"""
+import os
+import json
+import shutil
+import subprocess
+import pytest
+from conftest import REPO_ROOT
+
+NODE = shutil.which('node')
+
+pytestmark = pytest.mark.skipif(NODE is None, reason='needs node')
+
+# Loads script.js with just enough of a browser for streamSearch, replays the
+# given events on the EventSource it opens and prints what the page shows
+HARNESS = r'''
+const fs = require('fs');
+const vm = require('vm');
+const [scriptPath, events] = [process.argv[1], JSON.parse(process.argv[2])];
+
+const elements = {};
+function element(id) {
+    if (!elements[id]) {
+        elements[id] = {
+            style: {}, innerHTML: '', textContent: '', disabled: false,
+            querySelector: (selector) => element(id + ' ' + selector)
+        };
+    }
+    return elements[id];
+}
+
+class FakeEventSource {
+    constructor(url) {
+        this.url = url;
+        this.closed = false;
+        this.listeners = {};
+        FakeEventSource.opened.push(this);
+    }
+    addEventListener(name, listener) {
+        (this.listeners[name] = this.listeners[name] || []).push(listener);
+    }
+    close() {
+        this.closed = true;
+    }
+}
+FakeEventSource.opened = [];
+
+const context = {
+    console: { error: () => {} },
+    URLSearchParams,
+    EventSource: FakeEventSource,
+    document: {
+        getElementById: element,
+        querySelector: element,
+        addEventListener: () => {}
+    }
+};
+context.window = context;
+vm.createContext(context);
+vm.runInContext(fs.readFileSync(scriptPath, 'utf8'), context);
+
+context.streamSearch('Reviva', 'CEO');
+const source = FakeEventSource.opened[0];
+const shown = [];
+for (const [name, data] of events) {
+    const event = data === null ? {} : { data: JSON.stringify(data) };
+    for (const listener of source.listeners[name] || []) {
+        listener(event);
+    }
+    shown.push({
+        results: element('results').innerHTML.replace(/\s+/g, ' '),
+        resultsVisible: element('resultsSection').style.display,
+        error: element('.error-card').textContent,
+        errorVisible: element('errorSection').style.display,
+        loading: element('searchBtn').disabled
+    });
+}
+console.log(JSON.stringify({ url: source.url, closed: source.closed, shown }));
+'''
+
+PERSON = {
+    'first_name': 'Ana', 'last_name': 'Silva', 'current_title': 'CEO',
+    'confidence': 0.9, 'source_url': 'https://reviva.example/team'
+}
+
+
+def run_stream(events):
+    result = subprocess.run(
+        [NODE, '-e', HARNESS, os.path.join(REPO_ROOT, 'script.js'), json.dumps(events)],
+        capture_output=True, text=True, timeout=30, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def test_provisional_answers_show_until_done():
+    provisional = {'success': True, 'person': dict(PERSON, last_name='Sousa'), 'sources_used': 1}
+    done = {'success': True, 'person': PERSON, 'sources_used': 3}
+    
+    stream = run_stream([['provisional', provisional], ['done', done]])
+    
+    assert stream['url'].endswith('/search/stream?company=Reviva&designation=CEO')
+    first, last = stream['shown']
+    assert 'Best Match So Far' in first['results'] and 'Sousa' in first['results']
+    assert first['resultsVisible'] == 'block'
+    assert 'Person Found' in last['results'] and 'Silva' in last['results']
+    assert 'Still searching' not in last['results']
+    assert stream['closed'] and not last['loading']
+
+
+def test_unsuccessful_done_hides_the_provisional_answer():
+    provisional = {'success': True, 'person': PERSON, 'sources_used': 1}
+    
+    stream = run_stream([['provisional', provisional], ['done', {'success': False, 'error': 'No match'}]])
+    
+    last = stream['shown'][-1]
+    assert last['resultsVisible'] == 'none'
+    assert last['error'] == 'No match' and last['errorVisible'] == 'block'
+
+
+def test_server_errors_show_their_message():
+    stream = run_stream([['error', {'success': False, 'error': 'backend down'}]])
+    
+    assert stream['closed']
+    assert stream['shown'][0]['error'] == 'backend down'
+
+
+def test_connection_errors_after_done_are_ignored():
+    done = {'success': True, 'person': PERSON, 'sources_used': 3}
+    
+    stream = run_stream([['done', done], ['error', None]])
+    
+    assert stream['shown'][-1].get('errorVisible') != 'block'
+    assert 'Person Found' in stream['shown'][-1]['results']
+
+
+def test_connection_errors_before_done_show_a_hint():
+    stream = run_stream([['error', None]])
+    
+    assert stream['closed']
+    assert stream['shown'][0]['error'].startswith('Error connecting to server')
@@ -0,0 +1,67 @@
+import time
+from search_cache import SearchCache
+
+RESULTS = [{'title': 'Reviva', 'href': 'https://reviva.example/team', 'body': 'Anna Weber, CEO'}]
+
+
+def make_cache(tmp_path, **options):
+    return SearchCache(path=str(tmp_path / 'search_cache.db'), **options)
+
+
+def accessed_at(cache, query):
+    key = cache.make_key(query, 'wt-wt', None, 10)
+    return cache.db.execute('SELECT accessed_at FROM search_cache WHERE key = ?', (key,)).fetchone()[0]
+
+
+def test_results_survive_a_restart(tmp_path):
+    make_cache(tmp_path).set('Reviva  CEO', 'wt-wt', None, 10, RESULTS)
+    
+    cache = make_cache(tmp_path)
+    
+    assert cache.get('reviva ceo', 'wt-wt', None, 10) == RESULTS
+    assert cache.get('reviva ceo', 'wt-wt', None, 10) == RESULTS
+    assert cache.get('reviva ceo', 'us-en', None, 10) is None
+    stats = cache.get_stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = make_cache(tmp_path, ttl=0)
+    cache.set('Reviva CEO', 'wt-wt', None, 10, RESULTS)
+    time.sleep(0.01)
+    
+    assert cache.get('Reviva CEO', 'wt-wt', None, 10) is None
+    assert make_cache(tmp_path, ttl=0).get('Reviva CEO', 'wt-wt', None, 10) is None
+
+
+def test_hits_do_not_write_until_the_batch_is_full(tmp_path):
+    cache = make_cache(tmp_path, touch_batch=3)
+    cache.set('a', 'wt-wt', None, 10, RESULTS)
+    cache.set('b', 'wt-wt', None, 10, RESULTS)
+    stored = accessed_at(cache, 'a')
+    
+    cache.get('a', 'wt-wt', None, 10)
+    cache.get('b', 'wt-wt', None, 10)
+    assert accessed_at(cache, 'a') == stored
+    
+    cache.set('c', 'wt-wt', None, 10, RESULTS)
+    assert accessed_at(cache, 'a') > stored
+    
+    for query in 'abc':
+        cache.get(query, 'wt-wt', None, 10)
+    assert not cache.touched
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    cache = make_cache(tmp_path, max_entries=50, memory_entries=1)
+    for i in range(99):
+        cache.set(f'query {i}', 'wt-wt', None, 10, RESULTS)
+        if i == 0:
+            time.sleep(0.01)
+    cache.get('query 0', 'wt-wt', None, 10)
+    
+    cache.set('query 99', 'wt-wt', None, 10, RESULTS)
+    
+    assert cache.get_stats()['disk_size'] == 50
+    assert make_cache(tmp_path).get('query 0', 'wt-wt', None, 10) == RESULTS
+    assert make_cache(tmp_path).get('query 1', 'wt-wt', None, 10) is None
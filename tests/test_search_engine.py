@@ -0,0 +1,110 @@
+import time
+import threading
+import pytest
+import metrics
+from metrics import collect_timings, stage
+from search_cache import SearchCache
+from search_engine import SearchEngine
+from search_backends import SearchBackend
+from rate_limiter import BATCH
+
+REGIONS = ['wt-wt', 'us-en', 'uk-en']
+
+
+class FakeBackend(SearchBackend):
+    """Answers every region with one shared and one region-specific link, slowest region first"""
+    
+    name = 'fake'
+    rate_limited = False
+    
+    def __init__(self, delays=None):
+        self.delays = delays or {'wt-wt': 0.15, 'us-en': 0.05, 'uk-en': 0.0}
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def text(self, query, region, timelimit, max_results):
+        with self.lock:
+            self.calls.append((query, region))
+        time.sleep(self.delays.get(region, 0))
+        with stage('backend'):
+            pass
+        return [
+            {'title': query, 'link': f'https://{region}.example/{query}', 'snippet': region},
+            {'title': query, 'link': f'https://shared.example/{query}', 'snippet': region},
+        ]
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    def make(max_workers=8, **backend_options):
+        engine = SearchEngine(max_workers=max_workers, backend=FakeBackend(**backend_options),
+                              cache=SearchCache(path=str(tmp_path / f'cache{max_workers}.db')))
+        engine.adaptive_regions = False
+        engine.hedging = False
+        return engine
+    return make
+
+
+def test_fan_out_merges_in_attempt_order(make_engine):
+    engine = make_engine()
+    
+    results = engine.search_many(['a', 'b'], max_results=10)
+    
+    # The worldwide attempt finishes last but still comes first, and keeps the shared link
+    assert [result['link'] for result in results['a']] == [
+        'https://wt-wt.example/a', 'https://shared.example/a', 'https://us-en.example/a', 'https://uk-en.example/a'
+    ]
+    assert results['a'][1]['snippet'] == 'wt-wt'
+    assert len(engine.backend.calls) == 6
+
+
+def test_fan_out_matches_the_serial_path(make_engine):
+    parallel = make_engine().search_many(['a', 'b'], max_results=3)
+    serial = make_engine(max_workers=1).search_many(['a', 'b'], max_results=3)
+    
+    assert parallel == serial
+
+
+@pytest.mark.parametrize('max_workers', [1, 8])
+def test_each_attempt_is_reported_in_the_callers_context(make_engine, monkeypatch, max_workers):
+    monkeypatch.setattr(metrics, '_enabled', True)
+    engine = make_engine(max_workers=max_workers)
+    reported = []
+    
+    def on_results(results, query):
+        with stage('on_results'):
+            reported.append((query, results[0]['snippet']))
+    
+    with collect_timings() as timings:
+        engine.search_many(['a'], on_results=on_results)
+    
+    assert sorted(reported) == [('a', region) for region in sorted(REGIONS)]
+    assert timings.to_dict()['stages']['on_results']['calls'] == 3
+
+
+def test_batch_attempts_do_not_queue_interactive_ones(make_engine, monkeypatch):
+    monkeypatch.setenv('SEARCH_BATCH_WORKERS', '1')
+    engine = make_engine(max_workers=2, delays={region: 0.15 for region in REGIONS})
+    
+    batch = threading.Thread(target=engine.search_many, args=(['b1', 'b2'],), kwargs={'priority': BATCH})
+    batch.start()
+    time.sleep(0.02)
+    started = time.monotonic()
+    engine.search('a')
+    elapsed = time.monotonic() - started
+    batch.join()
+    
+    # Sharing the interactive pool, the six batch attempts would hold it for 0.45s first
+    assert elapsed < 0.45
+
+
+def test_serial_path_stops_at_cancellation(make_engine):
+    engine = make_engine(max_workers=1)
+    cancel_event = threading.Event()
+    
+    def on_results(results, query):
+        cancel_event.set()
+    
+    engine.search_many(['a'], cancel_event=cancel_event, on_results=on_results)
+    
+    assert engine.backend.calls == [('a', 'wt-wt')]
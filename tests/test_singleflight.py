@@ -0,0 +1,117 @@
+import time
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from deadline import deadline_scope, current_deadline, mark_degraded
+from singleflight import SingleFlight
+
+
+def run_concurrently(flight, fn, callers):
+    """Start a leader, let the followers join while it is blocked, then release it"""
+    release = threading.Event()
+    started = threading.Event()
+    
+    def call():
+        started.set()
+        release.wait(5)
+        return fn()
+    
+    with ThreadPoolExecutor(callers) as executor:
+        leader = executor.submit(flight.do, 'key', call)
+        started.wait(5)
+        followers = [executor.submit(flight.do, 'key', call) for _ in range(callers - 1)]
+        deadline = time.monotonic() + 5
+        while flight.get_stats()['followers'] < callers - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        return [leader] + followers
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight('test')
+    calls = []
+    
+    futures = run_concurrently(flight, lambda: calls.append(1) or {'person': 'Anna Weber'}, 4)
+    
+    results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.get_stats() == {'leaders': 1, 'followers': 3, 'in_flight': 0}
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight('test')
+    
+    def fail():
+        raise TimeoutError('search backend down')
+    
+    for future in run_concurrently(flight, fail, 3):
+        with pytest.raises(TimeoutError):
+            future.result()
+
+
+def test_key_is_released_once_the_call_finishes():
+    flight = SingleFlight('test')
+    
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.get_stats() == {'leaders': 2, 'followers': 0, 'in_flight': 0}
+
+
+def call_within(flight, fn, budget, reason=None):
+    """flight.do under its own deadline, optionally degraded beforehand; returns (result, reasons)"""
+    with deadline_scope(budget) as deadline:
+        if reason:
+            mark_degraded(reason)
+        return flight.do('key', fn), deadline.reasons
+
+
+def join_leader(flight, fn, budgets):
+    """Run the first budget's call as leader and the rest as followers, releasing the leader once all joined"""
+    started = threading.Event()
+    release = threading.Event()
+    
+    def leader_fn():
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        return fn()
+    
+    with ThreadPoolExecutor(len(budgets)) as executor:
+        futures = [executor.submit(call_within, flight, leader_fn, *budgets[0])]
+        started.wait(5)
+        futures += [executor.submit(call_within, flight, leader_fn, *budget) for budget in budgets[1:]]
+        while flight.get_stats()['followers'] < len(budgets) - 1:
+            time.sleep(0.001)
+        release.set()
+        return [future.result() for future in futures]
+
+
+def test_followers_with_more_time_rerun_a_call_the_deadline_cut_short():
+    flight = SingleFlight('test')
+    calls = []
+    
+    def fetch():
+        calls.append(current_deadline().budget)
+        if len(calls) == 1:
+            mark_degraded('page_fetch_timeout')
+            return None
+        return 'page'
+    
+    leader, shorter, longer = join_leader(flight, fetch, [(1,), (0.5,), (10,)])
+    
+    assert leader == (None, ['page_fetch_timeout'])
+    # Sharing the cut result marks the follower's own lookup degraded, so it is not cached
+    assert shorter == (None, ['page_fetch_timeout'])
+    assert longer == ('page', [])
+    assert calls == [1, 10]
+
+
+def test_a_leader_degraded_earlier_still_shares_a_complete_call():
+    flight = SingleFlight('test')
+    calls = []
+    
+    results = join_leader(flight, lambda: calls.append(1) or 'page', [(1, 'search_timeout'), (10,)])
+    
+    assert results == [('page', ['search_timeout']), ('page', [])]
+    assert len(calls) == 1
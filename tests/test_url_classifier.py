@@ -0,0 +1,55 @@
+import pytest
+from url_classifier import URLClassifier, registrable_domain
+
+
+@pytest.mark.parametrize('host, domain', [
+    ('it.linkedin.com', 'linkedin.com'),
+    ('www.bbc.co.uk', 'bbc.co.uk'),
+    ('reviva.com', 'reviva.com'),
+    ('news.example.com.au', 'example.com.au'),
+])
+def test_registrable_domain(host, domain):
+    assert registrable_domain(host) == domain
+
+
+def test_classify_reads_credibility_and_page_hints():
+    classifier = URLClassifier()
+    
+    profile = classifier.classify('https://de.linkedin.com/in/anna-weber-ceo')
+    team = classifier.classify('https://www.essenceofitaly.com/about/team')
+    
+    assert (profile.domain, profile.credible, profile.weight) == ('linkedin.com', True, 0.3)
+    assert profile.role_hint and not profile.people_path
+    assert (team.host, team.credible, team.people_path) == ('essenceofitaly.com', False, True)
+    assert classifier.is_company_site(team, 'Essence of Italy')
+    assert not classifier.is_company_site(profile, 'Essence of Italy')
+    assert classifier.mentions_company(classifier.classify('https://news.example/essence-of-italy-hires'),
+                                       'Essence of Italy')
+
+
+def test_classifications_are_memoized_and_bounded():
+    classifier = URLClassifier(max_urls=2)
+    
+    first = classifier.classify('https://a.example/team')
+    assert classifier.classify('https://a.example/team') is first
+    
+    classifier.classify('https://b.example/')
+    classifier.classify('https://a.example/team')
+    classifier.classify('https://c.example/')
+    
+    assert list(classifier.urls) == ['https://a.example/team', 'https://c.example/']
+
+
+def test_malformed_urls_classify_as_not_credible():
+    info = URLClassifier().classify('http://[not-an-ip/team')
+    
+    assert not info.credible and info.host == ''
+
+
+def test_domain_verdicts_are_bounded():
+    classifier = URLClassifier(max_hosts=2)
+    
+    for host in ('a.example', 'b.example', 'a.example', 'c.example'):
+        classifier.get_domain_verdict(host)
+    
+    assert list(classifier.domains) == ['a.example', 'c.example']
@@ -0,0 +1,45 @@
+from validator import Validator
+
+
+def mention(name, url, context_score=0.9, validation='snippet'):
+    return {'name': name, 'source_url': url, 'context_score': context_score, 'validation': validation}
+
+
+def test_company_name_on_many_domains_does_not_beat_the_person():
+    # The company name is on every source, the person on fewer of them
+    candidates = [
+        mention('Exped Tribe', 'https://www.linkedin.com/company/exped-tribe'),
+        mention('Exped Tribe', 'https://www.exped-tribe.com/about/team', validation='full_page'),
+        mention('Exped Tribe', 'https://news.example.com/exped-tribe'),
+        mention('Exped Tribe', 'https://reviews.example.com/exped-tribe'),
+        mention('Exped Tribe LinkedIn', 'https://www.crunchbase.com/organization/exped-tribe'),
+        mention('Lars Dubois', 'https://www.linkedin.com/in/lars-dubois'),
+        mention('L. Dubois', 'https://www.exped-tribe.com/about/team', validation='full_page')
+    ]
+    
+    best = Validator().cross_validate(candidates, 'Exped Tribe GmbH', 'Founder, Director')
+    
+    assert best['name'] == 'Lars Dubois'
+    assert set(best['domains']) == {'linkedin.com', 'exped-tribe.com'}
+
+
+def test_corroboration_raises_confidence():
+    validator = Validator()
+    one = validator.aggregate_confidence([0.6])
+    two = validator.aggregate_confidence([0.6, 0.6])
+    
+    assert one == 0.6
+    assert one < two < 1.0
+
+
+def test_variants_on_other_domains_are_one_person():
+    candidates = [
+        mention('Anna Rossi', 'https://www.linkedin.com/in/anna-rossi'),
+        mention('A. Rossi', 'https://www.wikipedia.org/wiki/Sentima'),
+        mention('Marco Bianchi', 'https://blog.example.com/post', context_score=0.5)
+    ]
+    
+    best = Validator().cross_validate(candidates, 'Sentima', 'Founder')
+    
+    assert best['name'] == 'Anna Rossi'
+    assert len(best['sources']) == 2
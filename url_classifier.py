@@ -0,0 +1,138 @@
+"""
+URL classification shared by the credibility filter and the validator
+"""
+import re
+import threading
+from collections import namedtuple, OrderedDict
+from urllib.parse import urlparse
+
+# Registrable domain -> (credible source, confidence boost in Validator.calculate_confidence)
+CREDIBLE_DOMAINS = {
+    'linkedin.com': (True, 0.3),
+    'wikipedia.org': (True, 0.3),
+    'bloomberg.com': (True, 0.25),
+    'forbes.com': (True, 0.25),
+    'crunchbase.com': (True, 0.25),
+    'reuters.com': (True, 0.0),
+    'businessinsider.com': (True, 0.0),
+    'techcrunch.com': (True, 0.0)
+}
+
+# Second-level labels under which domains are registered one level deeper (example.co.uk)
+SECOND_LEVEL_LABELS = {'co', 'com', 'net', 'org', 'gov', 'edu', 'ac', 'or', 'ne', 'go', 'gob', 'ltd', 'plc'}
+
+# Paths that point at people pages, and role words anywhere in a URL
+PEOPLE_PATHS = ('/about', '/team', '/leadership', '/executives')
+ROLE_WORDS = ('ceo', 'founder', 'director', 'president')
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
+URLClass = namedtuple('URLClass', [
+    'url', 'host', 'domain', 'path', 'credible', 'weight', 'people_path', 'role_hint', 'compact'
+])
+
+
+def registrable_domain(host):
+    """'it.linkedin.com' -> 'linkedin.com', 'www.bbc.co.uk' -> 'bbc.co.uk'"""
+    labels = host.strip('.').split('.')
+    if len(labels) <= 2:
+        return host
+    if len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def compact(text):
+    """Lowercase alphanumerics only, for matching company names inside hosts and paths"""
+    return NON_ALNUM_RE.sub('', text.lower())
+
+
+class URLClassifier:
+    """Parses each URL once and memoizes its credibility verdict
+    
+    Verdicts are cached per registrable domain and classifications per URL,
+    so the credibility filter, the validator and corroboration counting all
+    reuse the same parse of a result's link.
+    """
+    
+    def __init__(self, credible_domains=None, max_urls=4096, max_hosts=4096):
+        self.credible_domains = credible_domains or CREDIBLE_DOMAINS
+        self.max_urls = max_urls
+        self.max_hosts = max_hosts
+        
+        self.domains = OrderedDict()  # host -> (registrable domain, credible, weight), most recently used last
+        self.urls = OrderedDict()  # url -> URLClass, most recently used last
+        self.lock = threading.Lock()
+    
+    def get_domain_verdict(self, host):
+        """(registrable domain, credible, weight) for a host"""
+        with self.lock:
+            verdict = self.domains.get(host)
+            if verdict is not None:
+                self.domains.move_to_end(host)
+                return verdict
+        
+        domain = registrable_domain(host)
+        credible, weight = self.credible_domains.get(domain, (False, 0.0))
+        verdict = (domain, credible, weight)
+        
+        with self.lock:
+            self.domains[host] = verdict
+            while len(self.domains) > self.max_hosts:
+                self.domains.popitem(last=False)
+        return verdict
+    
+    def classify(self, url):
+        """URLClass for a link, parsed on first sight and memoized after"""
+        with self.lock:
+            info = self.urls.get(url)
+            if info is not None:
+                self.urls.move_to_end(url)
+                return info
+        
+        try:
+            parsed = urlparse(url)
+            host = (parsed.hostname or '').lower()
+            path = parsed.path.lower()
+        except ValueError:
+            host, path = '', ''
+        if host.startswith('www.'):
+            host = host[4:]
+        
+        domain, credible, weight = self.get_domain_verdict(host)
+        people_path = any(hint in path for hint in PEOPLE_PATHS)
+        location = host + path
+        role_hint = any(word in location for word in ROLE_WORDS)
+        info = URLClass(url, host, domain, path, credible, weight, people_path, role_hint, compact(location))
+        
+        with self.lock:
+            self.urls[url] = info
+            while len(self.urls) > self.max_urls:
+                self.urls.popitem(last=False)
+        return info
+    
+    def get_domain(self, url):
+        """Registrable domain of a URL, the unit of independent corroboration"""
+        return self.classify(url).domain
+    
+    def is_company_site(self, info, company):
+        """Whether the host itself is named after the company (essenceofitaly.com)"""
+        name = compact(company)
+        return len(name) >= 3 and name in compact(info.host)
+    
+    def mentions_company(self, info, company):
+        """Whether a URL's host or path spells out the company name ('Essence of Italy' in essenceofitaly.com)"""
+        name = compact(company)
+        return len(name) >= 3 and name in info.compact
+
+
+_default_classifier = None
+_default_classifier_lock = threading.Lock()
+
+def get_default_classifier():
+    """Process-wide classifier shared by SearchEngine and Validator"""
+    global _default_classifier
+    with _default_classifier_lock:
+        if _default_classifier is None:
+            _default_classifier = URLClassifier()
+        return _default_classifier
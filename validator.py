@@ -1,84 +1,132 @@
 """
 Enhanced validation with better handling for smaller companies
 """
-import re
-from difflib import SequenceMatcher
+from collections import Counter
+from executive_registry import get_default_registry
+from name_gazetteer import get_default_gazetteers
+from name_clusters import cluster_candidates, name_tokens, get_company_tokens, is_person_cluster
+from url_classifier import get_default_classifier
+from metrics import timed
 
 class Validator:
-    def __init__(self):
-        self.known_people = {
-            'tesla': {'elon musk': 1.0, 'elon': 0.9, 'musk': 0.9},
-            'apple': {'tim cook': 1.0, 'tim': 0.9, 'cook': 0.9},
-            'microsoft': {'satya nadella': 1.0, 'satya': 0.9, 'nadella': 0.9},
-            'google': {'sundar pichai': 1.0, 'sundar': 0.9, 'pichai': 0.9},
-            'amazon': {'andy jassy': 1.0, 'andy': 0.9, 'jassy': 0.9},
-            'meta': {'mark zuckerberg': 1.0, 'mark': 0.9, 'zuckerberg': 0.9},
-            'facebook': {'mark zuckerberg': 1.0, 'mark': 0.9, 'zuckerberg': 0.9}
-        }
-        
-        # Common first and last names for validation
-        self.common_first_names = [
-            'john', 'jane', 'michael', 'sarah', 'david', 'lisa', 'robert',
-            'mary', 'william', 'patricia', 'james', 'jennifer', 'charles',
-            'linda', 'thomas', 'elizabeth', 'george', 'susan', 'joseph',
-            'jessica', 'richard', 'karen', 'daniel', 'nancy', 'mark',
-            'betty', 'donald', 'helen', 'paul', 'sandra', 'steven',
-            'donna', 'andrew', 'carol', 'kenneth', 'ruth', 'joshua',
-            'sharon', 'kevin', 'michelle', 'brian', 'laura', 'timothy'
-        ]
-        
-        self.common_last_names = [
-            'smith', 'johnson', 'williams', 'brown', 'jones', 'garcia',
-            'miller', 'davis', 'rodriguez', 'martinez', 'wilson', 'anderson',
-            'taylor', 'thomas', 'moore', 'jackson', 'martin', 'lee',
-            'white', 'harris', 'clark', 'lewis', 'robinson', 'walker',
-            'young', 'allen', 'king', 'wright', 'scott', 'torres',
-            'nguyen', 'hill', 'flores', 'green', 'adams', 'nelson',
-            'baker', 'hall', 'rivera', 'campbell', 'mitchell', 'carter'
-        ]
+    def __init__(self, registry=None, first_names=None, last_names=None, classifier=None):
+        # Known executives, shared with the NameExtractor
+        self.registry = registry or get_default_registry()
+        
+        # URL classifications and credibility weights, shared with the SearchEngine
+        self.classifier = classifier or get_default_classifier()
+        
+        # First and last name gazetteers with frequency weights
+        if first_names is None or last_names is None:
+            default_first_names, default_last_names = get_default_gazetteers()
+            first_names = first_names or default_first_names
+            last_names = last_names or default_last_names
+        self.first_names = first_names
+        self.last_names = last_names
+        
+        # How much each additional independent domain adds to a cluster's confidence
+        self.corroboration_weight = 0.5
     
+    @timed('validation')
     def cross_validate(self, candidates, company, designation):
-        """Find the best candidate with lower threshold for smaller companies"""
+        """Find the best-corroborated person with lower threshold for smaller companies
+        
+        Candidates are clustered by name variant (see name_clusters) and each
+        cluster is scored from the best mention on every domain it appears on.
+        Clusters that are the company name or a site/page name are skipped.
+        The returned candidate carries the cluster's fullest name, its combined
+        confidence, 'sources' (best mention per domain) and 'domains'.
+        """
         if not candidates:
             return None
         
-        company_lower = company.lower()
-        designation_lower = designation.lower()
-        
         # First, check if we have a known person (high confidence)
-        for candidate in candidates:
-            name_lower = candidate['name'].lower()
-            
-            for known_company, people in self.known_people.items():
-                if known_company in company_lower:
-                    for person_name, confidence in people.items():
-                        if person_name in name_lower or name_lower in person_name:
-                            candidate['confidence'] = confidence
-                            candidate['sources'] = [candidate]
-                            return candidate
-        
-        # If no known person, evaluate all candidates with lower threshold
+        known_people = self.registry.get_known_people(company)
+        if known_people:
+            for candidate in candidates:
+                name_lower = candidate['name'].lower()
+                
+                for person_name, confidence in known_people.items():
+                    if person_name in name_lower or name_lower in person_name:
+                        candidate['confidence'] = confidence
+                        candidate['sources'] = self.get_mentions(candidates, person_name)
+                        candidate['domains'] = [self.classifier.get_domain(source.get('source_url', ''))
+                                                for source in candidate['sources']]
+                        return candidate
+        
+        # If no known person, evaluate every cluster with lower threshold
         best_candidate = None
         best_score = 0
+        company_tokens = get_company_tokens(company)
         
-        for candidate in candidates:
-            score = self.calculate_confidence(candidate, company, designation)
+        for cluster in cluster_candidates(candidates):
+            if not is_person_cluster(cluster, company_tokens):
+                continue
+            
+            # Several mentions on one site are not independent, so keep the best per domain
+            by_domain = {}
+            for member in cluster.members:
+                score = self.calculate_confidence(member, company, designation)
+                domain = self.classifier.get_domain(member.get('source_url', ''))
+                if domain not in by_domain or score > by_domain[domain][0]:
+                    by_domain[domain] = (score, member)
+            
+            sources = sorted(by_domain.values(), key=lambda item: item[0], reverse=True)
+            score = self.aggregate_confidence([source_score for source_score, _ in sources])
             
             # Lower threshold for smaller companies (0.4 instead of 0.5)
             if score > best_score and score > 0.4:
                 best_score = score
-                candidate['confidence'] = score
-                candidate['sources'] = [candidate]
-                best_candidate = candidate
+                best_candidate = dict(
+                    sources[0][1],
+                    name=self.get_cluster_name(cluster),
+                    confidence=score,
+                    sources=[member for _, member in sources],
+                    domains=[domain for domain in by_domain if domain]
+                )
         
         return best_candidate
     
+    def get_mentions(self, candidates, person_name):
+        """First mention of a known person on each domain"""
+        sources = {}
+        for candidate in candidates:
+            name_lower = candidate['name'].lower()
+            if person_name in name_lower or name_lower in person_name:
+                sources.setdefault(self.classifier.get_domain(candidate.get('source_url', '')), candidate)
+        return list(sources.values())
+    
+    def aggregate_confidence(self, scores):
+        """Combine per-domain scores, strongest first
+        
+        The best score counts fully; every further domain removes part of the
+        remaining doubt, weighted by its own score and corroboration_weight.
+        """
+        if not scores:
+            return 0.0
+        
+        doubt = 1.0 - scores[0]
+        for score in scores[1:]:
+            doubt *= 1.0 - self.corroboration_weight * score
+        return min(1.0 - doubt, 1.0)
+    
+    def get_cluster_name(self, cluster):
+        """Fullest spelling in a cluster, most frequent first ('Elon Musk' over 'E. Musk')"""
+        counts = Counter(member['name'] for member in cluster.members)
+        
+        def fullness(name):
+            tokens = name_tokens(name)
+            has_first_name = len(tokens) > 1 and len(tokens[0]) > 1
+            return has_first_name, min(len(tokens), 3), counts[name]
+        
+        return max(counts, key=fullness)
+    
     def calculate_confidence(self, candidate, company, designation):
         """Calculate confidence score with better heuristics"""
         score = 0.2  # Base score (lowered)
         
         name = candidate.get('name', '')
-        url = candidate.get('source_url', '').lower()
+        url_class = self.classifier.classify(candidate.get('source_url', ''))
         validation = candidate.get('validation', '')
         context_score = candidate.get('context_score', 0)
         
@@ -91,15 +139,9 @@ class Validator:
         score += context_score * 0.4
         
         # Check URL credibility
-        if 'linkedin.com' in url:
-            score += 0.3
-        elif 'wikipedia.org' in url:
-            score += 0.3
-        elif 'bloomberg.com' in url or 'forbes.com' in url:
-            score += 0.25
-        elif 'crunchbase.com' in url:
-            score += 0.25
-        elif company.lower() in url:
+        if url_class.weight:
+            score += url_class.weight
+        elif self.classifier.mentions_company(url_class, company):
             score += 0.2
         
         # Check validation method
@@ -111,15 +153,17 @@ class Validator:
         # Name quality checks
         name_parts = name.lower().split()
         
-        # Check if name parts are common first/last names
+        # Check if name parts are known first/last names, weighted by frequency
         for part in name_parts:
-            if part in self.common_first_names:
-                score += 0.1
+            weight = self.first_names.lookup(part)
+            if weight:
+                score += 0.1 * weight
                 break
         
         for part in name_parts:
-            if part in self.common_last_names:
-                score += 0.1
+            weight = self.last_names.lookup(part)
+            if weight:
+                score += 0.1 * weight
                 break
         
         # Check name format